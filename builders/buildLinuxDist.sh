@@ -0,0 +1,42 @@
+#!/usr/bin/env bash
+
+# optional name suffix of the version, like ER3, also naming the system in
+# the archive name
+SUFFIX=$1
+
+# remove old build
+/bin/rm -rf build
+/bin/rm -rf dist
+/bin/rm -rf dist_assets
+
+# set the build date in version.py
+python utilities/build_version.py $SUFFIX
+
+# Regenerate messages catalog (doc/messagesCatalog.xml)
+python utilities/generate_messages_catalog.py --jobs 0 --cache .build_cache/messagesCatalog.json --shards
+
+# compute the requirements the linux build can exclude
+# (.build_cache/import_graph/linux.json)
+python utilities/build_import_graph.py linux
+
+# select and recompress the bundled images (dist_assets/images)
+python utilities/build_assets.py --jobs 0
+
+# freeze the build (build/exe.linux-MACHINE-X.Y), leaving out the
+# requirements it never imports
+python setup.py build_exe $(python utilities/build_import_graph.py --freeze-options linux)
+
+# replace the frozen images with the selected and recompressed ones
+python utilities/build_assets.py --install
+
+# precompile the bundled modules so the first launch does not compile them
+python utilities/build_precompile.py --jobs 0
+
+# fail the build when the startup got slower than for the previous version
+python utilities/build_startup_benchmark.py --record || exit 1
+
+# archive the build with the version in its name
+python utilities/build_archive.py --threads 0 --system "${SUFFIX:-linux}"
+
+# record the checksums of the artifacts (dist/checksums-VERSION.json)
+python utilities/build_manifest.py
@@ -0,0 +1,323 @@
+"""
+Benchmark suite for utilities/generate_messages_catalog.py
+
+Generates a synthetic tree of packages, times each phase of the catalog
+generation on it and compares the timings with a stored baseline:
+
+    python -m test.utilities.bench_generate_messages_catalog \\
+        --baseline bench_baseline.json --save-baseline
+    python -m test.utilities.bench_generate_messages_catalog \\
+        --baseline bench_baseline.json --threshold 0.25
+
+The second run exits with status 1 when any phase got slower than the
+baseline by more than the threshold.  Baselines are machine specific.
+"""
+import argparse
+import ast
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from unittest import mock
+
+from utilities import generate_messages_catalog, package_discovery
+
+
+PHASES = ("discovery", "parsing", "extraction", "rendering", "writing")
+DEFAULT_CORPUS = {
+    "packages": 4,
+    "modules_per_package": 150,
+    "calls_per_module": 12,
+    "log_module_ratio": 0.4,
+    "dynamic_ratio": 0.25,
+    "seed": 0,
+}
+
+_HELPER_FUNCTION = '''
+def helper_{index}(values, factor={index}):
+    """Helper code with no log calls."""
+    total = 0
+    for value in values:
+        if value % 2:
+            total += value * factor
+        else:
+            total -= value
+    return {{"total": total, "count": len(values)}}
+'''
+_LITERAL_CALL = (
+    '    modelXbrl.{function}("bench.{module}.{index}", '
+    '_("Literal message %(arg)s number {index}"), '
+    'modelObject=obj, arg={index})\n'
+)
+_TUPLE_CALL = (
+    '    modelXbrl.log("WARNING", ("bench.{module}.{index}a", '
+    '"bench.{module}.{index}b"), "Tuple message {index}", other=obj)\n'
+)
+_DYNAMIC_CALL = (
+    '    modelXbrl.{function}(code + "{index}", '
+    'msg.format({index}), modelObject=obj)\n'
+)
+
+
+def generate_corpus(root, packages, modules_per_package, calls_per_module,
+                    log_module_ratio, dynamic_ratio, seed):
+    """
+    Writes a synthetic tree of packages under root.
+
+    :param root: Directory to write the packages into.
+    :type root: str
+    :param packages: Number of top level packages.
+    :type packages: int
+    :param modules_per_package: Number of modules in each package, spread
+        over a package and a subpackage.
+    :type modules_per_package: int
+    :param calls_per_module: Number of log calls in modules having any.
+    :type calls_per_module: int
+    :param log_module_ratio: Share of the modules having log calls, the
+        others only hold helper code.
+    :type log_module_ratio: float
+    :param dynamic_ratio: Share of the log calls with dynamic arguments.
+    :type dynamic_ratio: float
+    :param seed: Seed of the random choices, for a repeatable corpus.
+    :type seed: int
+    :return: The top level package directories.
+    :rtype: list [str]
+    """
+    randomizer = random.Random(seed)
+    functions = sorted(generate_messages_catalog.FUNC_HANDLER)
+    functions.remove("log")
+    package_directories = []
+    for package in range(packages):
+        package_directory = os.path.join(root, "package{}".format(package))
+        package_directories.append(package_directory)
+        for subdirectory in ("", "sub"):
+            os.makedirs(
+                os.path.join(package_directory, subdirectory), exist_ok=True
+            )
+        for module in range(modules_per_package):
+            source = ["import os\n"]
+            source.extend(
+                _HELPER_FUNCTION.format(index=index) for index in range(3)
+            )
+            if randomizer.random() < log_module_ratio:
+                source.append("\n\ndef validate(modelXbrl, obj, code, msg):\n")
+                for index in range(calls_per_module):
+                    if randomizer.random() < dynamic_ratio:
+                        template = _DYNAMIC_CALL
+                    else:
+                        template = randomizer.choice(
+                            (_LITERAL_CALL, _LITERAL_CALL, _TUPLE_CALL)
+                        )
+                    source.append(template.format(
+                        function=randomizer.choice(functions),
+                        module=module, index=index
+                    ))
+            module_path = os.path.join(
+                package_directory, "sub" if module % 2 else "",
+                "module{}.py".format(module)
+            )
+            with open(module_path, "w", encoding="utf-8") as module_file:
+                module_file.write("".join(source))
+    return package_directories
+
+
+def _best_time(function, repeat):
+    """
+    Helper function to time a function, keeping the fastest of a few runs.
+
+    :param function: Function to time, called without arguments.
+    :type function: callable
+    :param repeat: Number of runs.
+    :type repeat: int
+    :return: The fastest run in seconds and the result of the last run.
+    :rtype: tuple (float, object)
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started_at
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def run_benchmark(corpus=None, repeat=3):
+    """
+    Times each phase of the catalog generation over a synthetic corpus.
+
+    :param corpus: Corpus parameters, see :func:`generate_corpus`, defaults
+        to :data:`DEFAULT_CORPUS`.
+    :type corpus: dict
+    :param repeat: Number of runs of each phase.
+    :type repeat: int
+    :return: The corpus parameters, its sizes and the seconds of each phase.
+    :rtype: dict
+    """
+    corpus = dict(DEFAULT_CORPUS, **(corpus or {}))
+    timings = {}
+    with tempfile.TemporaryDirectory() as root:
+        package_directories = generate_corpus(root, **corpus)
+
+        def discover():
+            seen_paths = set()
+            return [
+                module
+                for package_directory in package_directories
+                for module in package_discovery.find_modules_and_directories(
+                    package_directory, seen_paths=seen_paths
+                )
+            ]
+        timings["discovery"], modules = _best_time(discover, repeat)
+        sources = []
+        for module in modules:
+            with open(module, "rb") as module_file:
+                sources.append((module, module_file.read()))
+
+        def parse():
+            return [
+                (module, ast.parse(source.decode("utf-8"), filename=module))
+                for module, source in sources
+            ]
+        timings["parsing"], trees = _best_time(parse, repeat)
+
+        def extract():
+            id_messages = []
+            for module, tree in trees:
+                visitor = generate_messages_catalog._MessageVisitor(
+                    os.path.basename(module)
+                )
+                visitor.visit(tree)
+                id_messages.extend(visitor.id_messages)
+            return id_messages
+        timings["extraction"], id_messages = _best_time(extract, repeat)
+
+        def render():
+            return generate_messages_catalog._build_message_elements(
+                id_messages
+            )
+        timings["rendering"], lines = _best_time(render, repeat)
+
+        doc_directory = os.path.join(root, "doc")
+        with mock.patch.object(
+            generate_messages_catalog, "DOC_DIRECTORY", doc_directory
+        ):
+            timings["writing"], _ = _best_time(
+                lambda: generate_messages_catalog._write_message_files(lines),
+                repeat
+            )
+    return {
+        "corpus": corpus,
+        "modules": len(modules),
+        "messages": len(id_messages),
+        "phases": timings,
+    }
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """
+    Compares benchmark results with a baseline.
+
+    :param results: Results of :func:`run_benchmark`.
+    :type results: dict
+    :param baseline: Earlier results of :func:`run_benchmark`.
+    :type baseline: dict
+    :param threshold: Allowed slowdown of each phase, 0.25 allows phases to
+        take up to 25% longer than in the baseline.
+    :type threshold: float
+    :return: A description of each phase which regressed past the threshold.
+    :rtype: list [str]
+    """
+    if results["corpus"] != baseline["corpus"]:
+        raise ValueError(
+            "The baseline was measured over a different corpus: {}".format(
+                baseline["corpus"]
+            )
+        )
+    regressions = []
+    for phase in PHASES:
+        baseline_time = baseline["phases"].get(phase)
+        if not baseline_time:
+            continue
+        ratio = results["phases"][phase] / baseline_time
+        if ratio > 1 + threshold:
+            regressions.append(
+                "{0} took {1:.4f} secs, {2:.0%} of the baseline {3:.4f} "
+                "secs".format(
+                    phase, results["phases"][phase], ratio, baseline_time
+                )
+            )
+    return regressions
+
+
+def _parse_args(args=None):
+    """
+    Parses the command line arguments of the benchmark.
+
+    :param args: Arguments to parse, defaults to :data:`sys.argv`.
+    :type args: list [str]
+    :return: The parsed arguments.
+    :rtype: :class:`~argparse.Namespace`
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the messages catalog generator."
+    )
+    for name, default in sorted(DEFAULT_CORPUS.items()):
+        parser.add_argument(
+            "--" + name.replace("_", "-"), type=type(default), default=default,
+            help="corpus parameter (default: {})".format(default)
+        )
+    parser.add_argument(
+        "--repeat", type=int, default=3,
+        help="runs of each phase, the fastest is kept (default: 3)"
+    )
+    parser.add_argument(
+        "--baseline", metavar="FILE",
+        help="JSON baseline to compare the results with"
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true",
+        help="store the results as the new baseline instead of comparing"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.25,
+        help="allowed slowdown of each phase (default: 0.25)"
+    )
+    parser.add_argument(
+        "--output", metavar="FILE",
+        help="also write the results to this JSON file"
+    )
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    options = _parse_args(args)
+    results = run_benchmark(
+        {name: getattr(options, name) for name in DEFAULT_CORPUS},
+        options.repeat
+    )
+    print("{modules} modules, {messages} messages".format(**results))
+    for phase in PHASES:
+        print("{0:>10} {1:.4f} secs".format(phase, results["phases"][phase]))
+    if options.output:
+        with open(options.output, "w") as output_file:
+            json.dump(results, output_file, indent=2, sort_keys=True)
+    if not options.baseline:
+        return 0
+    if options.save_baseline:
+        with open(options.baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+        return 0
+    with open(options.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = compare_to_baseline(results, baseline, options.threshold)
+    for regression in regressions:
+        print("Regression: " + regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+Test file for test/utilities/bench_generate_messages_catalog.py
+"""
+import unittest
+
+from test.utilities import bench_generate_messages_catalog
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_run_benchmark_small_corpus(self):
+        """Checks every phase is timed over the synthetic corpus"""
+        results = bench_generate_messages_catalog.run_benchmark(
+            {"packages": 1, "modules_per_package": 4, "log_module_ratio": 1},
+            repeat=1
+        )
+        self.assertEqual(4, results["modules"])
+        self.assertGreater(results["messages"], 0)
+        self.assertEqual(
+            set(bench_generate_messages_catalog.PHASES),
+            set(results["phases"])
+        )
+
+    def test_compare_to_baseline(self):
+        """Checks only phases slower than the threshold are reported"""
+        baseline = {
+            "corpus": {"packages": 1},
+            "phases": {"parsing": 1.0, "writing": 1.0},
+        }
+        results = {
+            "corpus": {"packages": 1},
+            "phases": {
+                "discovery": 5.0, "parsing": 1.2, "extraction": 1.0,
+                "rendering": 1.0, "writing": 1.3
+            },
+        }
+        regressions = bench_generate_messages_catalog.compare_to_baseline(
+            results, baseline, 0.25
+        )
+        self.assertEqual(1, len(regressions))
+        self.assertTrue(regressions[0].startswith("writing"))
+        with self.assertRaises(ValueError):
+            bench_generate_messages_catalog.compare_to_baseline(
+                dict(results, corpus={"packages": 2}), baseline, 0.25
+            )
@@ -0,0 +1,119 @@
+"""
+Test file for utilities/build_archive.py
+"""
+import gzip
+import io
+import os
+import random
+import sys
+import tarfile
+import tempfile
+import unittest
+from unittest import mock
+
+from utilities import build_archive
+
+
+class TestBuildArchive(unittest.TestCase):
+
+    def test_parallel_gzip_writer_round_trip(self):
+        """Checks blocks compressed in parallel form a single gzip stream"""
+        randomizer = random.Random(0)
+        data = b"".join(
+            randomizer.choice((b"arelle ", b"xbrl ", bytes([index % 256])))
+            for index in range(50000)
+        )
+        for threads, block_size in ((1, 1000), (3, 4096), (4, 1 << 20)):
+            compressed = io.BytesIO()
+            with build_archive.ParallelGzipWriter(
+                compressed, threads=threads, block_size=block_size
+            ) as writer:
+                for start in range(0, len(data), 777):
+                    writer.write(data[start:start + 777])
+            with gzip.GzipFile(fileobj=io.BytesIO(compressed.getvalue())) \
+                    as decompressed:
+                self.assertEqual(data, decompressed.read())
+        empty = io.BytesIO()
+        build_archive.ParallelGzipWriter(empty).close()
+        self.assertEqual(b"", gzip.decompress(empty.getvalue()))
+
+    def test_write_archive(self):
+        """Checks the build tree is archived under a versioned name"""
+        self.assertEqual(
+            "arelle-linux-x86_64-1.2-ER3.tar.gz",
+            build_archive.archive_name("1.2-ER3")
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "exe.linux-x86_64-3.11")
+            os.makedirs(os.path.join(source, "lib"))
+            with open(os.path.join(source, "lib", "module.py"), "w") as module:
+                module.write("print('arelle')\n")
+            archive_file_name = os.path.join(directory, "dist", "a.tar.gz")
+            report = build_archive.write_archive(
+                source, archive_file_name, arcname="arelle", threads=2
+            )
+            self.assertEqual(os.path.getsize(archive_file_name), report.size)
+            self.assertFalse(os.path.exists(archive_file_name + ".tmp"))
+            with tarfile.open(archive_file_name) as tar:
+                self.assertEqual(
+                    ["arelle", "arelle/lib", "arelle/lib/module.py"],
+                    tar.getnames()
+                )
+                self.assertEqual(
+                    b"print('arelle')\n",
+                    tar.extractfile("arelle/lib/module.py").read()
+                )
+
+    def test_write_archive_reproducible_and_deduplicated(self):
+        """Checks identical files become links and rebuilds are identical"""
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "build")
+            for subdirectory in ("b", "a"):
+                os.makedirs(os.path.join(source, subdirectory))
+                for name, text in (("same.txt", "same"), ("own.txt", "")):
+                    with open(os.path.join(source, subdirectory, name),
+                              "w") as written_file:
+                        written_file.write(text or subdirectory)
+                with open(os.path.join(source, subdirectory, "license.txt"),
+                          "w") as license_file:
+                    license_file.write("license text")
+            first = os.path.join(directory, "first.tar.gz")
+            report = build_archive.write_archive(source, first, mtime=5)
+            self.assertEqual(
+                (6, 2, len("same") + len("license text")),
+                (report.files, report.links, report.bytes_saved)
+            )
+            os.utime(os.path.join(source, "a", "own.txt"), (1, 1))
+            second = os.path.join(directory, "second.tar.gz")
+            build_archive.write_archive(source, second, mtime=5, threads=1)
+            with open(first, "rb") as first_file, \
+                    open(second, "rb") as second_file:
+                self.assertEqual(first_file.read(), second_file.read())
+            with tarfile.open(first) as tar:
+                members = tar.getmembers()
+        self.assertEqual(
+            ["build", "build/a", "build/a/license.txt", "build/a/own.txt",
+             "build/a/same.txt", "build/b", "build/b/license.txt",
+             "build/b/own.txt", "build/b/same.txt"],
+            [member.name for member in members]
+        )
+        self.assertEqual(
+            [("build/b/license.txt", "build/a/license.txt"),
+             ("build/b/same.txt", "build/a/same.txt")],
+            [(member.name, member.linkname)
+             for member in members if member.islnk()]
+        )
+        self.assertEqual({5}, {member.mtime for member in members})
+        self.assertEqual({0}, {member.uid for member in members})
+
+    def test_default_source_follows_machine(self):
+        """Checks the default build directory is the archived machine's"""
+        with mock.patch(
+            "sysconfig.get_platform", return_value="linux-x86_64"
+        ):
+            options = build_archive._parse_args(["--machine", "aarch64"])
+        self.assertEqual("aarch64", options.machine)
+        self.assertEqual(
+            "exe.linux-aarch64-{}.{}".format(*sys.version_info[:2]),
+            os.path.basename(options.source)
+        )
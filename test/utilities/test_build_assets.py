@@ -0,0 +1,177 @@
+"""
+Test file for utilities/build_assets.py
+"""
+import os
+import re
+import struct
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+
+from utilities import build_assets
+
+
+def _png(image_data, level):
+    """Builds a 1 pixel high grayscale PNG of the given image data"""
+    def chunk(chunk_type, chunk_data):
+        return struct.pack(">I", len(chunk_data)) + chunk_type + chunk_data \
+            + struct.pack(">I", zlib.crc32(chunk_type + chunk_data))
+    compressed = zlib.compress(b"\0" + image_data, level)
+    return b"".join((
+        b"\x89PNG\r\n\x1a\n",
+        chunk(b"IHDR", struct.pack(
+            ">IIBBBBB", len(image_data), 1, 8, 0, 0, 0, 0
+        )),
+        chunk(b"tEXt", b"Comment\0kept"),
+        chunk(b"IDAT", compressed[:10]),
+        chunk(b"IDAT", compressed[10:]),
+        chunk(b"IEND", b""),
+    ))
+
+
+class TestBuildAssets(unittest.TestCase):
+
+    def test_recompress_png(self):
+        """Checks PNGs are deflated again without changing their pixels"""
+        image_data = bytes(range(256)) * 8
+        png = _png(image_data, 0)
+        recompressed = build_assets.recompress_png(png)
+        self.assertLess(len(recompressed), len(png))
+        self.assertIn(b"tEXtComment\0kept", recompressed)
+        self.assertEqual(1, recompressed.count(b"IDAT"))
+        self.assertEqual(recompressed, build_assets.recompress_png(
+            recompressed
+        ))
+
+    def test_broken_images_name_the_file(self):
+        """Checks truncated images and missing icon sources are reported"""
+        png = _png(bytes(range(256)), 0)
+        with self.assertRaisesRegex(ValueError, "truncated"):
+            build_assets.recompress_png(png[:-20])
+        with tempfile.TemporaryDirectory() as directory:
+            source_directory = os.path.join(directory, "images")
+            references = os.path.join(directory, "gui.py")
+            os.makedirs(source_directory)
+            truncated = os.path.join(source_directory, "truncated.png")
+            with open(truncated, "wb") as output:
+                output.write(png[:40])
+            with open(references, "w") as output:
+                output.write("images = ('truncated.png', 'xbrl16.ico')\n")
+            arguments = (
+                source_directory, os.path.join(directory, "output"),
+                [references], os.path.join(directory, "cache")
+            )
+            with open(os.path.join(source_directory, "xbrl16.ico"),
+                      "wb") as output:
+                output.write(b"\0\0\1\0")
+            with mock.patch.object(build_assets, "Image", None):
+                with self.assertRaisesRegex(ValueError, "xbrl128-2.gif"):
+                    build_assets.build_assets(*arguments, jobs=1)
+                with open(os.path.join(source_directory, "xbrl128-2.gif"),
+                          "wb") as output:
+                    output.write(b"GIF89a")
+                with self.assertRaisesRegex(ValueError, re.escape(truncated)):
+                    build_assets.build_assets(*arguments, jobs=1)
+
+    def test_build_assets(self):
+        """Checks unreferenced files are left out and results are cached"""
+        with tempfile.TemporaryDirectory() as directory:
+            source_directory = os.path.join(directory, "images")
+            references = os.path.join(directory, "arelle")
+            os.makedirs(source_directory)
+            os.makedirs(references)
+            files = {
+                os.path.join(source_directory, "used.png"): _png(
+                    b"\x80" * 4096, 1
+                ),
+                os.path.join(source_directory, "used.gif"): b"GIF89a",
+                os.path.join(source_directory, "unused.gif"): b"GIF89a",
+                os.path.join(source_directory, "source.psd"): b"8BPS",
+                os.path.join(references, "gui.py"): (
+                    b"images = ('used.png', 'used.gif', 'source.psd')\n"
+                ),
+            }
+            for name, contents in files.items():
+                with open(name, "wb") as output:
+                    output.write(contents)
+            output_directory = os.path.join(directory, "output")
+            cache_directory = os.path.join(directory, "cache")
+            arguments = (
+                source_directory, output_directory,
+                [references, os.path.join(directory, "missing")],
+                cache_directory
+            )
+            with mock.patch.object(build_assets, "Image", None):
+                results, excluded = build_assets.build_assets(
+                    *arguments, jobs=1
+                )
+                self.assertEqual(["source.psd", "unused.gif"], excluded)
+                self.assertEqual(
+                    [("used.gif", 6, 6, False)], results[:1]
+                )
+                self.assertLess(results[1].size, results[1].original_size)
+                self.assertEqual(
+                    ["used.gif", "used.png"], sorted(os.listdir(
+                        output_directory
+                    ))
+                )
+                results, _ = build_assets.build_assets(*arguments, jobs=1)
+            self.assertTrue(all(result.cached for result in results))
+            with self.assertRaises(FileNotFoundError):
+                build_assets.build_assets(
+                    source_directory, output_directory, [], cache_directory
+                )
+
+    def test_find_references_matches_whole_names(self):
+        """Checks names inside longer file names are not references"""
+        with tempfile.TemporaryDirectory() as directory:
+            reference_file_name = os.path.join(directory, "gui.py")
+            with open(reference_file_name, "w") as reference_file:
+                reference_file.write(
+                    "open('images/barfoo.gif')\n"
+                    "icon = 'toolbar.gif'  # see b.gif.bak\n"
+                    "logo = os.path.join(IMAGES, \"a.b.gif\")\n"
+                )
+            self.assertEqual(
+                {"toolbar.gif", "a.b.gif"},
+                build_assets.find_references(
+                    [reference_file_name],
+                    ["foo.gif", "toolbar.gif", "bar.gif", "b.gif", "a.b.gif"]
+                )
+            )
+
+    def test_install_assets(self):
+        """Checks the frozen images are replaced, or removed if left out"""
+        with tempfile.TemporaryDirectory() as directory:
+            directories = {}
+            for name in ("images", "output", "frozen"):
+                directories[name] = os.path.join(directory, name)
+                os.makedirs(directories[name])
+            files = {
+                ("images", "used.gif"): b"GIF89a original",
+                ("images", "unused.gif"): b"GIF89a",
+                ("images", "source.psd"): b"8BPS",
+                ("output", "used.gif"): b"GIF89a",
+                ("frozen", "used.gif"): b"GIF89a original",
+                ("frozen", "unused.gif"): b"GIF89a",
+                ("frozen", "other.png"): b"\x89PNG",
+            }
+            for (directory_name, name), contents in files.items():
+                with open(os.path.join(directories[directory_name], name),
+                          "wb") as output:
+                    output.write(contents)
+            self.assertEqual(
+                (["used.gif"], ["unused.gif"]),
+                build_assets.install_assets(
+                    directories["images"], directories["output"],
+                    directories["frozen"]
+                )
+            )
+            self.assertEqual(
+                ["other.png", "used.gif"],
+                sorted(os.listdir(directories["frozen"]))
+            )
+            with open(os.path.join(directories["frozen"], "used.gif"),
+                      "rb") as installed:
+                self.assertEqual(b"GIF89a", installed.read())
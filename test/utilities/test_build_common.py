@@ -0,0 +1,45 @@
+"""
+Test file for utilities/build_common.py
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from utilities import build_common
+
+
+class TestBuildCommon(unittest.TestCase):
+
+    def test_file_digest_and_version(self):
+        """Checks files are hashed and the version is read stripped"""
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "version.txt")
+            with open(file_name, "wb") as version_file:
+                version_file.write(b"1.2.3\n")
+            self.assertEqual(
+                hashlib.sha256(b"1.2.3\n").hexdigest(),
+                build_common.file_digest(file_name)
+            )
+            self.assertEqual(
+                hashlib.sha1(b"1.2.3\n").hexdigest(),
+                build_common.file_digest(file_name, "sha1")
+            )
+            self.assertEqual("1.2.3", build_common.read_version(file_name))
+
+    def test_frozen_build_directory(self):
+        """Checks the frozen directory is named after the machine"""
+        python_version = "{}.{}".format(*sys.version_info[:2])
+        with mock.patch(
+            "sysconfig.get_platform", return_value="linux-x86_64"
+        ):
+            self.assertEqual(
+                os.path.join("build", "exe.linux-x86_64-" + python_version),
+                build_common.frozen_build_directory()
+            )
+            self.assertEqual(
+                os.path.join("build", "exe.linux-aarch64-" + python_version),
+                build_common.frozen_build_directory("aarch64")
+            )
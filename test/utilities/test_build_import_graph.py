@@ -0,0 +1,98 @@
+"""
+Test file for utilities/build_import_graph.py
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+from utilities import build_import_graph
+
+
+class TestBuildImportGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        sources = {
+            "pkg/__init__.py": (
+                "import importlib\n"
+                "from . import sub\n"
+                "def load(name):\n"
+                "    return importlib.import_module(name)\n"
+            ),
+            "pkg/sub.py": (
+                "import os.path\n"
+                "from .helpers import helper\n"
+                "from pkg.data import *\n"
+                "try:\n"
+                "    import not_installed_module\n"
+                "except ImportError:\n"
+                "    pass\n"
+            ),
+            "pkg/helpers.py": "helper = importlib = None\n",
+            "pkg/data.py": "__import__('json')\n",
+            "pkg/unused.py": "import unittest\n",
+            "requirements.txt": "-r other.txt\n",
+            "other.txt": "# comment\npytest>=3\n",
+        }
+        for name, source in sources.items():
+            path = os.path.join(self.root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as source_file:
+                source_file.write(source)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_import_graph(self):
+        """Checks imports are resolved without importing the modules"""
+        graph = build_import_graph.ImportGraph([self.root] + sys.path)
+        graph.walk(["pkg.sub"])
+        self.assertEqual(
+            ["importlib", "pkg.sub"], graph.imports["pkg"]
+        )
+        self.assertEqual(
+            ["os", "pkg", "pkg.data", "pkg.helpers"], graph.imports["pkg.sub"]
+        )
+        self.assertIn("json", graph.imports)
+        self.assertNotIn("pkg.unused", graph.imports)
+        self.assertEqual({"pkg.sub"}, graph.missing["not_installed_module"])
+        self.assertNotIn("os.path", graph.missing)
+        self.assertEqual(1, graph.dynamic_imports["pkg"])
+        self.assertNotIn("pkg", sys.modules)
+
+    def test_analyze_profile(self):
+        """Checks unreachable requirements are excluded with their size"""
+        report = build_import_graph.analyze_profile(
+            build_import_graph.Profile(
+                ("pkg",), ("requirements.txt",), plugins=False
+            ),
+            self.root, [self.root] + sys.path
+        )
+        self.assertIn("pkg", report["includes"])
+        self.assertNotIn("os", report["includes"])
+        self.assertNotIn("pytest", report["includes"])
+        self.assertIn("pytest", report["excludes"])
+        self.assertGreater(report["sizes"]["excluded"]["pytest"], 0)
+        self.assertEqual(
+            sum(report["sizes"]["included"].values()),
+            report["included_bytes"]
+        )
+        self.assertEqual(1, report["dynamic_imports"]["pkg"])
+
+    def test_freeze_options(self):
+        """Checks the excluded packages are passed to the freeze"""
+        report = build_import_graph.analyze_profile(
+            build_import_graph.Profile(
+                ("pkg",), ("requirements.txt",), plugins=False
+            ),
+            self.root, [self.root] + sys.path
+        )
+        options = build_import_graph.freeze_options(report)
+        self.assertEqual(1, len(options))
+        self.assertTrue(options[0].startswith("--excludes="))
+        self.assertIn("pytest", options[0][len("--excludes="):].split(","))
+        self.assertEqual(
+            [], build_import_graph.freeze_options(dict(report, excludes=[]))
+        )
@@ -0,0 +1,104 @@
+"""
+Test file for utilities/build_manifest.py
+"""
+import hashlib
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from utilities import build_manifest
+
+
+class TestBuildManifest(unittest.TestCase):
+
+    def test_hash_file_matches_hashlib(self):
+        """Checks memory mapped chunked hashing matches a plain digest"""
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "artifact.zip")
+            data = os.urandom(100000)
+            with open(file_name, "wb") as artifact:
+                artifact.write(data)
+            empty_file_name = os.path.join(directory, "empty.zip")
+            open(empty_file_name, "wb").close()
+            self.assertEqual(
+                (len(data), hashlib.sha256(data).hexdigest()),
+                build_manifest.hash_file(file_name, chunk_size=4096)
+            )
+            self.assertEqual(
+                [(len(data), hashlib.md5(data).hexdigest())],
+                build_manifest.hash_files([file_name], "md5")
+            )
+            self.assertEqual(
+                (0, hashlib.sha256().hexdigest()),
+                build_manifest.hash_file(empty_file_name)
+            )
+            # every algorithm offered on the command line hashes
+            for algorithm in build_manifest.ALGORITHMS:
+                self.assertEqual(
+                    (0, hashlib.new(algorithm).hexdigest()),
+                    build_manifest.hash_file(empty_file_name, algorithm)
+                )
+
+    def test_write_and_verify_manifest(self):
+        """Checks artifacts are listed, then verified sizes first"""
+        current_directory = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                os.makedirs(os.path.join("dist", "Arelle.app"))
+                os.makedirs("dist_dmg")
+                files = {
+                    "dist/arelle-linux-x86_64-1.0.tar.gz": b"tarball",
+                    "dist/arelle-win-x64-1.0.exe": b"installer",
+                    "dist/Arelle.app/arelle.zip": b"bundled",
+                    "dist/notes.txt": b"notes",
+                    "dist_dmg/arelle-macOS-1.0.dmg": b"image",
+                }
+                for name, contents in files.items():
+                    with open(name, "wb") as artifact:
+                        artifact.write(contents)
+                artifacts = build_manifest.find_artifacts()
+                self.assertEqual([
+                    "dist/arelle-linux-x86_64-1.0.tar.gz",
+                    "dist/arelle-win-x64-1.0.exe",
+                    "dist_dmg/arelle-macOS-1.0.dmg",
+                ], artifacts)
+                manifest = build_manifest.write_manifest(
+                    os.path.join("dist", "checksums-1.0.json"), "1.0",
+                    artifacts, threads=2
+                )
+                self.assertEqual("1.0", manifest["version"])
+                self.assertEqual("..", manifest["root"])
+                with mock.patch("builtins.print"):
+                    self.assertEqual(0, build_manifest.main([
+                        "--verify", os.path.join("dist", "checksums-1.0.json")
+                    ]))
+                    # paths are relative to the manifest, not to the cwd
+                    os.chdir("dist_dmg")
+                    self.assertEqual(0, build_manifest.main([
+                        "--verify", os.path.join(
+                            directory, "dist", "checksums-1.0.json"
+                        )
+                    ]))
+                    os.chdir(directory)
+                self.assertEqual([], build_manifest.verify_manifest(manifest))
+
+                with open("dist_dmg/arelle-macOS-1.0.dmg", "wb") as artifact:
+                    artifact.write(b"IMAGE")
+                self.assertEqual(
+                    ["dist_dmg/arelle-macOS-1.0.dmg sha256 digest differs"],
+                    build_manifest.verify_manifest(manifest)
+                )
+                self.assertEqual([], build_manifest.verify_manifest(
+                    manifest, sizes_only=True
+                ))
+                os.remove("dist/arelle-win-x64-1.0.exe")
+                with open("dist_dmg/arelle-macOS-1.0.dmg", "ab") as artifact:
+                    artifact.write(b"!")
+                self.assertEqual([
+                    "dist/arelle-win-x64-1.0.exe is missing",
+                    "dist_dmg/arelle-macOS-1.0.dmg is 6 bytes instead of 5",
+                ], build_manifest.verify_manifest(manifest))
+            finally:
+                os.chdir(current_directory)
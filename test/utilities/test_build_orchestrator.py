@@ -0,0 +1,153 @@
+"""
+Test file for utilities/build_orchestrator.py
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from utilities import build_orchestrator
+from utilities.build_orchestrator import Step
+
+
+def _write_step(name, source, target, requires=()):
+    """Step copying the source file into the target file."""
+    return Step(
+        name,
+        [
+            sys.executable, "-c",
+            "import shutil; shutil.copy({!r}, {!r})".format(source, target)
+        ],
+        inputs=(source,), outputs=(target,), requires=requires
+    )
+
+
+class TestBuildOrchestrator(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        for name in ("a.txt", "b.txt"):
+            self.write(name, name)
+        self.steps = [
+            _write_step("packed", "copied_a.txt", "packed.txt",
+                        requires=("copy_a", "copy_b")),
+            _write_step("copy_a", "a.txt", "copied_a.txt"),
+            _write_step("copy_b", "b.txt", "copied_b.txt"),
+        ]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, text):
+        with open(os.path.join(self.root, name), "w") as written_file:
+            written_file.write(text)
+
+    def run_steps(self, steps=None, **kwargs):
+        with mock.patch("builtins.print"):
+            return build_orchestrator.run_steps(
+                steps or self.steps, self.root, **kwargs
+            )
+
+    def test_sort_steps(self):
+        """Checks steps come after their requirements, and cycles fail"""
+        self.assertEqual(
+            ["copy_a", "copy_b", "packed"],
+            [step.name for step in build_orchestrator.sort_steps(self.steps)]
+        )
+        with self.assertRaises(ValueError):
+            build_orchestrator.sort_steps([
+                Step("a", "true", requires=("b",)),
+                Step("b", "true", requires=("a",)),
+            ])
+        with self.assertRaises(ValueError):
+            build_orchestrator.sort_steps([
+                Step("a", "true", requires=("missing",))
+            ])
+        self.assertEqual(
+            ["copy_a"],
+            [step.name for step in build_orchestrator.select_steps(
+                build_orchestrator.sort_steps(self.steps), ["copy_a"]
+            )]
+        )
+
+    def test_run_steps_skips_up_to_date_steps(self):
+        """Checks only the steps whose inputs changed run again"""
+        self.assertEqual(
+            {"copy_a": "ran", "copy_b": "ran", "packed": "ran"},
+            dict(self.run_steps())
+        )
+        self.assertEqual(
+            {"copy_a": "up to date", "copy_b": "up to date",
+             "packed": "up to date"},
+            dict(self.run_steps())
+        )
+        # a changed input reruns the step and the steps requiring it
+        self.write("b.txt", "changed")
+        self.assertEqual(
+            {"copy_a": "up to date", "copy_b": "ran", "packed": "ran"},
+            dict(self.run_steps())
+        )
+        # a missing output reruns the step, and the steps requiring it as
+        # they would otherwise keep what they built out of the deleted one
+        os.remove(os.path.join(self.root, "copied_a.txt"))
+        self.assertEqual(
+            {"copy_a": "would run", "copy_b": "up to date",
+             "packed": "would run"},
+            dict(self.run_steps(dry_run=True))
+        )
+        self.assertEqual(
+            {"copy_a": "ran", "copy_b": "up to date", "packed": "ran"},
+            dict(self.run_steps())
+        )
+        self.assertEqual(
+            {"copy_a": "would run", "copy_b": "would run",
+             "packed": "would run"},
+            dict(self.run_steps(force=True, dry_run=True))
+        )
+
+    def test_run_steps_stubs_other_platforms_and_stops_on_failure(self):
+        """Checks stubbed steps let dependents run, failed ones do not"""
+        steps = [
+            Step("mac_only", "exit 1", platforms=("darwin",)),
+            _write_step("after_mac", "a.txt", "out.txt",
+                        requires=("mac_only",)),
+            Step("broken", [sys.executable, "-c", "raise SystemExit(3)"]),
+            _write_step("after_broken", "a.txt", "never.txt",
+                        requires=("broken",)),
+        ]
+        statuses = self.run_steps(steps, jobs=1, platform="linux")
+        self.assertEqual("stubbed", statuses["mac_only"])
+        self.assertEqual("ran", statuses["after_mac"])
+        self.assertEqual("failed", statuses["broken"])
+        self.assertEqual("not run", statuses["after_broken"])
+        self.assertFalse(
+            os.path.exists(os.path.join(self.root, "never.txt"))
+        )
+
+    def test_run_steps_share_jobs(self):
+        """Checks steps taking jobs split them when running in parallel"""
+        steps = [
+            Step(name, [
+                sys.executable, "-c",
+                "open({!r}, 'w').write({!r})".format(
+                    name + ".jobs", build_orchestrator.JOBS
+                )
+            ], outputs=(name + ".jobs",), requires=requires)
+            for name, requires in (
+                ("first", ()), ("second", ()), ("last", ("first", "second"))
+            )
+        ]
+        self.run_steps(steps, jobs=4)
+        jobs = {}
+        for step in steps:
+            with open(os.path.join(self.root, step.outputs[0])) as jobs_file:
+                jobs[step.name] = jobs_file.read()
+        self.assertEqual({"first": "2", "second": "2", "last": "4"}, jobs)
+        # the number of jobs is not part of what a step depends on
+        self.assertEqual(
+            {"first": "up to date", "second": "up to date",
+             "last": "up to date"},
+            dict(self.run_steps(steps, jobs=1))
+        )
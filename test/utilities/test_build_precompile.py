@@ -0,0 +1,80 @@
+"""
+Test file for utilities/build_precompile.py
+"""
+import importlib.util
+import os
+import tempfile
+import unittest
+
+from utilities import build_precompile
+
+
+class TestBuildPrecompile(unittest.TestCase):
+
+    def test_precompile(self):
+        """Checks modules are compiled once per level and skipped after"""
+        with tempfile.TemporaryDirectory() as bundle_directory:
+            sources = {
+                os.path.join("lib", "pkg", "__init__.py"): "VALUE = 1\n",
+                os.path.join("lib", "module.py"): "assert True\n",
+                os.path.join("lib", "broken.py"): "print 'python 2'\n",
+            }
+            for name, source in sources.items():
+                path = os.path.join(bundle_directory, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as source_file:
+                    source_file.write(source)
+            modules, compiled, skipped, errors = build_precompile.precompile(
+                bundle_directory, (0, 2), jobs=2
+            )
+            self.assertEqual((3, 4, 0), (modules, compiled, skipped))
+            self.assertEqual(1, len(errors))
+            self.assertIn("broken.py", errors[0])
+            pyc_file_name = importlib.util.cache_from_source(
+                os.path.join(bundle_directory, "lib", "module.py"),
+                optimization=2
+            )
+            self.assertTrue(build_precompile._is_compiled(
+                b"assert True\n", pyc_file_name
+            ))
+            self.assertEqual(
+                (3, 0, 4),
+                build_precompile.precompile(bundle_directory, (0, 2))[:3]
+            )
+            self.assertEqual(
+                (3, 2, 0),
+                build_precompile.precompile(
+                    bundle_directory, (1,), force=True
+                )[:3]
+            )
+
+    def test_frozen_layout_sources(self):
+        """Checks only the sources a frozen bundle ships are compiled"""
+        with tempfile.TemporaryDirectory() as bundle_directory:
+            # modules frozen by cx_Freeze come as pycs without their source,
+            # the plugins are shipped as sources
+            files = {
+                os.path.join("lib", "arelle", "__init__.pyc"): b"",
+                os.path.join("lib", "arelle", "Cntlr.pyc"): b"",
+                "library.zip": b"",
+                os.path.join("plugin", "validate", "__init__.py"): b"x = 1\n",
+                os.path.join("plugin", "inlineXbrlDocumentSet.py"): b"y = 2\n",
+            }
+            for name, content in files.items():
+                path = os.path.join(bundle_directory, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as bundle_file:
+                    bundle_file.write(content)
+            self.assertEqual(
+                [
+                    os.path.join(bundle_directory, "plugin",
+                                 "inlineXbrlDocumentSet.py"),
+                    os.path.join(bundle_directory, "plugin", "validate",
+                                 "__init__.py"),
+                ],
+                list(build_precompile.iter_sources(bundle_directory))
+            )
+            self.assertEqual(
+                (2, 2, 0),
+                build_precompile.precompile(bundle_directory, jobs=1)[:3]
+            )
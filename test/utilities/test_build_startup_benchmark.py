@@ -0,0 +1,91 @@
+"""
+Test file for utilities/build_startup_benchmark.py
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from utilities import build_startup_benchmark
+
+
+class TestBuildStartupBenchmark(unittest.TestCase):
+
+    def test_parse_import_times(self):
+        """Checks import times are summed per top level package"""
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   _io\n"
+            "import time:       300 |        300 |     arelle.XbrlConst\n"
+            "import time:      1000 |       1420 |   arelle.ModelXbrl\n"
+            "import time:        50 |       1470 | arelle\n"
+            "unrelated output\n"
+        )
+        self.assertEqual(
+            [
+                {"package": "arelle", "self_us": 1350, "modules": 3},
+                {"package": "_io", "self_us": 120, "modules": 1},
+            ],
+            build_startup_benchmark.parse_import_times(stderr)
+        )
+        self.assertEqual(
+            [(120, 1, "_io"), (300, 2, "arelle.XbrlConst"),
+             (1000, 1, "arelle.ModelXbrl"), (50, 0, "arelle")],
+            list(build_startup_benchmark.iter_import_times(stderr))
+        )
+
+    def test_compare_to_previous_version(self):
+        """Checks startups are compared with the previous version"""
+        baselines = {"1.0": {}, "1.1": {}, "1.2": {}}
+        self.assertEqual(
+            "1.1", build_startup_benchmark.previous_version(baselines, "1.2")
+        )
+        self.assertEqual(
+            "1.2", build_startup_benchmark.previous_version(baselines, "1.3")
+        )
+        self.assertIsNone(
+            build_startup_benchmark.previous_version({"1.0": {}}, "1.0")
+        )
+        baseline = {"first_run_secs": 1.0, "warm_median_secs": 0.5}
+        results = {"first_run_secs": 1.1, "warm_median_secs": 0.7}
+        regressions = build_startup_benchmark.compare_to_baseline(
+            results, baseline, 0.2
+        )
+        self.assertEqual(1, len(regressions))
+        self.assertTrue(regressions[0].startswith("warm_median_secs"))
+        # a cold start is not compared with a first launch from the cache
+        results = {"first_run_secs": 3.0, "cold": True,
+                   "warm_median_secs": 0.5}
+        self.assertEqual([], build_startup_benchmark.compare_to_baseline(
+            results, baseline, 0.2
+        ))
+
+    def test_main_records_and_fails_on_regression(self):
+        """Checks the benchmark records baselines and fails when slower"""
+        command = [sys.executable, "-c", "pass"]
+        with tempfile.TemporaryDirectory() as directory:
+            baseline_file = os.path.join(directory, "baseline.json")
+            arguments = [
+                "--runs", "2", "--no-import-times", "--baseline",
+                baseline_file, "--record", "--command"
+            ] + command
+            with mock.patch("builtins.print"):
+                self.assertEqual(0, build_startup_benchmark.main(
+                    ["--version", "1.0"] + arguments
+                ))
+                with open(baseline_file) as baseline:
+                    recorded = json.load(baseline)["versions"]["1.0"]
+                recorded["first_run_secs"] = 1e-9
+                recorded["warm_median_secs"] = 1e-9
+                with open(baseline_file, "w") as baseline:
+                    json.dump({"versions": {"1.0": recorded}}, baseline)
+                self.assertEqual(1, build_startup_benchmark.main(
+                    ["--version", "1.1"] + arguments
+                ))
+            with open(baseline_file) as baseline:
+                self.assertEqual(
+                    ["1.0", "1.1"], list(json.load(baseline)["versions"])
+                )
+        self.assertEqual(command, recorded["command"])
@@ -0,0 +1,77 @@
+"""
+Test file for utilities/build_zip_layout.py
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import zipfile
+
+from utilities import build_zip_layout
+
+
+class TestBuildZipLayout(unittest.TestCase):
+
+    def test_startup_modules(self):
+        """Checks modules are listed in the order their import started"""
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   _io\n"
+            "import time:        50 |        50 |     arelle.XbrlConst\n"
+            "import time:       300 |        350 |   arelle.Locale\n"
+            "import time:        50 |        520 | arelle\n"
+            "import time:        10 |         10 | json\n"
+        )
+        self.assertEqual(
+            ["arelle", "_io", "arelle.Locale", "arelle.XbrlConst", "json"],
+            build_zip_layout.startup_modules(stderr)
+        )
+
+    def test_write_zip_layout(self):
+        """Checks pure packages are packed aligned, startup modules first"""
+        sources = {
+            "pkg/__init__.py": "from pkg import hot\n",
+            "pkg/cold.py": "VALUE = 'cold'\n",
+            "pkg/hot.py": "VALUE = 'hot'\n",
+            "single.py": "VALUE = 'single'\n",
+            "native/__init__.py": "",
+            "native/library.so": "",
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            source_directory = os.path.join(directory, "lib")
+            for name, source in sources.items():
+                path = os.path.join(source_directory, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as source_file:
+                    source_file.write(source)
+            zip_file_name = os.path.join(directory, "modules.zip")
+            report = build_zip_layout.write_zip_layout(
+                source_directory, zip_file_name, ["json", "pkg", "pkg.hot"]
+            )
+            self.assertEqual(["pkg", "single"], report.packages)
+            self.assertEqual(["native"], report.skipped)
+            self.assertEqual((4, 2), report[1:3])
+            with zipfile.ZipFile(zip_file_name) as zip_file:
+                infos = zip_file.infolist()
+                self.assertEqual([
+                    "pkg/__init__.pyc", "pkg/hot.pyc", "pkg/cold.pyc",
+                    "single.pyc", "pkg/__init__.py", "pkg/cold.py",
+                    "pkg/hot.py", "single.py"
+                ], [info.filename for info in infos])
+                for info in infos:
+                    self.assertEqual(zipfile.ZIP_STORED, info.compress_type)
+                    data_offset = (
+                        info.header_offset + 30 + len(info.filename) +
+                        len(info.extra)
+                    )
+                    self.assertEqual(
+                        0, data_offset % build_zip_layout.ALIGNMENT
+                    )
+            output = subprocess.check_output([
+                sys.executable, "-s", "-B", "-c",
+                "import sys; sys.path.insert(0, sys.argv[1]); import pkg; "
+                "print(pkg.hot.VALUE, pkg.__loader__.__class__.__name__)",
+                zip_file_name
+            ])
+        self.assertEqual(b"hot zipimporter", output.split(b"\n")[0].strip())
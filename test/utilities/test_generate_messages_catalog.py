@@ -4,6 +4,11 @@ Test file for utilities/generate_messages_catalog.py
 from unittest import mock
 import unittest
 import ast
+import json
+import os
+import pickle
+import tempfile
+from xml.etree import ElementTree
 
 from utilities import generate_messages_catalog
 
@@ -27,9 +32,12 @@ class TestUtilties(unittest.TestCase):
         find_plugins.return_value = ['plugin']
         _ = generate_messages_catalog.generate_locations()
         call_list = [
-            mock.call('arelle'),
-            mock.call('root/' + generate_messages_catalog.NON_LIBRARY_PLUGINS),
-            mock.call('plugin')
+            mock.call('arelle', None, None, mock.ANY),
+            mock.call(
+                'root/' + generate_messages_catalog.NON_LIBRARY_PLUGINS,
+                None, None, mock.ANY
+            ),
+            mock.call('plugin', None, None, mock.ANY)
         ]
         find_modules.assert_has_calls(call_list, any_order=True)
         self.assertEqual(
@@ -144,3 +152,520 @@ class TestUtilties(unittest.TestCase):
         ]
         codes = generate_messages_catalog._get_message_codes(my_msg_arg)
         self.assertEqual(codes, ())
+
+    def test_iter_id_messages_parallel_matches_serial(self):
+        """Checks that parsing in a process pool yields the serial results"""
+        with tempfile.TemporaryDirectory() as directory:
+            modules = []
+            for index in range(6):
+                module = os.path.join(directory, "mod{}.py".format(index))
+                with open(module, "w", encoding="utf-8") as module_file:
+                    module_file.write(
+                        'self.error("code{0}", _("text {0}"), arg=1)\n'
+                        'self.info("info{0}", "more text")\n'.format(index)
+                    )
+                modules.append(module)
+            serial = list(generate_messages_catalog._iter_id_messages(modules))
+            parallel = list(
+                generate_messages_catalog._iter_id_messages(modules, jobs=2)
+            )
+        self.assertEqual(serial, parallel)
+        self.assertEqual(6, len(parallel))
+
+    def test_iter_module_sources_reader_threads_keep_order(self):
+        """Checks that prefetching modules in threads keeps their order"""
+        with tempfile.TemporaryDirectory() as directory:
+            modules = []
+            for index in range(10):
+                module = os.path.join(directory, "mod{}.py".format(index))
+                with open(module, "wb") as module_file:
+                    module_file.write(b"x = %d\n" % index)
+                modules.append(module)
+            serial = list(
+                generate_messages_catalog._iter_module_sources(modules)
+            )
+            for readers, read_ahead in ((1, 1), (4, 3), (3, 20)):
+                self.assertEqual(serial, list(
+                    generate_messages_catalog._iter_module_sources(
+                        iter(modules), readers=readers, read_ahead=read_ahead
+                    )
+                ))
+        self.assertEqual(
+            (modules[3], b"x = 3\n", None), serial[3]
+        )
+
+    def test_read_module_source_prefilter(self):
+        """Checks that only modules without handled calls skip parsing"""
+        sources = {
+            "helper.py": b"def info(x):\n    return x.informal\n",
+            "call.py": b"self.error('code', 'text')\n",
+            "split.py": b"(self.  # comment\n  \\\n  log('INFO', 'c', 't'))\n",
+            # identifiers are NFKC normalized, "\uff49nfo" is "info"
+            "missed.py": "self.\uff49nfo('code', 'text')\n".encode("utf-8"),
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            results = {}
+            for name, source in sources.items():
+                module = os.path.join(directory, name)
+                with open(module, "wb") as module_file:
+                    module_file.write(source)
+                results[name] = generate_messages_catalog._read_module_source(
+                    module, prefilter=generate_messages_catalog.PREFILTER_ON
+                )[1:]
+            with self.assertRaises(RuntimeError):
+                generate_messages_catalog._read_module_source(
+                    os.path.join(directory, "missed.py"),
+                    prefilter=generate_messages_catalog.PREFILTER_STRICT
+                )
+            self.assertEqual(
+                (None, []),
+                generate_messages_catalog._read_module_source(
+                    os.path.join(directory, "helper.py"),
+                    prefilter=generate_messages_catalog.PREFILTER_STRICT
+                )[1:]
+            )
+        self.assertEqual((None, []), results["helper.py"])
+        self.assertEqual((None, []), results["missed.py"])
+        self.assertEqual((sources["call.py"], None), results["call.py"])
+        self.assertEqual((sources["split.py"], None), results["split.py"])
+
+    def test_strict_prefilter_checks_cached_modules(self):
+        """Checks strict runs check the modules cached without messages"""
+        with tempfile.TemporaryDirectory() as directory:
+            module = os.path.join(directory, "missed.py")
+            with open(module, "wb") as module_file:
+                module_file.write(
+                    "self.\uff49nfo('code', 'text')\n".encode("utf-8")
+                )
+            cache_file_name = os.path.join(directory, "cache.json")
+            cache = generate_messages_catalog._MessageCache(cache_file_name)
+            self.assertEqual(
+                (None, []),
+                generate_messages_catalog._read_module_source(
+                    module, cache, generate_messages_catalog.PREFILTER_ON
+                )[1:]
+            )
+            cache.save()
+            cache = generate_messages_catalog._MessageCache(cache_file_name)
+            self.assertEqual(
+                (None, []),
+                generate_messages_catalog._read_module_source(
+                    module, cache, generate_messages_catalog.PREFILTER_ON
+                )[1:]
+            )
+            with self.assertRaises(RuntimeError):
+                generate_messages_catalog._read_module_source(
+                    module, cache, generate_messages_catalog.PREFILTER_STRICT
+                )
+
+    def test_prefilter_is_on_by_default(self):
+        """Checks the prefilter is on unless turned off"""
+        for args, prefilter in (
+            ([], generate_messages_catalog.PREFILTER_ON),
+            (["--no-prefilter"], generate_messages_catalog.PREFILTER_OFF),
+            (["--prefilter", "strict"],
+             generate_messages_catalog.PREFILTER_STRICT),
+        ):
+            self.assertEqual(
+                prefilter,
+                generate_messages_catalog._parse_args(args).prefilter
+            )
+
+    def test_message_cache_reparses_changed_modules_only(self):
+        """Checks that only changed modules miss the messages cache"""
+        with tempfile.TemporaryDirectory() as directory:
+            cache_file_name = os.path.join(directory, "cache.json")
+            modules = []
+            for index in range(3):
+                module = os.path.join(directory, "mod{}.py".format(index))
+                with open(module, "w", encoding="utf-8") as module_file:
+                    module_file.write(
+                        'self.error("code{0}", "text")\n'.format(index)
+                    )
+                modules.append(module)
+
+            cache = generate_messages_catalog._MessageCache(cache_file_name)
+            first = list(generate_messages_catalog._iter_id_messages(
+                modules, cache=cache
+            ))
+            cache.save()
+            self.assertEqual((0, 3), (cache.hits, cache.misses))
+
+            with open(modules[0], "a", encoding="utf-8") as module_file:
+                module_file.write('self.error("extra", "text")\n')
+            cache = generate_messages_catalog._MessageCache(cache_file_name)
+            second = list(generate_messages_catalog._iter_id_messages(
+                modules[:2], cache=cache
+            ))
+            cache.save()
+        self.assertEqual((1, 1, 1), (cache.hits, cache.misses, cache.removed))
+        self.assertEqual(first[1], second[1])
+        self.assertEqual(
+            ["code0", "extra"],
+            [id_message.message_code for id_message in second[0]]
+        )
+
+    def test_classify_argument(self):
+        """Checks each kind of argument is classified from a parsed call"""
+        call = ast.parse(
+            'log("a", ("b", "c"), _("d"), code(), "e" if x else "f")'
+        ).body[0].value
+        arguments = [
+            generate_messages_catalog._classify_argument(arg)
+            for arg in call.args
+        ]
+        self.assertEqual(
+            [
+                ("literal", ("a",)),
+                ("literals", ("b", "c")),
+                ("translation", ("d",)),
+                ("dynamic", ()),
+                ("dynamic", ()),
+            ],
+            arguments
+        )
+
+    def test_extract_id_messages_nested_calls(self):
+        """Checks that log calls nested in another log call are extracted"""
+        source = (
+            'self.error(("a", "b"), _("outer"), modelObject=x, arg=1,\n'
+            '           other=self.log("WARNING", "c", "inner"))\n'
+        ).encode("utf-8")
+        id_messages = generate_messages_catalog._extract_id_messages(
+            source, "/src/module.py"
+        )
+        self.assertEqual(
+            [
+                ("a", "error", "outer", "arg other", 1),
+                ("b", "error", "outer", "arg other", 1),
+                ("c", "warning", "inner", "", 2),
+            ],
+            [
+                (
+                    id_message.message_code, id_message.level,
+                    id_message.message, id_message.keyword_arguments,
+                    id_message.line_number
+                )
+                for id_message in id_messages
+            ]
+        )
+
+    def test_sorted_lines_external_merge(self):
+        """Checks that spilled runs merge into the in memory sort order"""
+        lines = [
+            '<message code="{0}">\ntext {1} &amp; "x"\n</message>'.format(
+                code, index
+            )
+            for index, code in enumerate("qwertyuiopasdfghjklzxcvbnm" * 3)
+        ]
+        for run_size in (1, 4, 78, 100):
+            self.assertEqual(
+                sorted(lines),
+                list(generate_messages_catalog._sorted_lines(lines, run_size))
+            )
+
+    def test_find_plugin_location_without_import(self):
+        """Checks plugins are located without running their code"""
+        with tempfile.TemporaryDirectory() as directory:
+            package = os.path.join(directory, "exploding_plugin")
+            os.mkdir(package)
+            with open(os.path.join(package, "__init__.py"), "w") as init:
+                init.write("raise RuntimeError('imported')\n")
+            with mock.patch("sys.path", [directory]):
+                location = generate_messages_catalog._find_plugin_location(
+                    "exploding-plugin"
+                )
+                with self.assertRaises(ImportError):
+                    generate_messages_catalog._find_plugin_location(
+                        "missing_plugin"
+                    )
+        self.assertEqual(package, location)
+
+    @mock.patch('utilities.generate_messages_catalog.time.perf_counter')
+    def test_catalog_stats_nested_phases(self, perf_counter):
+        """Checks nested phases exclude the time of the phases they pull"""
+        perf_counter.side_effect = [0, 10, 11, 13, 14, 16, 17, 18, 20]
+        stats = generate_messages_catalog._CatalogStats()
+        with stats.phase("writing"):
+            for _ in stats.timed("extraction", ["a", "b"]):
+                pass
+        # extraction ran 11-13, 14-16 and 17-18, writing the rest of 10-20
+        self.assertEqual(
+            {"writing": 5, "extraction": 5}, dict(stats.phase_seconds)
+        )
+
+    def test_catalog_stats_report(self):
+        """Checks modules and dynamic messages are reported"""
+        stats = generate_messages_catalog._CatalogStats()
+        record = generate_messages_catalog.MessageRecord
+        stats.add_module("slow.py", [
+            record("(dynamic)", "(dynamic)", "error", "", "slow.py", 1),
+            record("a", "text", "(dynamic)", "", "slow.py", 2),
+        ], 2.0)
+        stats.add_module("fast.py", [], 1.0)
+        stats.add_module("cached.py", [
+            record("b", "(dynamic)", "info", "", "cached.py", 1),
+        ])
+        report = stats.report(slowest=1)
+        self.assertEqual(3, report["modules"])
+        self.assertEqual(2, report["parsed_modules"])
+        self.assertEqual(3, report["messages"])
+        self.assertEqual(
+            {"codes": 1, "messages": 2, "levels": 1}, report["dynamic"]
+        )
+        self.assertEqual(
+            [{"module": "slow.py", "parse_secs": 2.0, "messages": 2}],
+            report["slowest_modules"]
+        )
+        self.assertEqual(
+            {"slow.py": 2, "fast.py": 0, "cached.py": 1},
+            report["messages_per_module"]
+        )
+
+    def test_message_record_rendering(self):
+        """Checks records pickle and render their escaped text"""
+        record = generate_messages_catalog.MessageRecord(
+            "code", 'a < b & "c"', "error", "arg other", "module.py", 7
+        )
+        self.assertEqual(record, pickle.loads(pickle.dumps(record)))
+        self.assertEqual(
+            [
+                '<message code="code"\n'
+                '         level="error"\n'
+                '         module="module.py" line="7"\n'
+                '         args="arg other">\n'
+                'a &lt; b &amp; &quot;c&quot;\n'
+                '</message>'
+            ],
+            generate_messages_catalog._build_message_elements([record])
+        )
+
+    def test_write_message_files_skips_unchanged_and_diffs(self):
+        """Checks unchanged catalogs are not rewritten and changes diffed"""
+        record = generate_messages_catalog.MessageRecord
+        id_messages = [
+            record("a", "Multi\nline & <text>", "error", "x y", "m.py", 1),
+            record("b", "kept", "info", "", "m.py", 2),
+            record("c", "old text", "warning", "", "m.py", 3),
+        ]
+        with tempfile.TemporaryDirectory() as directory, mock.patch.object(
+            generate_messages_catalog, "DOC_DIRECTORY", directory
+        ):
+            catalog = os.path.join(directory, "messagesCatalog.xml")
+            lines = generate_messages_catalog._build_message_elements(
+                id_messages
+            )
+            self.assertEqual(
+                (3, True),
+                generate_messages_catalog._write_message_files(lines)
+            )
+            entries = [
+                (element.get("code"), element.get("level"),
+                 element.get("module"), element.get("line"),
+                 element.get("args"), element.text.strip("\n"))
+                for element in ElementTree.parse(catalog).getroot()
+            ]
+            self.assertEqual(
+                entries,
+                list(generate_messages_catalog._iter_catalog_entries(catalog))
+            )
+            previous_index = generate_messages_catalog._index_catalog(catalog)
+            os.utime(catalog, (0, 0))
+            self.assertEqual(
+                (3, False),
+                generate_messages_catalog._write_message_files(lines)
+            )
+            self.assertEqual(0, os.stat(catalog).st_mtime)
+
+            id_messages[1:] = [
+                record("b", "kept", "info", "", "moved.py", 20),
+                record("c", "new text", "warning", "", "m.py", 3),
+                record("d", "added", "error", "", "m.py", 4),
+            ]
+            generate_messages_catalog._write_message_files(
+                generate_messages_catalog._build_message_elements(id_messages)
+            )
+            diff = generate_messages_catalog.diff_catalogs(
+                previous_index,
+                generate_messages_catalog._index_catalog(catalog)
+            )
+        self.assertEqual(
+            {"added": ["d"], "removed": [], "changed": ["c"]}, diff
+        )
+
+    def test_write_aggregated_message_files(self):
+        """Checks identical messages are listed once with their references"""
+        record = generate_messages_catalog.MessageRecord
+        aggregates = {}
+        generate_messages_catalog._aggregate_id_messages(aggregates, [
+            record("a", "text & more", "error", "x", "m.py", 1),
+            record("a", "text & more", "error", "y x", "n.py", 9),
+            record("a", "text & more", "error", "x", "m.py", 1),
+            record("a", "text & more", "warning", "", "m.py", 5),
+        ])
+        with tempfile.TemporaryDirectory() as directory, mock.patch.object(
+            generate_messages_catalog, "DOC_DIRECTORY", directory
+        ):
+            self.assertEqual(
+                (2, True),
+                generate_messages_catalog._write_aggregated_message_files(
+                    generate_messages_catalog._iter_aggregated_elements(
+                        aggregates
+                    )
+                )
+            )
+            root = ElementTree.parse(
+                os.path.join(directory, "messagesCatalogAggregated.xml")
+            ).getroot()
+            self.assertTrue(os.path.exists(
+                os.path.join(directory, "messagesCatalogAggregated.xsd")
+            ))
+        self.assertEqual(
+            generate_messages_catalog.ARELLE_MESSAGES_AGGREGATED_XSD_VERSION,
+            root.get("schemaVersion")
+        )
+        self.assertEqual(
+            [
+                ("error", "x y", "m.py:1 n.py:9", "text & more"),
+                ("warning", "", "m.py:5", "text & more"),
+            ],
+            [
+                (element.get("level"), element.get("args"),
+                 element.get("refs"), element.text.strip("\n"))
+                for element in root
+            ]
+        )
+
+    def test_catalog_watcher_reparses_changed_modules_only(self):
+        """Checks the watch mode only parses added and changed modules"""
+        with tempfile.TemporaryDirectory() as directory, mock.patch.object(
+            generate_messages_catalog, "DOC_DIRECTORY", directory
+        ), mock.patch("builtins.print"):
+            sources = os.path.join(directory, "sources")
+            os.makedirs(sources)
+            modules = []
+            for index in range(2):
+                module = os.path.join(sources, "mod{}.py".format(index))
+                with open(module, "w", encoding="utf-8") as module_file:
+                    module_file.write(
+                        'self.error("code{0}", "text")\n'.format(index)
+                    )
+                modules.append(module)
+            watcher = generate_messages_catalog._CatalogWatcher([sources])
+            self.assertEqual(modules, watcher.poll())
+            self.assertEqual((2, True), watcher.write())
+            self.assertEqual([], watcher.poll())
+
+            with open(modules[0], "a", encoding="utf-8") as module_file:
+                module_file.write('self.error("extra", "text")\n')
+            added = os.path.join(sources, "added.py")
+            with open(added, "w", encoding="utf-8") as module_file:
+                module_file.write('self.warning("added", "text")\n')
+            os.remove(modules[1])
+            with mock.patch.object(
+                generate_messages_catalog, "_extract_id_messages",
+                wraps=generate_messages_catalog._extract_id_messages
+            ) as extract:
+                self.assertEqual(
+                    [added, modules[0], modules[1]], watcher.poll()
+                )
+            self.assertEqual(2, extract.call_count)
+            self.assertEqual((3, True), watcher.write())
+
+            with open(modules[0], "a", encoding="utf-8") as module_file:
+                module_file.write('self.error("unfinished", \n')
+            self.assertEqual([modules[0]], watcher.poll())
+            self.assertEqual((3, False), watcher.write())
+            catalog = os.path.join(directory, "messagesCatalog.xml")
+            codes = [
+                element.get("code")
+                for element in ElementTree.parse(catalog).getroot()
+            ]
+        self.assertEqual(["added", "code0", "extra"], sorted(codes))
+
+    def test_catalog_watcher_notices_same_size_saves(self):
+        """Checks saves keeping the size and modification time are seen"""
+        with tempfile.TemporaryDirectory() as directory, mock.patch.object(
+            generate_messages_catalog, "DOC_DIRECTORY", directory
+        ), mock.patch("builtins.print"):
+            module = os.path.join(directory, "sources", "mod.py")
+            os.makedirs(os.path.dirname(module))
+            cache = generate_messages_catalog._MessageCache(
+                os.path.join(directory, "cache.json")
+            )
+            watcher = generate_messages_catalog._CatalogWatcher(
+                [os.path.dirname(module)], cache=cache
+            )
+
+            def save(code):
+                stat = os.stat(module) if os.path.exists(module) else None
+                with open(module, "w", encoding="utf-8") as module_file:
+                    module_file.write('self.error("{}", "text")\n'.format(
+                        code
+                    ))
+                if stat is not None:
+                    os.utime(module, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+            save("code1")
+            self.assertEqual([module], watcher.poll())
+            save("code2")
+            self.assertEqual([module], watcher.poll())
+            self.assertEqual(
+                ["code2"], [record.message_code
+                            for record in watcher.modules[module][2]]
+            )
+            # once no longer recent, the module is hashed a last time
+            with mock.patch.object(
+                generate_messages_catalog, "MTIME_GRANULARITY", -60
+            ):
+                save("code3")
+                self.assertEqual([module], watcher.poll())
+                self.assertIsNone(watcher.modules[module][1])
+                save("code4")
+                self.assertEqual([], watcher.poll())
+
+            save("code5")
+            with mock.patch.object(watcher, "poll", return_value=[module]):
+                watcher.watch(0, polls=1)
+            self.assertTrue(os.path.isfile(cache.cache_file_name))
+
+    def test_catalog_watcher_saves_cache_of_broken_modules(self):
+        """Checks a module failing to parse is left out of the saved cache"""
+        with tempfile.TemporaryDirectory() as directory, mock.patch.object(
+            generate_messages_catalog, "DOC_DIRECTORY", directory
+        ), mock.patch.object(
+            generate_messages_catalog, "MODULE_BATCH_SIZE", 1
+        ), mock.patch("builtins.print"):
+            sources = os.path.join(directory, "sources")
+            os.makedirs(sources)
+            modules = []
+            for index in range(3):
+                module = os.path.join(sources, "mod{}.py".format(index))
+                with open(module, "w", encoding="utf-8") as module_file:
+                    module_file.write(
+                        'self.error("code{0}", "text")\n'.format(index)
+                    )
+                modules.append(module)
+            cache = generate_messages_catalog._MessageCache(
+                os.path.join(directory, "cache.json")
+            )
+            watcher = generate_messages_catalog._CatalogWatcher(
+                [sources], jobs=2, cache=cache
+            )
+            self.assertEqual(modules, watcher.poll())
+            watcher.write()
+            cache.save()
+
+            for module in modules[:2]:
+                with open(module, "a", encoding="utf-8") as module_file:
+                    module_file.write('self.error("unfinished", \n')
+            watcher.watch(0, polls=1)
+            self.assertEqual(
+                ["code0", "code1", "code2"],
+                sorted(record.message_code
+                       for _, _, id_messages in watcher.modules.values()
+                       for record in id_messages)
+            )
+            with open(cache.cache_file_name, encoding="utf-8") as cache_file:
+                cached_modules = json.load(cache_file)["modules"]
+        self.assertEqual([modules[2]], list(cached_modules))
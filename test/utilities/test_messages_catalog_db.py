@@ -0,0 +1,63 @@
+"""
+Test file for utilities/messages_catalog_db.py
+"""
+import collections
+import os
+import tempfile
+import unittest
+
+from utilities import messages_catalog_db
+
+
+Record = collections.namedtuple("Record", [
+    "message_code", "message", "level", "keyword_arguments",
+    "reference_filename", "line_number"
+])
+
+
+class TestMessagesCatalogDB(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_file_name = os.path.join(self.directory.name, "catalog.db")
+        count = messages_catalog_db.write_catalog_db(self.db_file_name, [
+            Record("EFM.6.05.20", "Entity <a> & b", "error", "entity",
+                   "validateEFM.py", 20),
+            Record("EFM.6.05.21", "Other", "warning", "", "validateEFM.py", 40),
+            Record("EFM.6.1", "Short", "error", "", "validateEFM.py", 60),
+            Record("EFM.6/", "Not a prefix match", "error", "", "other.py", 1),
+            Record("xbrl.5.2", "Calc", "info", "", "ValidateXbrl.py", 9),
+        ])
+        self.assertEqual(5, count)
+        self.catalog = messages_catalog_db.MessagesCatalogDB(self.db_file_name)
+
+    def tearDown(self):
+        self.catalog.close()
+        self.directory.cleanup()
+
+    def test_by_code(self):
+        """Checks messages are looked up by exact code with their fields"""
+        self.assertEqual(
+            [messages_catalog_db.CatalogMessage(
+                "EFM.6.05.20", "error", "validateEFM.py", 20, "entity",
+                "Entity <a> & b"
+            )],
+            self.catalog.by_code("EFM.6.05.20")
+        )
+        self.assertEqual([], self.catalog.by_code("EFM.6"))
+
+    def test_by_code_prefix(self):
+        """Checks prefix lookups only match codes starting with the prefix"""
+        self.assertEqual(
+            ["EFM.6.05.20", "EFM.6.05.21", "EFM.6.1"],
+            [message.code for message in self.catalog.by_code_prefix("EFM.6.")]
+        )
+        self.assertEqual(5, len(self.catalog.by_code_prefix("")))
+
+    def test_by_module_and_level(self):
+        """Checks module and level lookups"""
+        self.assertEqual(3, len(self.catalog.by_module("validateEFM.py")))
+        self.assertEqual(
+            ["EFM.6.05.20", "EFM.6.1", "EFM.6/"],
+            [message.code for message in self.catalog.by_level("error")]
+        )
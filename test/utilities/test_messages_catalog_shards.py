@@ -0,0 +1,109 @@
+"""
+Test file for utilities/messages_catalog_shards.py
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from utilities import generate_messages_catalog
+from utilities import messages_catalog_shards
+
+
+class TestMessagesCatalogShards(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        record = generate_messages_catalog.MessageRecord
+        arelle = os.path.join(self.directory.name, "arelle")
+        plugin = os.path.join(self.directory.name, "EdgarRenderer")
+        empty = os.path.join(self.directory.name, "empty")
+        module_id_messages = [
+            (os.path.join(arelle, "ValidateXbrl.py"), [
+                record("xbrl.5.2", "Calc & more", "info", "",
+                       "ValidateXbrl.py", 9),
+                record("EFM.6/", "Not a prefix match", "error", "",
+                       "ValidateXbrl.py", 1),
+            ]),
+            (os.path.join(plugin, "validateEFM.py"), [
+                record("EFM.6.05.20", "Entity <a>", "error", "entity",
+                       "validateEFM.py", 20),
+                record("EFM.6.1", "Short", "warning", "", "validateEFM.py",
+                       60),
+            ]),
+            (os.path.join(plugin, "sub", "ValidateXbrl.py"), [
+                record("xbrl:other", "Other", "error", "", "ValidateXbrl.py",
+                       3),
+            ]),
+        ]
+        self.doc_directory = os.path.join(self.directory.name, "doc")
+        with mock.patch.object(
+            generate_messages_catalog, "DOC_DIRECTORY", self.doc_directory
+        ):
+            self.assertEqual(
+                {"arelle": 2, "EdgarRenderer": 3},
+                generate_messages_catalog._write_shard_files(
+                    [arelle, plugin, empty], module_id_messages
+                )
+            )
+        self.shards_directory = os.path.join(
+            self.doc_directory, generate_messages_catalog.SHARDS_DIRECTORY
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_index(self):
+        """Checks code prefixes and modules are mapped to their shards"""
+        catalog = messages_catalog_shards.MessagesCatalogShards(
+            self.shards_directory
+        )
+        self.assertEqual(
+            {"EFM": ["EdgarRenderer", "arelle"], "xbrl": [
+                "EdgarRenderer", "arelle"
+            ]},
+            catalog.index["prefixes"]
+        )
+        self.assertEqual(
+            ["EdgarRenderer"], catalog.index["modules"]["validateEFM.py"]
+        )
+        self.assertEqual(
+            ["EdgarRenderer.xml", "arelle.xml", "index.json"],
+            sorted(os.listdir(self.shards_directory))
+        )
+
+    def test_lookups_only_load_needed_shards(self):
+        """Checks lookups only parse the shards which may hold messages"""
+        catalog = messages_catalog_shards.MessagesCatalogShards(
+            self.shards_directory
+        )
+        self.assertEqual(
+            [("validateEFM.py", 60, "warning", "Short")],
+            [
+                (message.module, message.line, message.level,
+                 message.message)
+                for message in catalog.by_module("validateEFM.py")
+                if message.code == "EFM.6.1"
+            ]
+        )
+        self.assertEqual(["EdgarRenderer"], list(catalog.loaded_shards))
+        self.assertEqual(
+            ["EFM.6.05.20", "EFM.6.1"],
+            [message.code for message in catalog.by_code_prefix("EFM.6.")]
+        )
+        self.assertEqual(
+            ["Calc & more"],
+            [message.message for message in catalog.by_code("xbrl.5.2")]
+        )
+        self.assertEqual([], catalog.by_code("unknown.code"))
+
+    def test_restricted_shards(self):
+        """Checks shards which are not in use are never opened"""
+        catalog = messages_catalog_shards.MessagesCatalogShards(
+            self.shards_directory, shards=["arelle"]
+        )
+        self.assertEqual(
+            ["EFM.6/"],
+            [message.code for message in catalog.by_code_prefix("EFM")]
+        )
+        self.assertEqual(["arelle"], list(catalog.loaded_shards))
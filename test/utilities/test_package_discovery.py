@@ -0,0 +1,61 @@
+"""
+Test file for utilities/package_discovery.py
+"""
+import os
+import tempfile
+import unittest
+
+from utilities import package_discovery
+
+
+class TestPackageDiscovery(unittest.TestCase):
+
+    def test_requirement_name(self):
+        """Checks the distribution name is parsed out of requirement lines"""
+        requirements = {
+            "dqc_us_rules==1.0.6": "dqc_us_rules",
+            "dqc-us-rules>=1.0": "dqc-us-rules",
+            "plugin~=2.1": "plugin",
+            "plugin[extra1,extra2] >= 1.0 ; python_version > '3'": "plugin",
+            "plugin @ https://host/plugin-1.0.zip": "plugin",
+            "-e git+https://host/repo.git@tag#egg=plugin": "plugin",
+            "git+ssh://git@host/repo.git#egg=plugin&subdirectory=x": "plugin",
+            "https://host/plugin-1.0.zip": None,
+            "-r requirements.txt": None,
+            "# comment": None,
+        }
+        for requirement, name in requirements.items():
+            self.assertEqual(
+                name, package_discovery.requirement_name(requirement),
+                requirement
+            )
+
+    def test_find_modules_excludes_and_symlink_cycles(self):
+        """Checks discovery skips excludes and visits real paths only once"""
+        with tempfile.TemporaryDirectory() as directory:
+            for path in ("a.py", "pkg/b.py", "pkg/tests/c.py",
+                         "__pycache__/d.py", "notes.txt"):
+                path = os.path.join(directory, *path.split("/"))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                open(path, "w").close()
+            # a cycle back to the top and a duplicate of the package
+            os.symlink(directory, os.path.join(directory, "pkg", "loop"))
+            os.symlink(
+                os.path.join(directory, "pkg"),
+                os.path.join(directory, "pkg_link")
+            )
+            modules = package_discovery.find_modules_and_directories(
+                directory
+            )
+            found = sorted(os.path.relpath(m, directory) for m in modules)
+            self.assertEqual(
+                ["a.py", os.path.join("pkg", "b.py"),
+                 os.path.join("pkg", "tests", "c.py")],
+                found
+            )
+            modules = package_discovery.find_modules_and_directories(
+                directory, includes=["pkg/*"],
+                excludes=["tests", "__pycache__"]
+            )
+            found = [os.path.relpath(m, directory) for m in modules]
+            self.assertEqual([os.path.join("pkg", "b.py")], found)
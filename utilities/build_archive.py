@@ -0,0 +1,484 @@
+"""
+Archive stage of the Linux builds: streams the frozen build tree into a
+versioned tarball, compressing blocks of the tar stream in parallel:
+
+    python utilities/build_archive.py --threads 0
+    python utilities/build_archive.py build/exe.linux-x86_64-3.11 \\
+        --format zst --output-dir dist
+
+The archive is named out of the version in version.txt, the way the
+buildRenameLinux-x86_64.sh script build_version.py used to generate renamed
+it.  builders/buildLinuxDist.sh runs this stage after freezing the build.
+
+gzip archives are written as a single gzip member, like pigz does: each block
+is deflated on its own thread, primed with the end of the previous block, and
+the compressed blocks are concatenated.  zstd archives need the zstandard
+package, which compresses on its own threads.
+
+Archives are reproducible: entries are sorted, their modification time is
+SOURCE_DATE_EPOCH (or the epoch), their owner root and their mode either 755
+or 644.  Files whose contents and mode are identical to an earlier file are
+stored as hard links to it.
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import os
+import platform
+import stat
+import struct
+import tarfile
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstd archives are optional
+    zstandard = None
+
+try:
+    from utilities import build_common
+except ImportError:  # run as a script from within the utilities directory
+    import build_common
+
+
+BLOCK_SIZE = 1 << 20
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+FORMAT_GZIP = "gz"
+FORMAT_ZSTD = "zst"
+ArchiveReport = collections.namedtuple(
+    "ArchiveReport", ["size", "files", "content_size", "links", "bytes_saved"]
+)
+ArchiveReport.__doc__ = """
+What :func:`write_archive` wrote.
+
+:param size: Size of the archive.
+:param files: Number of regular files archived.
+:param content_size: Total size of the regular files.
+:param links: Number of files stored as hard links to identical files.
+:param bytes_saved: Total size of the files stored as hard links.
+"""
+# deflate window, the dictionary each block is primed with
+_WINDOW_SIZE = 1 << 15
+_GZIP_HEADER = (
+    b"\x1f\x8b"  # magic
+    b"\x08"  # deflate
+    b"\x00"  # no flags
+    b"\x00\x00\x00\x00"  # no modification time, for reproducible archives
+    b"\x00"  # no extra flags
+    b"\x03"  # unix
+)
+
+
+class ParallelGzipWriter(object):
+    """
+    Write only file object compressing what is written to it into a gzip
+    stream, deflating blocks of the data on a pool of threads.  zlib releases
+    the GIL while compressing, so the blocks compress concurrently.
+
+    At most two blocks per thread are held in memory, the writes block once
+    the compression falls behind.
+    """
+
+    def __init__(self, fileobj, level=GZIP_LEVEL, threads=None,
+                 block_size=BLOCK_SIZE):
+        """
+        :param fileobj: Binary file object to write the gzip stream into.
+        :type fileobj: file
+        :param level: Compression level, 1 to 9.
+        :type level: int
+        :param threads: Number of compression threads, defaults to the
+            number of CPUs.
+        :type threads: int
+        :param block_size: Number of bytes compressed in each block.
+        :type block_size: int
+        """
+        self.fileobj = fileobj
+        self.level = level
+        self.threads = threads or os.cpu_count() or 1
+        self.block_size = block_size
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.threads, thread_name_prefix="gzip-block"
+        )
+        self.blocks = collections.deque()
+        self.buffer = bytearray()
+        self.dictionary = b""
+        self.crc = 0
+        self.size = 0
+        self.closed = False
+        self.fileobj.write(_GZIP_HEADER)
+
+    def write(self, data):
+        """
+        Compresses data.
+
+        :param data: The data to compress.
+        :type data: bytes
+        :return: The number of bytes written.
+        :rtype: int
+        """
+        self.buffer += data
+        while len(self.buffer) >= self.block_size:
+            self._submit(bytes(self.buffer[:self.block_size]))
+            del self.buffer[:self.block_size]
+        return len(data)
+
+    def _submit(self, block):
+        """
+        Hands a block over to the compression threads, writing out the
+        compressed blocks which are done once too many are in flight.
+        """
+        # the checksum of the whole stream is cheap, and has to be sequential
+        self.crc = zlib.crc32(block, self.crc)
+        self.size += len(block)
+        self.blocks.append(self.executor.submit(
+            _deflate_block, block, self.dictionary, self.level
+        ))
+        self.dictionary = block[-_WINDOW_SIZE:]
+        while len(self.blocks) > self.threads * 2:
+            self.fileobj.write(self.blocks.popleft().result())
+
+    def close(self):
+        """
+        Compresses the remaining data and writes the gzip trailer.  The
+        underlying file object is left open.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            if self.buffer:
+                self._submit(bytes(self.buffer))
+                self.buffer.clear()
+            while self.blocks:
+                self.fileobj.write(self.blocks.popleft().result())
+        finally:
+            self.executor.shutdown()
+        # final empty block ending the deflate stream
+        self.fileobj.write(
+            zlib.compressobj(self.level, zlib.DEFLATED, -zlib.MAX_WBITS)
+            .flush(zlib.Z_FINISH)
+        )
+        self.fileobj.write(struct.pack(
+            "<II", self.crc, self.size & 0xffffffff
+        ))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _deflate_block(block, dictionary, level):
+    """
+    Worker function deflating a block of a gzip stream.
+
+    :param block: The data to compress.
+    :type block: bytes
+    :param dictionary: The end of the previous block, back references may
+        point into it.
+    :type dictionary: bytes
+    :param level: Compression level.
+    :type level: int
+    :return: Raw deflate data, ending on a byte boundary without ending the
+        deflate stream, so that the blocks can be concatenated.
+    :rtype: bytes
+    """
+    if dictionary:
+        compressor = zlib.compressobj(
+            level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=dictionary
+        )
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(block) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+def _open_compressor(fileobj, compression_format, level=None, threads=None):
+    """
+    Helper function to open a compressing file object.
+
+    :param fileobj: Binary file object to write the compressed stream into.
+    :type fileobj: file
+    :param compression_format: :data:`FORMAT_GZIP` or :data:`FORMAT_ZSTD`.
+    :type compression_format: str
+    :param level: Compression level, defaults to :data:`GZIP_LEVEL` or
+        :data:`ZSTD_LEVEL`.
+    :type level: int
+    :param threads: Number of compression threads, defaults to the number of
+        CPUs.
+    :type threads: int
+    :return: The compressing file object, to be closed before the file.
+    :rtype: file
+    """
+    threads = threads or os.cpu_count() or 1
+    if compression_format == FORMAT_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstd archives need the zstandard package")
+        return zstandard.ZstdCompressor(
+            level=ZSTD_LEVEL if level is None else level, threads=threads
+        ).stream_writer(fileobj, closefd=False)
+    return ParallelGzipWriter(
+        fileobj, GZIP_LEVEL if level is None else level, threads
+    )
+
+
+def archive_name(version, system="linux", machine="x86_64",
+                 compression_format=FORMAT_GZIP):
+    """
+    :param version: Version of the build, the VERSION_STRING of
+        build_version.py.
+    :type version: str
+    :param system: System name, such as "linux" or "centos7".
+    :type system: str
+    :param machine: Machine architecture.
+    :type machine: str
+    :param compression_format: :data:`FORMAT_GZIP` or :data:`FORMAT_ZSTD`.
+    :type compression_format: str
+    :return: The distribution file name of the archive.
+    :rtype: str
+    """
+    return "arelle-{0}-{1}-{2}.tar.{3}".format(
+        system, machine, version, compression_format
+    )
+
+
+def write_archive(source_directory, archive_file_name, arcname=None,
+                  compression_format=FORMAT_GZIP, level=None, threads=None,
+                  mtime=None, dedupe=True):
+    """
+    Streams a directory into a compressed, reproducible tarball.  The archive
+    is written to a temporary file which replaces the target once complete.
+
+    :param source_directory: The directory to archive.
+    :type source_directory: str
+    :param archive_file_name: Path of the archive to write.
+    :type archive_file_name: str
+    :param arcname: Name of the directory in the archive, defaults to the
+        name of the source directory.
+    :type arcname: str
+    :param compression_format: :data:`FORMAT_GZIP` or :data:`FORMAT_ZSTD`.
+    :type compression_format: str
+    :param level: Compression level.
+    :type level: int
+    :param threads: Number of compression threads, defaults to the number of
+        CPUs.
+    :type threads: int
+    :param mtime: Modification time of every entry, defaults to
+        SOURCE_DATE_EPOCH, or 0 when it is not set.
+    :type mtime: int
+    :param dedupe: Whether to store files identical to an earlier file as
+        hard links to it.
+    :type dedupe: bool
+    :return: The size of the archive and the space saved by the hard links.
+    :rtype: :class:`ArchiveReport`
+    """
+    if arcname is None:
+        arcname = os.path.basename(os.path.normpath(source_directory))
+    if mtime is None:
+        mtime = int(os.environ.get("SOURCE_DATE_EPOCH", 0))
+    directory = os.path.dirname(archive_file_name)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_file_name = archive_file_name + ".tmp"
+    counts = collections.Counter()
+    # first entry name of each distinct content and mode
+    entries_by_content = {}
+    try:
+        with open(temp_file_name, "wb") as archive_file:
+            compressor = _open_compressor(
+                archive_file, compression_format, level, threads
+            )
+            with compressor:
+                # a stream, as the compressor cannot seek
+                with tarfile.open(
+                    fileobj=compressor, mode="w|", format=tarfile.PAX_FORMAT
+                ) as tar:
+                    for path, name in _iter_tree(source_directory, arcname):
+                        tarinfo = _normalized_tarinfo(tar, path, name, mtime)
+                        if not tarinfo.isreg():
+                            tar.addfile(tarinfo)
+                            continue
+                        counts["files"] += 1
+                        counts["content_size"] += tarinfo.size
+                        if dedupe:
+                            key = (
+                                build_common.file_digest(path), tarinfo.mode
+                            )
+                            linkname = entries_by_content.setdefault(key, name)
+                            if linkname != name:
+                                counts["links"] += 1
+                                counts["bytes_saved"] += tarinfo.size
+                                tarinfo.type = tarfile.LNKTYPE
+                                tarinfo.linkname = linkname
+                                tarinfo.size = 0
+                                tar.addfile(tarinfo)
+                                continue
+                        with open(path, "rb") as archived_file:
+                            tar.addfile(tarinfo, archived_file)
+    except BaseException:
+        if os.path.exists(temp_file_name):
+            os.remove(temp_file_name)
+        raise
+    os.replace(temp_file_name, archive_file_name)
+    return ArchiveReport(
+        os.path.getsize(archive_file_name), counts["files"],
+        counts["content_size"], counts["links"], counts["bytes_saved"]
+    )
+
+
+def _iter_tree(source_directory, arcname):
+    """
+    Generator function listing a directory tree in a stable order.
+
+    :param source_directory: The directory to list.
+    :type source_directory: str
+    :param arcname: Name of the directory in the archive.
+    :type arcname: str
+    :return: Yields the path of the directory and of everything below it,
+        with their name in the archive, by name and each directory before
+        its content.
+    :rtype: iterable [tuple (str, str)]
+    """
+    yield source_directory, arcname
+    if (os.path.isdir(source_directory) and
+            not os.path.islink(source_directory)):
+        for name in sorted(os.listdir(source_directory)):
+            yield from _iter_tree(
+                os.path.join(source_directory, name), arcname + "/" + name
+            )
+
+
+def _normalized_tarinfo(tar, path, name, mtime):
+    """
+    Helper function to describe a file without the details which change from
+    a build to the next.
+
+    :param tar: The archive.
+    :type tar: :class:`~tarfile.TarFile`
+    :param path: Path of the file.
+    :type path: str
+    :param name: Name of the file in the archive.
+    :type name: str
+    :param mtime: Modification time to give the file.
+    :type mtime: int
+    :return: The entry of the file.
+    :rtype: :class:`~tarfile.TarInfo`
+    """
+    tarinfo = tar.gettarinfo(path, name)
+    tarinfo.mtime = mtime
+    tarinfo.uid = tarinfo.gid = 0
+    tarinfo.uname = tarinfo.gname = "root"
+    if tarinfo.isdir() or tarinfo.mode & stat.S_IXUSR:
+        tarinfo.mode = 0o755
+    else:
+        tarinfo.mode = 0o644
+    return tarinfo
+
+
+def _parse_args(args=None):
+    """
+    Parses the command line arguments of the archive stage.
+
+    :param args: Arguments to parse, defaults to :data:`sys.argv`.
+    :type args: list [str]
+    :return: The parsed arguments.
+    :rtype: :class:`~argparse.Namespace`
+    """
+    parser = argparse.ArgumentParser(
+        description="Archives the frozen Linux build into a versioned, "
+                    "compressed tarball."
+    )
+    parser.add_argument(
+        "source", nargs="?",
+        help="frozen build directory to archive (default: the build_exe "
+             "directory of the machine, such as {})".format(
+                 build_common.frozen_build_directory()
+             )
+    )
+    parser.add_argument(
+        "--output-dir", default="dist",
+        help="directory to write the archive into (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--format", default=FORMAT_GZIP, choices=(FORMAT_GZIP, FORMAT_ZSTD),
+        help="compression format, zst needs the zstandard package "
+             "(default: %(default)s)"
+    )
+    parser.add_argument(
+        "--level", type=int,
+        help="compression level (default: {} for gz, {} for zst)".format(
+            GZIP_LEVEL, ZSTD_LEVEL
+        )
+    )
+    parser.add_argument(
+        "-t", "--threads", type=int, default=0,
+        help="number of compression threads (default: 0, every CPU)"
+    )
+    parser.add_argument(
+        "--version",
+        help="version in the archive name (default: the content of "
+             "version.txt, written by build_version.py)"
+    )
+    parser.add_argument(
+        "--system", default="linux",
+        help="system in the archive name (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--machine", default=platform.machine() or "x86_64",
+        help="machine in the archive name (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--mtime", type=int,
+        help="modification time of the archived files (default: "
+             "SOURCE_DATE_EPOCH, or 0)"
+    )
+    parser.add_argument(
+        "--no-dedupe", dest="dedupe", action="store_false",
+        help="archive identical files separately instead of as hard links"
+    )
+    parser.add_argument(
+        "--arcname",
+        help="name of the build directory in the archive (default: the name "
+             "of the source directory)"
+    )
+    options = parser.parse_args(args)
+    if options.source is None:
+        options.source = build_common.frozen_build_directory(options.machine)
+    if options.format == FORMAT_ZSTD and zstandard is None:
+        parser.error("zst archives need the zstandard package")
+    return options
+
+
+def main(args=None):
+    """
+    Archives the frozen build.
+
+    :param args: Command line arguments, defaults to :data:`sys.argv`.
+    :type args: list [str]
+    """
+    options = _parse_args(args)
+    version = options.version or build_common.read_version()
+    archive_file_name = os.path.join(options.output_dir, archive_name(
+        version, options.system, options.machine, options.format
+    ))
+    started_at = time.perf_counter()
+    report = write_archive(
+        options.source, archive_file_name, options.arcname, options.format,
+        options.level, options.threads or None, options.mtime, options.dedupe
+    )
+    print("Archived {0} into {1}, {2} bytes, {3:.2f} secs".format(
+        options.source, archive_file_name, report.size,
+        time.perf_counter() - started_at
+    ))
+    print("{0} files, {1} bytes, {2} duplicates stored as links saved {3} "
+          "bytes".format(
+              report.files, report.content_size, report.links,
+              report.bytes_saved
+          ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,522 @@
+"""
+Asset stage of the builds: selects the images the application references out
+of build_assets/images, recompresses them losslessly and derives the
+multi-size icons, across worker processes:
+
+    python utilities/build_assets.py
+    python utilities/build_assets.py --source build_assets/images \\
+        --output dist_assets/images --references arelle builders
+    python utilities/build_assets.py --install
+
+An image is kept when its file name appears as a whole name, quoted or at
+the end of a path, in a source file of the reference directories,
+everything else, such as the Photoshop sources and the zipped icon packs, is
+left out of the bundle.  PNGs are deflated again at
+the highest level; with the Pillow package, GIFs and PNGs are also re-encoded
+with an optimized palette and the icons of :data:`ICON_SOURCES` are derived
+from a single larger image.  A recompressed image only replaces the original
+when it is smaller and decodes to the same pixels.
+
+Results are cached by the content hash of their source, so unchanged assets
+are never processed twice.  Once the application is frozen, --install copies
+the processed images over the images directory of the bundle and removes the
+images left out from it.
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import hashlib
+import io
+import os
+import re
+import shutil
+import struct
+import zlib
+
+try:
+    from PIL import Image
+except ImportError:  # recompressing GIFs and deriving icons are optional
+    Image = None
+
+try:
+    from utilities import build_common
+except ImportError:  # run as a script from within the utilities directory
+    import build_common
+
+
+SOURCE_DIRECTORY = os.path.join("build_assets", "images")
+OUTPUT_DIRECTORY = os.path.join("dist_assets", "images")
+CACHE_DIRECTORY = os.path.join(".build_cache", "assets")
+REFERENCE_ROOTS = (
+    "arelle", "builders", "non_library_plugins", "setup.py", "setup.cfg",
+    "pyproject.toml"
+)
+# bump to invalidate the cached results when the processing changes
+PIPELINE_VERSION = "1"
+IMAGE_SUFFIXES = (".gif", ".png", ".ico", ".icns", ".xbm")
+REFERENCE_SUFFIXES = (
+    ".py", ".sh", ".bat", ".cfg", ".toml", ".spec", ".plist", ".iss", ".nsi",
+    ".xml", ".html", ".txt"
+)
+# icons derived from a single larger image: icon: (source image, sizes)
+ICON_SOURCES = {
+    "arelle16x16and32x32.ico": ("arelle-mac-icon-4.gif", (16, 32)),
+    "xbrl16.ico": ("xbrl128-2.gif", (16,)),
+    "xbrl32.ico": ("xbrl128-2.gif", (32,)),
+}
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_SKIPPED_DIRECTORIES = (".git", "__pycache__", "build", "dist")
+# a referenced name is neither preceded nor followed by more of a file name
+_REFERENCE_PATTERN = r"(?<![\w.-])({})(?![\w-]|\.\w)"
+
+AssetResult = collections.namedtuple(
+    "AssetResult", ["name", "original_size", "size", "cached"]
+)
+AssetResult.__doc__ = """
+Outcome of the processing of an asset.
+
+:param name: File name of the asset.
+:param original_size: Size of the asset source.
+:param size: Size of the processed asset.
+:param cached: Whether the processed asset was found in the cache.
+"""
+
+
+def find_references(reference_roots, names):
+    """
+    Finds which of the given file names appear in the source files of the
+    reference roots, as whole names: "foo.gif" is found in "images/foo.gif"
+    or in 'foo.gif', but not in "barfoo.gif".
+
+    :param reference_roots: Directories and files to search.
+    :type reference_roots: list [str]
+    :param names: The file names to look for.
+    :type names: iterable [str]
+    :return: The names found.
+    :rtype: set [str]
+    """
+    remaining = set(names)
+    found = set()
+    pattern = None
+    for reference_file_name in _iter_reference_files(reference_roots):
+        if not remaining:
+            break
+        if pattern is None:
+            # longest names first, so that "a.b.gif" is not taken for "b.gif"
+            pattern = re.compile(_REFERENCE_PATTERN.format("|".join(
+                re.escape(name)
+                for name in sorted(remaining, key=len, reverse=True)
+            )))
+        with io.open(reference_file_name, "rt", encoding="utf-8",
+                     errors="replace") as reference_file:
+            text = reference_file.read()
+        found_in_file = set(pattern.findall(text))
+        if found_in_file:
+            found |= found_in_file
+            remaining -= found_in_file
+            pattern = None
+    return found
+
+
+def _iter_reference_files(reference_roots):
+    """
+    Generator function listing the source files of the reference roots.
+
+    :param reference_roots: Directories and files to search.
+    :type reference_roots: list [str]
+    :return: Yields the path of each source file.
+    :rtype: iterable [str]
+    """
+    for reference_root in reference_roots:
+        if os.path.isfile(reference_root):
+            yield reference_root
+            continue
+        for directory, directory_names, file_names in os.walk(reference_root):
+            directory_names[:] = sorted(
+                name for name in directory_names
+                if name not in _SKIPPED_DIRECTORIES
+            )
+            for file_name in sorted(file_names):
+                if file_name.endswith(REFERENCE_SUFFIXES):
+                    yield os.path.join(directory, file_name)
+
+
+def _cache_key(source_file_name, recipe):
+    """
+    Helper function to name the cached result of processing an asset.
+
+    :param source_file_name: Path of the asset source.
+    :type source_file_name: str
+    :param recipe: What is done to the source, such as the icon sizes.
+    :type recipe: str
+    :return: The cache key.
+    :rtype: str
+    """
+    return hashlib.sha256("\0".join((
+        PIPELINE_VERSION,
+        getattr(Image, "__version__", "") if Image is not None else "",
+        recipe,
+        build_common.file_digest(source_file_name),
+    )).encode("utf-8")).hexdigest()
+
+
+def recompress_png(data):
+    """
+    Deflates the image data of a PNG again, at the highest level, into a
+    single IDAT chunk.  The pixels and every other chunk are left untouched.
+
+    :param data: The PNG.
+    :type data: bytes
+    :return: The recompressed PNG, or the given PNG when it is not smaller.
+    :rtype: bytes
+    :raises ValueError: When the PNG is truncated or its image data does
+        not inflate.
+    """
+    if not data.startswith(_PNG_SIGNATURE):
+        return data
+    chunks = []
+    image_data = []
+    offset = len(_PNG_SIGNATURE)
+    while offset < len(data):
+        if offset + 12 > len(data):
+            raise ValueError("PNG truncated at offset {}".format(offset))
+        length, chunk_type = struct.unpack(">I4s", data[offset:offset + 8])
+        if offset + length + 12 > len(data):
+            raise ValueError("PNG truncated in the {} chunk at offset "
+                             "{}".format(chunk_type.decode("latin-1"), offset))
+        chunk_data = data[offset + 8:offset + 8 + length]
+        offset += length + 12
+        if chunk_type == b"IDAT":
+            if not image_data:
+                chunks.append((b"IDAT", None))
+            image_data.append(chunk_data)
+        else:
+            chunks.append((chunk_type, chunk_data))
+    try:
+        inflated = zlib.decompress(b"".join(image_data))
+    except zlib.error as error:
+        raise ValueError("PNG image data does not inflate: {}".format(error))
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9)
+    deflated = compressor.compress(inflated) + compressor.flush()
+    output = [_PNG_SIGNATURE]
+    for chunk_type, chunk_data in chunks:
+        if chunk_data is None:
+            chunk_data = deflated
+        output.append(struct.pack(">I", len(chunk_data)))
+        output.append(chunk_type + chunk_data)
+        output.append(struct.pack(
+            ">I", zlib.crc32(chunk_type + chunk_data) & 0xffffffff
+        ))
+    recompressed = b"".join(output)
+    return recompressed if len(recompressed) < len(data) else data
+
+
+def _reencode(data):
+    """
+    Helper function to re-encode a single frame GIF or a PNG with Pillow's
+    optimizations, keeping the result only when it decodes to the same
+    pixels.
+
+    :param data: The image.
+    :type data: bytes
+    :return: The re-encoded image, or the given image when it is not smaller
+        or not identical.
+    :rtype: bytes
+    """
+    if Image is None:
+        return data
+    with Image.open(io.BytesIO(data)) as image:
+        if getattr(image, "n_frames", 1) > 1:
+            return data
+        image_format = image.format
+        pixels = image.convert("RGBA").tobytes()
+        output = io.BytesIO()
+        image.save(output, image_format, optimize=True)
+    reencoded = output.getvalue()
+    if len(reencoded) >= len(data):
+        return data
+    with Image.open(io.BytesIO(reencoded)) as image:
+        if image.convert("RGBA").tobytes() != pixels:
+            return data
+    return reencoded
+
+
+def derive_icon(source_file_name, sizes):
+    """
+    Derives a multi-size icon from a larger image.
+
+    :param source_file_name: Path of the image.
+    :type source_file_name: str
+    :param sizes: Width of each square image of the icon.
+    :type sizes: list [int]
+    :return: The icon.
+    :rtype: bytes
+    :raises RuntimeError: When Pillow is not installed.
+    :raises ValueError: When the image is smaller than the largest size of
+        the icon.
+    """
+    if Image is None:
+        raise RuntimeError("Deriving icons needs the Pillow package")
+    output = io.BytesIO()
+    with Image.open(source_file_name) as image:
+        if min(image.size) < max(sizes):
+            raise ValueError(
+                "{0}x{1} image is smaller than the {2}x{2} icon".format(
+                    image.size[0], image.size[1], max(sizes)
+                )
+            )
+        image.convert("RGBA").save(
+            output, "ICO", sizes=[(size, size) for size in sizes]
+        )
+    return output.getvalue()
+
+
+def _process_asset(name, source_file_name, original_file_name, sizes,
+                   cache_directory):
+    """
+    Worker function to process an asset, unless its result is cached.
+
+    :param name: File name of the asset.
+    :type name: str
+    :param source_file_name: Path of the image the asset is made of.
+    :type source_file_name: str
+    :param original_file_name: Path of the unprocessed asset.
+    :type original_file_name: str
+    :param sizes: Sizes of the icon derived from the source, if any.
+    :type sizes: list [int]
+    :param cache_directory: Directory of the cached results.
+    :type cache_directory: str
+    :return: The outcome, and the path of the processed asset.
+    :rtype: tuple (:class:`AssetResult`, str)
+    :raises ValueError: When the source is not an image it can process,
+        naming the source.
+    """
+    recipe = "icon {}".format(sizes) if sizes else "recompress"
+    cached_file_name = os.path.join(
+        cache_directory,
+        _cache_key(source_file_name, recipe) + os.path.splitext(name)[1]
+    )
+    original_size = os.path.getsize(original_file_name)
+    if os.path.exists(cached_file_name):
+        return AssetResult(
+            name, original_size, os.path.getsize(cached_file_name), True
+        ), cached_file_name
+    try:
+        if sizes:
+            data = derive_icon(source_file_name, sizes)
+        else:
+            with open(source_file_name, "rb") as source_file:
+                data = source_file.read()
+            if name.endswith(".png"):
+                data = recompress_png(data)
+            if name.endswith((".png", ".gif")):
+                data = _reencode(data)
+    except (ValueError, OSError) as error:
+        # such as a truncated image, or one Pillow cannot identify
+        raise ValueError("Cannot process {}: {}".format(
+            source_file_name, error
+        )) from error
+    os.makedirs(cache_directory, exist_ok=True)
+    temp_file_name = "{}.{}.tmp".format(cached_file_name, os.getpid())
+    with open(temp_file_name, "wb") as cached_file:
+        cached_file.write(data)
+    os.replace(temp_file_name, cached_file_name)
+    return AssetResult(
+        name, original_size, len(data), False
+    ), cached_file_name
+
+
+def build_assets(source_directory, output_directory, reference_roots,
+                 cache_directory=CACHE_DIRECTORY, jobs=None):
+    """
+    Writes the referenced images of a directory, processed, into the output
+    directory, which is emptied first.
+
+    :param source_directory: Directory of the images.
+    :type source_directory: str
+    :param output_directory: Directory to write the processed images into.
+    :type output_directory: str
+    :param reference_roots: Directories and files whose sources reference
+        the images.
+    :type reference_roots: list [str]
+    :param cache_directory: Directory of the cached results.
+    :type cache_directory: str
+    :param jobs: Number of worker processes, defaults to the number of
+        processors.
+    :type jobs: int
+    :return: The outcome of each kept image, and the names of the files left
+        out.
+    :rtype: tuple (list [:class:`AssetResult`], list [str])
+    :raises FileNotFoundError: When none of the reference roots exist, which
+        would leave every image out.
+    :raises ValueError: When a referenced icon is derived from an image
+        missing from the source directory, or an image cannot be processed.
+    """
+    reference_roots = [
+        reference_root for reference_root in reference_roots
+        if os.path.exists(reference_root)
+    ]
+    if not reference_roots:
+        raise FileNotFoundError(
+            "None of the reference roots exist, no image would be kept"
+        )
+    names = sorted(os.listdir(source_directory))
+    referenced = find_references(
+        reference_roots, [name for name in names if name.endswith(
+            IMAGE_SUFFIXES
+        )]
+    )
+    excluded = [name for name in names if name not in referenced]
+    tasks = []
+    for name in sorted(referenced):
+        original_file_name = os.path.join(source_directory, name)
+        source_name, sizes = ICON_SOURCES.get(name, (name, None))
+        if not os.path.isfile(os.path.join(source_directory, source_name)):
+            raise ValueError("Icon {} is derived from {}, which is not in "
+                             "{}".format(name, source_name, source_directory))
+        if sizes and Image is None:
+            # the icon as drawn is kept without Pillow to derive it
+            source_name, sizes = name, None
+        tasks.append((
+            name, os.path.join(source_directory, source_name),
+            original_file_name, sizes, cache_directory
+        ))
+    if os.path.exists(output_directory):
+        shutil.rmtree(output_directory)
+    os.makedirs(output_directory)
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs or os.cpu_count() or 1
+    ) as executor:
+        futures = [executor.submit(_process_asset, *task) for task in tasks]
+        for future in futures:
+            result, processed_file_name = future.result()
+            shutil.copyfile(
+                processed_file_name,
+                os.path.join(output_directory, result.name)
+            )
+            results.append(result)
+    return results, excluded
+
+
+def install_assets(source_directory, output_directory, images_directory):
+    """
+    Installs the processed images into the images directory of a frozen
+    bundle: each image kept replaces the one frozen, and each file left out
+    of the output is removed.  Files which are not assets of the source
+    directory are left alone.
+
+    :param source_directory: Directory of the images.
+    :type source_directory: str
+    :param output_directory: Directory the processed images were written
+        into by :func:`build_assets`.
+    :type output_directory: str
+    :param images_directory: Images directory of the frozen bundle.
+    :type images_directory: str
+    :return: The names of the images installed, and of the files removed.
+    :rtype: tuple (list [str], list [str])
+    :raises FileNotFoundError: When the images were not processed yet.
+    """
+    kept = set(os.listdir(output_directory))
+    installed = []
+    removed = []
+    for name in sorted(os.listdir(source_directory)):
+        frozen_file_name = os.path.join(images_directory, name)
+        if name in kept:
+            shutil.copyfile(
+                os.path.join(output_directory, name), frozen_file_name
+            )
+            installed.append(name)
+        elif os.path.isfile(frozen_file_name):
+            os.remove(frozen_file_name)
+            removed.append(name)
+    return installed, removed
+
+
+def _parse_args(args=None):
+    """
+    Parses the command line arguments of the asset stage.
+
+    :param args: Arguments to parse, defaults to :data:`sys.argv`.
+    :type args: list [str]
+    :return: The parsed arguments.
+    :rtype: :class:`~argparse.Namespace`
+    """
+    parser = argparse.ArgumentParser(
+        description="Selects, recompresses and derives the images bundled "
+                    "with the application."
+    )
+    parser.add_argument(
+        "--source", default=SOURCE_DIRECTORY,
+        help="directory of the images (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--output", default=OUTPUT_DIRECTORY,
+        help="directory to write the bundled images into "
+             "(default: %(default)s)"
+    )
+    parser.add_argument(
+        "--references", nargs="+", default=list(REFERENCE_ROOTS),
+        metavar="PATH",
+        help="directories and files whose sources reference the images "
+             "(default: %(default)s)"
+    )
+    parser.add_argument(
+        "--cache", default=CACHE_DIRECTORY,
+        help="directory of the cached results (default: %(default)s)"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=0,
+        help="number of worker processes, 0 for one per processor "
+             "(default: %(default)s)"
+    )
+    parser.add_argument(
+        "--install", nargs="?", metavar="DIRECTORY",
+        const=os.path.join(build_common.frozen_executable_directory(),
+                           "images"),
+        help="install the images already written to the output directory "
+             "into the images directory of the frozen bundle, instead of "
+             "processing them (default directory: %(const)s)"
+    )
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    """
+    Runs the asset stage and reports what it trimmed.
+
+    :param args: Command line arguments, defaults to :data:`sys.argv`.
+    :type args: list [str]
+    """
+    options = _parse_args(args)
+    if options.install:
+        installed, removed = install_assets(
+            options.source, options.output, options.install
+        )
+        print("Installed {0} images into {1}, removed {2} files left "
+              "out".format(len(installed), options.install, len(removed)))
+        return
+    if Image is None:
+        print("Pillow is not installed, GIFs are not recompressed and icons "
+              "are not derived")
+    results, excluded = build_assets(
+        options.source, options.output, options.references, options.cache,
+        options.jobs
+    )
+    excluded_size = sum(
+        os.path.getsize(os.path.join(options.source, name))
+        for name in excluded
+    )
+    original_size = sum(result.original_size for result in results)
+    size = sum(result.size for result in results)
+    print("Kept {0} images, {1} bytes instead of {2} ({3} cached), left out "
+          "{4} files of {5} bytes: {6}".format(
+              len(results), size, original_size,
+              sum(result.cached for result in results), len(excluded),
+              excluded_size, ", ".join(excluded)
+          ))
+
+
+if __name__ == "__main__":
+    main()
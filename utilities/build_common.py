@@ -0,0 +1,84 @@
+"""
+Helpers shared by the build stages of the utilities directory: hashing
+files, reading the version written by build_version.py, and naming the
+directories cx_Freeze freezes Arelle into.
+"""
+
+import hashlib
+import os
+import sys
+import sysconfig
+
+
+DIGEST_CHUNK_SIZE = 1 << 20
+VERSION_FILE = "version.txt"
+
+
+def file_digest(file_name, algorithm="sha256"):
+    """
+    Hashes the contents of a file, a chunk at a time.
+
+    :param file_name: Path of the file to hash.
+    :type file_name: str
+    :param algorithm: Name of the hashlib algorithm.
+    :type algorithm: str
+    :return: The hex digest of the file contents.
+    :rtype: str
+    """
+    digest = hashlib.new(algorithm)
+    with open(file_name, "rb") as hashed_file:
+        for chunk in iter(lambda: hashed_file.read(DIGEST_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_version(version_file_name=VERSION_FILE):
+    """
+    :param version_file_name: Path of the version.txt written by
+        build_version.py.
+    :type version_file_name: str
+    :return: The VERSION_STRING of the build.
+    :rtype: str
+    """
+    with open(version_file_name, encoding="utf-8") as version_file:
+        return version_file.read().strip()
+
+
+def frozen_build_directory(machine=None):
+    """
+    :param machine: Machine the build is frozen for, such as "aarch64",
+        defaults to the machine of the running interpreter.
+    :type machine: str
+    :return: The directory cx_Freeze's build_exe command freezes into, such
+        as build/exe.linux-x86_64-3.11.
+    :rtype: str
+    """
+    build_platform = sysconfig.get_platform()
+    if machine:
+        build_platform = "{}-{}".format(
+            build_platform.rpartition("-")[0], machine
+        )
+    return os.path.join("build", "exe.{}-{}.{}".format(
+        build_platform, *sys.version_info[:2]
+    ))
+
+
+def frozen_bundle():
+    """
+    :return: The directory of the bundle frozen by cx_Freeze for this
+        platform, the application bundle of bdist_mac on macOS.
+    :rtype: str
+    """
+    if sys.platform == "darwin":
+        return os.path.join("build", "Arelle.app")
+    return frozen_build_directory()
+
+
+def frozen_executable_directory():
+    """
+    :return: The directory of the frozen executables of this platform.
+    :rtype: str
+    """
+    if sys.platform == "darwin":
+        return os.path.join(frozen_bundle(), "Contents", "MacOS")
+    return frozen_build_directory()
@@ -0,0 +1,582 @@
+"""
+Static import graph of a build profile: the modules reachable from the
+profile's entry points and plugins, found by walking their import statements
+with the same AST machinery as generate_messages_catalog.py, without
+importing anything.  Out of the graph come the packages a frozen build of the
+profile has to include, the installed requirements it can exclude, and the
+size of both:
+
+    python utilities/build_import_graph.py mac --output-dir build_profiles
+
+The freeze of a profile leaves out the requirements it can exclude by
+passing the options printed out of the profile's report to cx_Freeze's
+build_exe command:
+
+    python setup.py build_exe \
+        $(python utilities/build_import_graph.py --freeze-options mac)
+
+Imports which cannot be resolved statically, such as importlib.import_module
+of a computed name, are reported per module; the packages they load have to
+be listed in the profile's packages.
+"""
+
+import argparse
+import ast
+import collections
+import importlib.machinery
+import importlib.metadata
+import io
+import json
+import os
+import sys
+import sysconfig
+
+try:
+    from utilities import package_discovery
+except ImportError:  # run as a script from within the utilities directory
+    import package_discovery
+
+
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+Profile = collections.namedtuple(
+    "Profile", ["entry_points", "requirements", "plugins", "packages"]
+)
+Profile.__new__.__defaults__ = (True, ())
+Profile.__doc__ = """
+A build profile.
+
+:param entry_points: Names of the modules the build starts from.
+:param requirements: Requirement files, relative to the root directory, of
+    the distributions installed for the build.
+:param plugins: Whether the plugins of the plugins requirement file and of
+    the non_library_plugins directory are part of the build.
+:param packages: Names of modules to include regardless of the graph, such
+    as the ones imported dynamically.
+"""
+
+BUILD_PROFILES = collections.OrderedDict([
+    ("cmdline", Profile(
+        ("arelle.CntlrCmdLine",), ("requirements.txt",)
+    )),
+    ("mac", Profile(
+        ("arelle.CntlrWinMain", "arelle.CntlrCmdLine"),
+        ("requirements_mac.txt",)
+    )),
+    ("linux", Profile(
+        ("arelle.CntlrWinMain", "arelle.CntlrCmdLine"),
+        ("requirements.txt",)
+    )),
+    ("edgar", Profile(
+        ("arelle.CntlrCmdLine",),
+        ("requirements.txt", "requirements_edgar.txt")
+    )),
+])
+
+
+class ImportGraph(object):
+    """
+    Graph of the modules reachable from a set of modules, resolved the way
+    the import system would resolve them on a search path, without running
+    any of them.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param path: Module search path, defaults to :data:`sys.path`.
+        :type path: list [str]
+        """
+        self.path = list(sys.path if path is None else path)
+        self.specs = {}
+        self.imports = collections.OrderedDict()
+        self.missing = collections.defaultdict(set)
+        self.dynamic_imports = collections.Counter()
+
+    def find_spec(self, name):
+        """
+        Finds a module on the search path, finding its parent packages first
+        as the import system does, but without importing them.
+
+        :param name: Absolute module name.
+        :type name: str
+        :return: The spec of the module, None when it cannot be found.
+        :rtype: :class:`~importlib.machinery.ModuleSpec`
+        """
+        if name in self.specs:
+            return self.specs[name]
+        parent, _, _ = name.rpartition(".")
+        if parent:
+            parent_spec = self.find_spec(parent)
+            if (parent_spec is None or
+                    not parent_spec.submodule_search_locations):
+                spec = None
+            else:
+                spec = importlib.machinery.PathFinder.find_spec(
+                    name, list(parent_spec.submodule_search_locations)
+                )
+        elif name in sys.builtin_module_names:
+            spec = importlib.machinery.ModuleSpec(
+                name, None, origin="built-in"
+            )
+        else:
+            spec = (
+                importlib.machinery.PathFinder.find_spec(name, self.path) or
+                importlib.machinery.FrozenImporter.find_spec(name)
+            )
+        self.specs[name] = spec
+        return spec
+
+    def walk(self, names):
+        """
+        Adds modules and every module they import to the graph.
+
+        :param names: Absolute names of the modules to start from.
+        :type names: iterable [str]
+        """
+        pending = collections.deque(names)
+        while pending:
+            name = pending.popleft()
+            if name in self.imports:
+                continue
+            spec = self.find_spec(name)
+            if spec is None:
+                self.missing[name].add(None)
+                continue
+            imported = set()
+            # importing a module runs its parent packages first
+            parent = name.rpartition(".")[0]
+            if parent:
+                imported.add(parent)
+            if _is_source(spec):
+                visitor = _ImportVisitor(
+                    name if spec.submodule_search_locations
+                    else name.rpartition(".")[0]
+                )
+                with open(spec.origin, "rb") as module_file:
+                    try:
+                        tree = ast.parse(module_file.read(), spec.origin)
+                    except (SyntaxError, ValueError):
+                        tree = None
+                if tree is not None:
+                    visitor.visit(tree)
+                    for imported_name in visitor.imports:
+                        if self.find_spec(imported_name) is not None:
+                            imported.add(imported_name)
+                        elif self._is_module_attribute(imported_name):
+                            # such as os.path, set by os when it runs
+                            imported.add(imported_name.rpartition(".")[0])
+                        elif imported_name != "__main__":
+                            self.missing[imported_name].add(name)
+                    # from package import name, where name may be a module
+                    for imported_name in visitor.maybe_modules:
+                        if self.find_spec(imported_name) is not None:
+                            imported.add(imported_name)
+                    if visitor.dynamic_imports:
+                        self.dynamic_imports[name] += visitor.dynamic_imports
+            imported.discard(name)  # from . import name, in a package
+            self.imports[name] = sorted(imported)
+            pending.extend(imported)
+
+    def _is_module_attribute(self, name):
+        """
+        :param name: Absolute name of a module which could not be found.
+        :type name: str
+        :return: Whether the name is an attribute of a module rather than a
+            submodule, its parent being a plain module.
+        :rtype: bool
+        """
+        parent = name.rpartition(".")[0]
+        if not parent:
+            return False
+        parent_spec = self.find_spec(parent)
+        return parent_spec is not None and \
+            not parent_spec.submodule_search_locations
+
+    def top_level_packages(self):
+        """
+        :return: The reachable modules, grouped by top level package.
+        :rtype: dict {str: list [str]}
+        """
+        packages = collections.defaultdict(list)
+        for name in self.imports:
+            packages[name.partition(".")[0]].append(name)
+        return packages
+
+
+class _ImportVisitor(ast.NodeVisitor):
+    """
+    Visits each node of a module's tree once and collects the names of the
+    modules it imports.
+    """
+
+    def __init__(self, package):
+        """
+        :param package: Name of the package relative imports are resolved
+            against.
+        :type package: str
+        """
+        self.package = package
+        self.imports = set()
+        self.maybe_modules = set()
+        self.dynamic_imports = 0
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.imports.add(alias.name)
+
+    def visit_ImportFrom(self, node):
+        if node.level:
+            parts = self.package.split(".") if self.package else []
+            if node.level - 1 > len(parts):
+                return  # beyond the top level package
+            base = ".".join(
+                parts[:len(parts) - node.level + 1] +
+                ([node.module] if node.module else [])
+            )
+        else:
+            base = node.module
+        if not base:
+            return
+        self.imports.add(base)
+        for alias in node.names:
+            if alias.name != "*":
+                self.maybe_modules.add(base + "." + alias.name)
+
+    def visit_Call(self, node):
+        function = getattr(node.func, "attr", None) or getattr(
+            node.func, "id", None
+        )
+        if function in ("import_module", "__import__"):
+            argument = node.args[0] if node.args else None
+            if isinstance(argument, ast.Constant) and isinstance(
+                argument.value, str
+            ) and not argument.value.startswith("."):
+                self.imports.add(argument.value)
+            else:
+                self.dynamic_imports += 1
+        self.generic_visit(node)
+
+
+def _is_source(spec):
+    """
+    Helper function to tell whether a module spec has python source.
+
+    :param spec: The module spec.
+    :type spec: :class:`~importlib.machinery.ModuleSpec`
+    :rtype: bool
+    """
+    return bool(spec.origin) and spec.origin.endswith(".py") and \
+        os.path.isfile(spec.origin)
+
+
+def _is_stdlib(name, spec):
+    """
+    Helper function to tell whether a top level module is part of the
+    standard library, which the freezer handles on its own.
+
+    :param name: Name of the top level module.
+    :type name: str
+    :param spec: The module spec.
+    :type spec: :class:`~importlib.machinery.ModuleSpec`
+    :rtype: bool
+    """
+    if name in getattr(sys, "stdlib_module_names", ()) or \
+            name in sys.builtin_module_names:
+        return True
+    origin = spec.origin if spec is not None else None
+    if not origin or not os.path.isabs(origin):
+        return origin in ("built-in", "frozen")
+    origin = os.path.normcase(os.path.realpath(origin))
+    for key in ("stdlib", "platstdlib"):
+        directory = os.path.normcase(os.path.realpath(
+            sysconfig.get_paths()[key]
+        ))
+        if origin.startswith(directory + os.sep) and \
+                "site-packages" not in origin[len(directory):]:
+            return True
+    return False
+
+
+def _read_requirements(requirements_file):
+    """
+    Helper function to list the distributions named by a requirement file,
+    following the files it includes with -r.
+
+    :param requirements_file: Path of the requirement file.
+    :type requirements_file: str
+    :return: The distribution names.
+    :rtype: list [str]
+    """
+    names = []
+    with io.open(requirements_file, "rt", encoding="utf-8") as requirements:
+        for line in requirements:
+            line = line.strip()
+            if line.startswith(("-r ", "--requirement ")):
+                names.extend(_read_requirements(os.path.join(
+                    os.path.dirname(requirements_file),
+                    line.split(None, 1)[1]
+                )))
+                continue
+            name = package_discovery.requirement_name(line)
+            if name is not None:
+                names.append(name)
+    return list(collections.OrderedDict.fromkeys(names))
+
+
+def _installed_dependencies(distribution_names):
+    """
+    Helper function to add the installed dependencies of distributions.
+
+    :param distribution_names: The distributions.
+    :type distribution_names: iterable [str]
+    :return: The distributions and every installed distribution they
+        depend on, in discovery order.
+    :rtype: list [str]
+    """
+    found = collections.OrderedDict()
+    pending = collections.deque(distribution_names)
+    while pending:
+        name = pending.popleft()
+        key = name.lower().replace("_", "-")
+        if key in found:
+            continue
+        found[key] = name
+        try:
+            requires = importlib.metadata.requires(name) or ()
+        except importlib.metadata.PackageNotFoundError:
+            continue
+        for requirement in requires:
+            if "extra ==" in requirement:
+                continue
+            required_name = package_discovery.requirement_name(requirement)
+            if required_name is not None:
+                pending.append(required_name)
+    return list(found.values())
+
+
+def _plugin_modules(root):
+    """
+    Helper function to list the modules of the plugins, which Arelle loads
+    by file rather than by import.
+
+    :param root: The root directory of the builder.
+    :type root: str
+    :return: The module names of the plugins, and the directories to add to
+        the search path for them.
+    :rtype: tuple (list [str], list [str])
+    """
+    modules = []
+    search_path = []
+    plugins_file = os.path.join(
+        root, "utilities", package_discovery.PLUGINS_FILE
+    )
+    for distribution_name in _read_requirements(os.path.normpath(
+        plugins_file
+    )):
+        modules.extend(package_discovery.distribution_import_names(
+            distribution_name
+        ))
+    non_library_plugins = os.path.normpath(os.path.join(
+        root, "utilities", package_discovery.NON_LIBRARY_PLUGINS
+    ))
+    if os.path.isdir(non_library_plugins):
+        search_path.append(non_library_plugins)
+        for python_module in package_discovery.find_modules_and_directories(
+            non_library_plugins
+        ):
+            modules.append(_module_name(python_module, non_library_plugins))
+    return modules, search_path
+
+
+def _module_name(python_module, directory):
+    """
+    Helper function to name a module by its path relative to a directory of
+    the search path.
+
+    :param python_module: Path of the module.
+    :type python_module: str
+    :param directory: Directory of the search path holding the module.
+    :type directory: str
+    :return: The absolute module name.
+    :rtype: str
+    """
+    parts = os.path.relpath(python_module, directory)[:-3].split(os.sep)
+    if parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts)
+
+
+def _spec_size(spec, whole_package=False):
+    """
+    Helper function to size the files of a module.
+
+    :param spec: The module spec.
+    :type spec: :class:`~importlib.machinery.ModuleSpec`
+    :param whole_package: Whether to size every file of a package rather
+        than its __init__ module.
+    :type whole_package: bool
+    :return: The size in bytes.
+    :rtype: int
+    """
+    if whole_package and spec.submodule_search_locations:
+        size = 0
+        for location in spec.submodule_search_locations:
+            for directory, _, file_names in os.walk(location):
+                for file_name in file_names:
+                    size += os.path.getsize(os.path.join(directory, file_name))
+        return size
+    if spec.origin and os.path.isfile(spec.origin):
+        return os.path.getsize(spec.origin)
+    return 0
+
+
+def analyze_profile(profile, root=ROOT_DIRECTORY, path=None):
+    """
+    Computes the import graph of a build profile.
+
+    :param profile: The build profile.
+    :type profile: :class:`Profile`
+    :param root: The root directory of the builder, holding the requirement
+        files.
+    :type root: str
+    :param path: Module search path, defaults to :data:`sys.path`.
+    :type path: list [str]
+    :return: The packages to include and exclude, with their sizes, the
+        unresolved and dynamic imports.
+    :rtype: dict
+    """
+    roots = list(profile.entry_points) + list(profile.packages)
+    search_path = list(sys.path if path is None else path)
+    if profile.plugins:
+        plugin_modules, plugin_path = _plugin_modules(root)
+        roots.extend(plugin_modules)
+        search_path.extend(plugin_path)
+    graph = ImportGraph(search_path)
+    graph.walk(roots)
+    included = collections.OrderedDict()
+    for package, names in sorted(graph.top_level_packages().items()):
+        if _is_stdlib(package, graph.find_spec(package)):
+            continue
+        included[package] = sum(
+            _spec_size(graph.find_spec(name)) for name in names
+        )
+    excluded = collections.OrderedDict()
+    for requirements_file in profile.requirements:
+        for distribution_name in _installed_dependencies(_read_requirements(
+            os.path.join(root, requirements_file)
+        )):
+            for import_name in package_discovery.distribution_import_names(
+                distribution_name
+            ):
+                spec = graph.find_spec(import_name)
+                if spec is None or import_name in included:
+                    continue
+                excluded[import_name] = _spec_size(spec, whole_package=True)
+    return collections.OrderedDict([
+        ("entry_points", list(profile.entry_points)),
+        ("modules", len(graph.imports)),
+        ("includes", list(included)),
+        ("excludes", sorted(excluded)),
+        ("included_bytes", sum(included.values())),
+        ("excluded_bytes", sum(excluded.values())),
+        ("sizes", collections.OrderedDict([
+            ("included", included),
+            ("excluded", collections.OrderedDict(sorted(excluded.items()))),
+        ])),
+        ("missing", collections.OrderedDict(
+            (name, sorted(filter(None, importers)))
+            for name, importers in sorted(graph.missing.items())
+        )),
+        ("dynamic_imports", collections.OrderedDict(
+            sorted(graph.dynamic_imports.items())
+        )),
+    ])
+
+
+def freeze_options(report):
+    """
+    :param report: The import graph report of a profile, as computed by
+        :func:`analyze_profile`.
+    :type report: dict
+    :return: The options of cx_Freeze's build_exe command leaving out the
+        packages the profile can exclude.
+    :rtype: list [str]
+    """
+    if not report["excludes"]:
+        return []
+    return ["--excludes=" + ",".join(report["excludes"])]
+
+
+def _parse_args(args=None):
+    """
+    Parses the command line arguments of the import graph analysis.
+
+    :param args: Arguments to parse, defaults to :data:`sys.argv`.
+    :type args: list [str]
+    :return: The parsed arguments.
+    :rtype: :class:`~argparse.Namespace`
+    """
+    parser = argparse.ArgumentParser(
+        description="Computes the packages to include in and exclude from "
+                    "the frozen build of each build profile."
+    )
+    parser.add_argument(
+        "profiles", nargs="*", metavar="PROFILE",
+        help="build profiles to analyze, among {} (default: every "
+             "profile)".format(", ".join(BUILD_PROFILES))
+    )
+    parser.add_argument(
+        "--output-dir", default=os.path.join(".build_cache", "import_graph"),
+        help="directory to write PROFILE.json into (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--freeze-options", metavar="PROFILE",
+        help="print the options of cx_Freeze's build_exe command excluding "
+             "the packages of the profile's report in the output directory, "
+             "and exit"
+    )
+    parser.add_argument(
+        "--root", default=ROOT_DIRECTORY,
+        help="directory holding the requirement files (default: "
+             "%(default)s)"
+    )
+    options = parser.parse_args(args)
+    for profile in options.profiles + [options.freeze_options]:
+        if profile is not None and profile not in BUILD_PROFILES:
+            parser.error("unknown build profile {}".format(profile))
+    return options
+
+
+def main(args=None):
+    """
+    Writes the import graph report of build profiles, or prints the freeze
+    options of a profile out of its report.
+
+    :param args: Command line arguments, defaults to :data:`sys.argv`.
+    :type args: list [str]
+    """
+    options = _parse_args(args)
+    if options.freeze_options:
+        report_file_name = os.path.join(
+            options.output_dir, options.freeze_options + ".json"
+        )
+        with io.open(report_file_name, "rt", encoding="utf-8") as report:
+            print(" ".join(freeze_options(json.load(report))))
+        return
+    os.makedirs(options.output_dir, exist_ok=True)
+    for name in options.profiles or BUILD_PROFILES:
+        report = analyze_profile(BUILD_PROFILES[name], options.root)
+        report_file_name = os.path.join(options.output_dir, name + ".json")
+        with io.open(report_file_name, "wt", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+        print("{0}: {1} modules, includes {2} packages of {3} bytes, excludes "
+              "{4} packages of {5} bytes, {6} dynamic imports".format(
+                  name, report["modules"], len(report["includes"]),
+                  report["included_bytes"], len(report["excludes"]),
+                  report["excluded_bytes"],
+                  sum(report["dynamic_imports"].values())
+              ))
+
+
+if __name__ == "__main__":
+    main()
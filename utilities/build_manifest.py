@@ -0,0 +1,328 @@
+"""
+Checksum manifest of the release artifacts: hashes the .dmg, .tar.gz,
+.tar.zst, .exe and .zip files of dist and dist_dmg into a JSON manifest
+tagged with the VERSION_STRING written to version.txt by build_version.py,
+and verifies artifacts against it:
+
+    python utilities/build_manifest.py
+    python utilities/build_manifest.py --verify dist/checksums-1.2.3.json
+
+Files are read through memory maps and hashed on a pool of threads, several
+files at once, as hashlib releases the GIL while hashing large buffers.
+Digests are the standard digests of the whole files, which sha256sum and
+shasum verify as well.  Verifying first compares the sizes of every
+artifact, failing before anything is hashed when one differs.  The paths of
+the artifacts are relative to the build root, which the manifest records
+relative to itself, so a manifest verifies from any directory.
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import hashlib
+import io
+import json
+import mmap
+import os
+import sys
+import time
+
+try:
+    from utilities import build_common
+except ImportError:  # run as a script from within the utilities directory
+    import build_common
+
+
+ALGORITHM = "sha256"
+# the shake algorithms are left out, their digests take a length
+ALGORITHMS = sorted(
+    algorithm for algorithm in hashlib.algorithms_guaranteed
+    if not algorithm.startswith("shake_")
+)
+ARTIFACT_DIRECTORIES = ("dist", "dist_dmg")
+ARTIFACT_SUFFIXES = (".dmg", ".tar.gz", ".tar.zst", ".exe", ".zip")
+CHUNK_SIZE = 8 << 20
+MANIFEST_DIRECTORY = "dist"
+
+
+def manifest_name(version):
+    """
+    :param version: The VERSION_STRING of the release.
+    :type version: str
+    :return: The file name of the manifest of the release.
+    :rtype: str
+    """
+    return "checksums-{}.json".format(version)
+
+
+def find_artifacts(directories=ARTIFACT_DIRECTORIES):
+    """
+    Lists the release artifacts of the given directories.  Only the files at
+    the top of each directory are artifacts, not the contents of the bundles
+    copied next to them.
+
+    :param directories: Directories holding the artifacts, missing ones are
+        skipped.
+    :type directories: list [str]
+    :return: The paths of the artifacts, with / separators, sorted.
+    :rtype: list [str]
+    """
+    artifacts = []
+    for directory in directories:
+        if not os.path.isdir(directory):
+            continue
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.endswith(ARTIFACT_SUFFIXES) and os.path.isfile(path):
+                artifacts.append(path.replace(os.sep, "/"))
+    return sorted(artifacts)
+
+
+def hash_file(file_name, algorithm=ALGORITHM, chunk_size=CHUNK_SIZE):
+    """
+    Hashes a file through a memory map, a chunk at a time.
+
+    :param file_name: Path of the file.
+    :type file_name: str
+    :param algorithm: Name of the hashlib algorithm.
+    :type algorithm: str
+    :param chunk_size: Bytes hashed at once.
+    :type chunk_size: int
+    :return: The size of the file and its hex digest.
+    :rtype: tuple (int, str)
+    """
+    digest = hashlib.new(algorithm)
+    with open(file_name, "rb") as hashed_file:
+        size = os.fstat(hashed_file.fileno()).st_size
+        if size:
+            # empty files cannot be mapped
+            with mmap.mmap(
+                hashed_file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as mapped, memoryview(mapped) as view:
+                for offset in range(0, size, chunk_size):
+                    digest.update(view[offset:offset + chunk_size])
+    return size, digest.hexdigest()
+
+
+def hash_files(file_names, algorithm=ALGORITHM, threads=None):
+    """
+    Hashes files on a pool of threads.
+
+    :param file_names: Paths of the files.
+    :type file_names: list [str]
+    :param algorithm: Name of the hashlib algorithm.
+    :type algorithm: str
+    :param threads: Number of threads, defaults to the number of processors.
+    :type threads: int
+    :return: The size and hex digest of each file, in the given order.
+    :rtype: list [tuple (int, str)]
+    """
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=threads or os.cpu_count() or 1,
+        thread_name_prefix="manifest-hash"
+    ) as executor:
+        return list(executor.map(
+            lambda file_name: hash_file(file_name, algorithm), file_names
+        ))
+
+
+def write_manifest(manifest_file_name, version, artifacts,
+                   algorithm=ALGORITHM, threads=None):
+    """
+    Hashes the artifacts into a manifest.
+
+    :param manifest_file_name: Path of the manifest to write.
+    :type manifest_file_name: str
+    :param version: The VERSION_STRING of the release.
+    :type version: str
+    :param artifacts: Paths of the artifacts.
+    :type artifacts: list [str]
+    :param algorithm: Name of the hashlib algorithm.
+    :type algorithm: str
+    :param threads: Number of hashing threads.
+    :type threads: int
+    :return: The manifest.
+    :rtype: dict
+    """
+    manifest = collections.OrderedDict([
+        ("version", version),
+        ("algorithm", algorithm),
+        # the directory the paths of the artifacts are relative to
+        ("root", os.path.relpath(
+            os.curdir, os.path.dirname(manifest_file_name) or os.curdir
+        ).replace(os.sep, "/")),
+        ("artifacts", [
+            collections.OrderedDict([
+                ("path", artifact), ("size", size), ("digest", digest)
+            ])
+            for artifact, (size, digest) in zip(
+                artifacts, hash_files(artifacts, algorithm, threads)
+            )
+        ]),
+    ])
+    directory = os.path.dirname(manifest_file_name)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with io.open(manifest_file_name + ".tmp", "wt",
+                 encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    os.replace(manifest_file_name + ".tmp", manifest_file_name)
+    return manifest
+
+
+def manifest_root(manifest_file_name, manifest):
+    """
+    :param manifest_file_name: Path of the manifest.
+    :type manifest_file_name: str
+    :param manifest: The manifest, as written by :func:`write_manifest`.
+    :type manifest: dict
+    :return: The build root the paths of the artifacts are relative to, the
+        parent of the manifest directory for manifests not recording it.
+    :rtype: str
+    """
+    return os.path.normpath(os.path.join(
+        os.path.dirname(os.path.abspath(manifest_file_name)),
+        manifest.get("root", os.pardir)
+    ))
+
+
+def verify_manifest(manifest, threads=None, sizes_only=False,
+                    root=os.curdir):
+    """
+    Verifies the artifacts of a manifest, comparing their sizes before
+    hashing any of them.
+
+    :param manifest: The manifest, as written by :func:`write_manifest`.
+    :type manifest: dict
+    :param threads: Number of hashing threads.
+    :type threads: int
+    :param sizes_only: Whether to only compare the sizes.
+    :type sizes_only: bool
+    :param root: The build root the paths of the artifacts are relative to,
+        see :func:`manifest_root`.
+    :type root: str
+    :return: A description of each artifact which is missing or differs,
+        empty when every artifact matches.
+    :rtype: list [str]
+    """
+    errors = []
+    for entry in manifest["artifacts"]:
+        try:
+            size = os.path.getsize(os.path.join(root, entry["path"]))
+        except OSError:
+            errors.append("{} is missing".format(entry["path"]))
+            continue
+        if size != entry["size"]:
+            errors.append("{0} is {1} bytes instead of {2}".format(
+                entry["path"], size, entry["size"]
+            ))
+    if errors or sizes_only:
+        return errors
+    paths = [
+        os.path.join(root, entry["path"]) for entry in manifest["artifacts"]
+    ]
+    for entry, (_, digest) in zip(
+        manifest["artifacts"],
+        hash_files(paths, manifest["algorithm"], threads)
+    ):
+        if digest != entry["digest"]:
+            errors.append("{0} {1} digest differs".format(
+                entry["path"], manifest["algorithm"]
+            ))
+    return errors
+
+
+def _parse_args(args=None):
+    """
+    Parses the command line arguments of the manifest stage.
+
+    :param args: Arguments to parse, defaults to :data:`sys.argv`.
+    :type args: list [str]
+    :return: The parsed arguments.
+    :rtype: :class:`~argparse.Namespace`
+    """
+    parser = argparse.ArgumentParser(
+        description="Writes or verifies the checksum manifest of the release "
+                    "artifacts."
+    )
+    parser.add_argument(
+        "directories", nargs="*", default=list(ARTIFACT_DIRECTORIES),
+        help="directories holding the artifacts (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--verify", metavar="MANIFEST",
+        help="verify the artifacts listed in a manifest instead of writing "
+             "one"
+    )
+    parser.add_argument(
+        "--sizes-only", action="store_true",
+        help="only compare the sizes of the artifacts when verifying"
+    )
+    parser.add_argument(
+        "--output", metavar="MANIFEST",
+        help="manifest to write (default: {}/{})".format(
+            MANIFEST_DIRECTORY, manifest_name("VERSION")
+        )
+    )
+    parser.add_argument(
+        "--algorithm", default=ALGORITHM,
+        choices=ALGORITHMS,
+        help="hash algorithm (default: %(default)s)"
+    )
+    parser.add_argument(
+        "-t", "--threads", type=int, default=0,
+        help="number of hashing threads (default: 0, every CPU)"
+    )
+    parser.add_argument(
+        "--version",
+        help="version the manifest is tagged with (default: the content of "
+             "version.txt, written by build_version.py)"
+    )
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    """
+    Writes or verifies the checksum manifest.
+
+    :param args: Command line arguments, defaults to :data:`sys.argv`.
+    :type args: list [str]
+    :return: The exit status, 1 when verifying found a mismatch.
+    :rtype: int
+    """
+    options = _parse_args(args)
+    started_at = time.perf_counter()
+    if options.verify:
+        with io.open(options.verify, "rt", encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+        errors = verify_manifest(
+            manifest, options.threads or None, options.sizes_only,
+            manifest_root(options.verify, manifest)
+        )
+        for error in errors:
+            print(error)
+        print("Verified {0} artifacts of {1} in {2:.2f} secs, {3} "
+              "mismatches".format(
+                  len(manifest["artifacts"]), manifest["version"],
+                  time.perf_counter() - started_at, len(errors)
+              ))
+        return 1 if errors else 0
+    version = options.version or build_common.read_version()
+    manifest_file_name = options.output or os.path.join(
+        MANIFEST_DIRECTORY, manifest_name(version)
+    )
+    manifest = write_manifest(
+        manifest_file_name, version, find_artifacts(options.directories),
+        options.algorithm, options.threads or None
+    )
+    print("Hashed {0} artifacts, {1} bytes, into {2} in {3:.2f} "
+          "secs".format(
+              len(manifest["artifacts"]),
+              sum(entry["size"] for entry in manifest["artifacts"]),
+              manifest_file_name, time.perf_counter() - started_at
+          ))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
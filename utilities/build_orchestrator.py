@@ -0,0 +1,644 @@
+"""
+Build orchestrator running the steps of a distribution build as a dependency
+graph:
+
+    python utilities/build_orchestrator.py            # every step
+    python utilities/build_orchestrator.py precompile # and the steps before
+    python utilities/build_orchestrator.py --dry-run --list
+
+Each step declares the files it reads, the files it writes and the steps it
+requires.  Steps whose requirements are met run in parallel, and a step is
+skipped when its command, the contents of its inputs and the inputs of the
+steps it requires all match the last successful run of the step, provided
+its outputs are still there and none of the steps it requires ran again.
+Steps bound to other platforms, such as the macOS packaging on Linux, are
+stubbed out: they do not run, and their dependents proceed as if they had.
+
+Steps running worker processes of their own take a number of jobs, which the
+steps running at the same time share out between them, so that parallel
+steps do not each start a process per CPU.
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import glob
+import hashlib
+import io
+import itertools
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+
+try:
+    from utilities import build_common
+except ImportError:  # run as a script from within the utilities directory
+    import build_common
+
+
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_FILE = os.path.join(".build_cache", "build_state.json")
+
+STEP_RAN = "ran"
+STEP_UP_TO_DATE = "up to date"
+STEP_STUBBED = "stubbed"
+STEP_WOULD_RUN = "would run"
+STEP_FAILED = "failed"
+STEP_NOT_RUN = "not run"
+# placeholder, in the command of a step, for its share of the jobs
+JOBS = "{jobs}"
+# statuses letting the steps which require the step proceed
+_COMPLETED = (STEP_RAN, STEP_UP_TO_DATE, STEP_STUBBED, STEP_WOULD_RUN)
+
+Step = collections.namedtuple(
+    "Step", ["name", "command", "inputs", "outputs", "requires", "platforms"]
+)
+Step.__new__.__defaults__ = ((), (), (), None)
+Step.__doc__ = """
+A build step.
+
+:param name: Unique name of the step.
+:param command: Argument list to run, or a shell command line.
+    :data:`JOBS` in the command is replaced by the number of jobs the step
+    may run at once.
+:param inputs: Glob patterns, relative to the root directory, of the files
+    the step reads.  Files written by required steps do not need to be
+    listed, a change to the inputs of a required step already reruns the
+    step.
+:param outputs: Paths, relative to the root directory, the step writes.
+:param requires: Names of the steps to run before the step.
+:param platforms: Prefixes of the :data:`sys.platform` values the step runs
+    on, None for every platform.
+"""
+
+_PYTHON = shlex.quote(sys.executable)
+DIST_STEPS = (
+    Step(
+        "version",
+        [sys.executable, "utilities/build_version.py"],
+        inputs=("utilities/build_version.py", "arelle/_pkg_meta.py"),
+        outputs=("version.txt",)
+    ),
+    Step(
+        "messages_catalog",
+        [
+            sys.executable, "utilities/generate_messages_catalog.py",
+            "--jobs", JOBS, "--cache", ".build_cache/messagesCatalog.json",
+            "--shards"
+        ],
+        inputs=(
+            "utilities/generate_messages_catalog.py",
+            "utilities/build_common.py",
+            "utilities/messages_catalog_db.py",
+            "utilities/messages_catalog_shards.py",
+            "utilities/package_discovery.py",
+            "requirements_plugins.txt",
+            "arelle/**/*.py",
+            "non_library_plugins/**/*.py",
+        ),
+        outputs=(
+            "arelle/doc/messagesCatalog.xml", "arelle/doc/messagesCatalog.xsd",
+            "arelle/doc/messagesCatalogShards/index.json"
+        )
+    ),
+    Step(
+        "import_graph",
+        [sys.executable, "utilities/build_import_graph.py"],
+        inputs=(
+            "utilities/build_import_graph.py",
+            "utilities/package_discovery.py",
+            "requirements*.txt",
+            "arelle/**/*.py",
+            "non_library_plugins/**/*.py",
+        ),
+        outputs=(
+            ".build_cache/import_graph/cmdline.json",
+            ".build_cache/import_graph/mac.json",
+            ".build_cache/import_graph/linux.json",
+            ".build_cache/import_graph/edgar.json",
+        )
+    ),
+    Step(
+        "assets",
+        [sys.executable, "utilities/build_assets.py", "--jobs", JOBS],
+        inputs=(
+            "utilities/build_assets.py",
+            "utilities/build_common.py",
+            "build_assets/images/*",
+            "builders/*",
+            "arelle/**/*.py",
+            "non_library_plugins/**/*.py",
+        ),
+        outputs=("dist_assets/images",)
+    ),
+    Step(
+        "freeze_mac",
+        # leave out the requirements the import graph does not reach
+        "rm -rf build && {0} setup.py build_exe "
+        "$({0} utilities/build_import_graph.py --freeze-options mac) "
+        "bdist_mac && "
+        # fix up tkinter library to not use built-in one
+        "cp /Library/Frameworks/Python.framework/Versions/3.3/lib/python3.3/"
+        "lib-dynload/_tkinter.so build/Arelle.app/Contents/MacOS && "
+        # replace the frozen images with the ones of the assets step
+        "{0} utilities/build_assets.py "
+        "--install build/Arelle.app/Contents/MacOS/images"
+        .format(_PYTHON),
+        inputs=(
+            "setup.py", "arelle/**", "dist_assets/images/*",
+            "utilities/build_assets.py"
+        ),
+        outputs=("build/Arelle.app",),
+        requires=("version", "messages_catalog", "import_graph", "assets"),
+        platforms=("darwin",)
+    ),
+    Step(
+        "freeze_linux",
+        "rm -rf build && {0} setup.py build_exe "
+        "$({0} utilities/build_import_graph.py --freeze-options linux) && "
+        "{0} utilities/build_assets.py --install".format(_PYTHON),
+        inputs=(
+            "setup.py", "arelle/**", "dist_assets/images/*",
+            "utilities/build_assets.py"
+        ),
+        outputs=(build_common.frozen_build_directory(),),
+        requires=("version", "messages_catalog", "import_graph", "assets"),
+        platforms=("linux",)
+    ),
+    Step(
+        "precompile",
+        [
+            sys.executable, "utilities/build_precompile.py", "--jobs", JOBS
+        ],
+        inputs=("utilities/build_precompile.py", "utilities/build_common.py"),
+        # the pycs are written into the bundle
+        outputs=(build_common.frozen_bundle(),),
+        requires=("freeze_mac", "freeze_linux")
+    ),
+    Step(
+        "startup_benchmark",
+        [sys.executable, "utilities/build_startup_benchmark.py", "--record"],
+        inputs=(
+            "utilities/build_startup_benchmark.py",
+            "utilities/build_common.py",
+            # the launched executable, missing when the bundle is
+            os.path.join(
+                build_common.frozen_executable_directory(), "arelleCmdLine"
+            ),
+        ),
+        outputs=(".build_cache/startup_baseline.json",),
+        requires=("precompile",)
+    ),
+    Step(
+        "dist",
+        "rm -rf dist && mkdir dist && cp -R build/Arelle.app dist && "
+        "cp arelle/scripts-macOS/* dist",
+        inputs=("arelle/scripts-macOS/*",),
+        outputs=("dist",),
+        requires=("precompile", "startup_benchmark"),
+        platforms=("darwin",)
+    ),
+    Step(
+        "dmg",
+        "rm -rf dist_dmg && bash builders/buildMacDmg.sh",
+        inputs=("builders/buildMacDmg.sh", "arelle/images/dmg_background.png"),
+        outputs=("dist_dmg",),
+        requires=("dist",),
+        platforms=("darwin",)
+    ),
+    Step(
+        "archive",
+        [
+            sys.executable, "utilities/build_archive.py", "--threads", JOBS
+        ],
+        inputs=("utilities/build_archive.py", "utilities/build_common.py"),
+        outputs=("dist",),
+        requires=("precompile", "startup_benchmark"),
+        platforms=("linux",)
+    ),
+    Step(
+        "manifest",
+        [
+            sys.executable, "utilities/build_manifest.py", "--threads", JOBS
+        ],
+        inputs=("utilities/build_manifest.py", "utilities/build_common.py"),
+        requires=("dmg", "archive")
+    ),
+)
+
+
+def sort_steps(steps):
+    """
+    Orders steps so that each one comes after the steps it requires.
+
+    :param steps: The steps to order.
+    :type steps: iterable [:class:`Step`]
+    :return: The steps, in the given order as far as their requirements allow.
+    :rtype: list [:class:`Step`]
+    :raises ValueError: When a step is declared twice, requires an unknown
+        step, or the requirements form a cycle.
+    """
+    steps_by_name = collections.OrderedDict()
+    for step in steps:
+        if step.name in steps_by_name:
+            raise ValueError("Step {} is declared twice".format(step.name))
+        steps_by_name[step.name] = step
+    for step in steps_by_name.values():
+        for required in step.requires:
+            if required not in steps_by_name:
+                raise ValueError("Step {} requires unknown step {}".format(
+                    step.name, required
+                ))
+    ordered = []
+    visiting = []
+    visited = set()
+
+    def visit(step):
+        if step.name in visited:
+            return
+        if step.name in visiting:
+            raise ValueError("Steps {} require each other".format(
+                " -> ".join(visiting[visiting.index(step.name):] + [step.name])
+            ))
+        visiting.append(step.name)
+        for required in step.requires:
+            visit(steps_by_name[required])
+        visiting.pop()
+        visited.add(step.name)
+        ordered.append(step)
+    for step in steps_by_name.values():
+        visit(step)
+    return ordered
+
+
+def select_steps(steps, targets=None):
+    """
+    Selects target steps along with every step they require.
+
+    :param steps: Every step, as ordered by :func:`sort_steps`.
+    :type steps: list [:class:`Step`]
+    :param targets: Names of the steps to run, None for every step.
+    :type targets: iterable [str]
+    :return: The selected steps, in order.
+    :rtype: list [:class:`Step`]
+    :raises ValueError: When a target is not a step.
+    """
+    if targets is None:
+        return list(steps)
+    steps_by_name = {step.name: step for step in steps}
+    selected = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in steps_by_name:
+            raise ValueError("Unknown step {}".format(name))
+        if name not in selected:
+            selected.add(name)
+            pending.extend(steps_by_name[name].requires)
+    return [step for step in steps if step.name in selected]
+
+
+def _input_files(step, root):
+    """
+    Helper function to list the files matching the inputs of a step.
+
+    :param step: The step.
+    :type step: :class:`Step`
+    :param root: Directory the inputs are relative to.
+    :type root: str
+    :return: The sorted relative paths of the input files.
+    :rtype: list [str]
+    """
+    input_files = set()
+    for pattern in step.inputs:
+        for path in glob.glob(os.path.join(root, pattern), recursive=True):
+            if os.path.isfile(path):
+                input_files.add(
+                    os.path.relpath(path, root).replace(os.sep, "/")
+                )
+    return sorted(input_files)
+
+
+def step_digest(step, root, required_digests=()):
+    """
+    Hashes what a step depends on: its command, the contents of its input
+    files and the digests of the steps it requires.
+
+    :param step: The step.
+    :type step: :class:`Step`
+    :param root: Directory the inputs are relative to.
+    :type root: str
+    :param required_digests: Digests of the steps the step requires, in the
+        order they are required.
+    :type required_digests: iterable [str]
+    :return: The hex sha1 digest.
+    :rtype: str
+    """
+    digest = hashlib.sha1()
+    digest.update(json.dumps({
+        "command": step.command,
+        "inputs": [
+            (input_file, build_common.file_digest(
+                os.path.join(root, input_file), "sha1"
+            ))
+            for input_file in _input_files(step, root)
+        ],
+        "requires": list(required_digests),
+    }).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _load_state(state_file):
+    """
+    Helper function to read the digests of the last successful run of each
+    step.
+
+    :param state_file: Path of the state file.
+    :type state_file: str
+    :return: The digest of each step which ran successfully.
+    :rtype: dict {str: str}
+    """
+    try:
+        with io.open(state_file, "rt", encoding="utf-8") as state:
+            return json.load(state).get("steps", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(state_file, step_digests):
+    """
+    Helper function to write the digests of the steps which ran successfully.
+
+    :param state_file: Path of the state file.
+    :type state_file: str
+    :param step_digests: The digest of each step which ran successfully.
+    :type step_digests: dict {str: str}
+    """
+    directory = os.path.dirname(state_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with io.open(state_file + ".tmp", "wt", encoding="utf-8") as state:
+        json.dump({"steps": step_digests}, state, indent=2, sort_keys=True)
+    os.replace(state_file + ".tmp", state_file)
+
+
+def _takes_jobs(step):
+    """
+    Helper function telling whether the command of a step takes a number of
+    jobs.
+    """
+    if isinstance(step.command, str):
+        return JOBS in step.command
+    return any(JOBS in argument for argument in step.command)
+
+
+def _run_command(step, root, jobs):
+    """
+    Worker function running the command of a step.
+
+    :param step: The step to run.
+    :type step: :class:`Step`
+    :param root: Directory to run the command from.
+    :type root: str
+    :param jobs: Number of jobs the step may run at once.
+    :type jobs: int
+    :return: The exit status of the command and the seconds it took.
+    :rtype: tuple (int, float)
+    """
+    if isinstance(step.command, str):
+        command = step.command.replace(JOBS, str(jobs))
+    else:
+        command = [
+            argument.replace(JOBS, str(jobs)) for argument in step.command
+        ]
+    started_at = time.perf_counter()
+    completed = subprocess.run(
+        command, cwd=root, shell=isinstance(command, str)
+    )
+    return completed.returncode, time.perf_counter() - started_at
+
+
+def run_steps(steps, root=ROOT_DIRECTORY, state_file=None, jobs=None,
+              force=False, dry_run=False, platform=sys.platform):
+    """
+    Runs build steps, in parallel as far as their requirements allow,
+    skipping the steps which are up to date.  No step is started once a step
+    failed.
+
+    :param steps: The steps to run, see :func:`select_steps`.
+    :type steps: iterable [:class:`Step`]
+    :param root: Directory the steps run from.
+    :type root: str
+    :param state_file: File recording the last successful run of each step,
+        defaults to :data:`STATE_FILE` under the root directory.
+    :type state_file: str
+    :param jobs: Number of jobs the build runs at once: the maximum number of
+        steps running at once, and the jobs the steps taking a number of jobs
+        share out between them.  Defaults to as many steps as can run at
+        once, sharing the processors.
+    :type jobs: int
+    :param force: Whether to run the steps even when they are up to date.
+    :type force: bool
+    :param dry_run: Whether to only report the steps which would run.
+    :type dry_run: bool
+    :param platform: Platform the build runs on, steps bound to other
+        platforms are stubbed.
+    :type platform: str
+    :return: The status of each step, :data:`STEP_RAN`,
+        :data:`STEP_UP_TO_DATE`, ...
+    :rtype: dict {str: str}
+    """
+    steps = sort_steps(steps)
+    if state_file is None:
+        state_file = os.path.join(root, STATE_FILE)
+    state = _load_state(state_file)
+    statuses = collections.OrderedDict()
+    digests = {}
+    pending = list(steps)
+    running = {}
+    failed = False
+    available_jobs = jobs or os.cpu_count() or 1
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=jobs or max(len(steps), 1)
+    ) as executor:
+        while pending or running:
+            # Resolve every step which can be decided without waiting, as
+            # skipped steps may in turn let the steps requiring them start.
+            starting = []
+            progressed = True
+            while progressed:
+                progressed = False
+                for step in list(pending):
+                    required = [statuses.get(name) for name in step.requires]
+                    if failed or any(
+                        status in (STEP_FAILED, STEP_NOT_RUN)
+                        for status in required
+                    ):
+                        statuses[step.name] = STEP_NOT_RUN
+                    elif not all(status in _COMPLETED for status in required):
+                        continue
+                    else:
+                        status = _start_step(
+                            step, root, state, digests, required, force,
+                            dry_run, platform
+                        )
+                        if status is None:
+                            starting.append(step)
+                        else:
+                            statuses[step.name] = status
+                            _report(step, status)
+                    pending.remove(step)
+                    progressed = True
+            # the steps starting get an equal share of the jobs with the
+            # steps already running
+            parallel_steps = sum(
+                _takes_jobs(step)
+                for step in itertools.chain(running.values(), starting)
+            )
+            for step in starting:
+                running[executor.submit(
+                    _run_command, step, root,
+                    max(available_jobs // max(parallel_steps, 1), 1)
+                )] = step
+            if not running:
+                continue
+            done, _ = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                step = running.pop(future)
+                returncode, seconds = future.result()
+                if returncode == 0:
+                    statuses[step.name] = STEP_RAN
+                    state[step.name] = digests[step.name]
+                    _save_state(state_file, state)
+                    _report(step, "ran in {:.2f} secs".format(seconds))
+                else:
+                    statuses[step.name] = STEP_FAILED
+                    state.pop(step.name, None)
+                    _save_state(state_file, state)
+                    failed = True
+                    _report(step, "failed with exit status {}".format(
+                        returncode
+                    ))
+    return collections.OrderedDict(
+        (step.name, statuses[step.name]) for step in steps
+    )
+
+
+def _start_step(step, root, state, digests, required_statuses, force,
+                dry_run, platform):
+    """
+    Helper function deciding whether a step, whose requirements completed,
+    has to run.  A step whose requirements ran again runs again too, as their
+    outputs may have changed without their digest telling, such as when they
+    ran to rebuild a deleted output.
+
+    :return: The status of the step when it does not have to run, None when
+        it has to.
+    :rtype: str
+    """
+    digests[step.name] = step_digest(
+        step, root, [digests[name] for name in step.requires]
+    )
+    if step.platforms is not None and not any(
+        platform.startswith(prefix) for prefix in step.platforms
+    ):
+        return STEP_STUBBED
+    if not force and state.get(step.name) == digests[step.name] and not any(
+        status in (STEP_RAN, STEP_WOULD_RUN) for status in required_statuses
+    ) and all(
+        os.path.exists(os.path.join(root, output)) for output in step.outputs
+    ):
+        return STEP_UP_TO_DATE
+    if dry_run:
+        return STEP_WOULD_RUN
+    _report(step, "running")
+    return None
+
+
+def _report(step, message):
+    """
+    Helper function printing the progress of a step.
+    """
+    print("[{}] {}".format(step.name, message), flush=True)
+
+
+def _parse_args(args=None):
+    """
+    Parses the command line arguments of the build orchestrator.
+
+    :param args: Arguments to parse, defaults to :data:`sys.argv`.
+    :type args: list [str]
+    :return: The parsed arguments.
+    :rtype: :class:`~argparse.Namespace`
+    """
+    parser = argparse.ArgumentParser(
+        description="Runs the steps of the distribution build of this "
+                    "platform which are not up to date."
+    )
+    parser.add_argument(
+        "steps", nargs="*", metavar="STEP",
+        help="steps to run along with the steps they require "
+             "(default: every step)"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=0,
+        help="number of jobs running at once, shared out between the steps "
+             "running in parallel (default: 0, every CPU, with no limit on "
+             "the number of steps)"
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="run the steps even when they are up to date"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true",
+        help="only report the steps which would run"
+    )
+    parser.add_argument(
+        "--list", action="store_true",
+        help="list the steps, their requirements and platforms, and exit"
+    )
+    parser.add_argument(
+        "--root", default=ROOT_DIRECTORY,
+        help="directory the steps run from (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--state", metavar="FILE",
+        help="file recording the last successful run of each step "
+             "(default: ROOT/{})".format(STATE_FILE)
+    )
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    """
+    Runs the build.
+
+    :param args: Command line arguments, defaults to :data:`sys.argv`.
+    :type args: list [str]
+    :return: The exit status, 1 when a step failed.
+    :rtype: int
+    """
+    options = _parse_args(args)
+    steps = select_steps(sort_steps(DIST_STEPS), options.steps or None)
+    if options.list:
+        for step in steps:
+            print("{0}: requires {1}, runs on {2}".format(
+                step.name, ", ".join(step.requires) or "nothing",
+                ", ".join(step.platforms or ("every platform",))
+            ))
+        return 0
+    statuses = run_steps(
+        steps, options.root, options.state, options.jobs or None,
+        options.force, options.dry_run
+    )
+    return 1 if STEP_FAILED in statuses.values() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
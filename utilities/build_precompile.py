@@ -0,0 +1,246 @@
+"""
+Precompiles the python modules of a frozen bundle, so that its first launch
+neither compiles sources nor checks the bytecode cached next to them:
+
+    python utilities/build_precompile.py build/Arelle.app --optimize 0 2
+
+Modules are compiled across worker processes into unchecked hash based pycs,
+which the interpreter loads without looking at their source, once per
+optimization level asked for.  Modules already compiled from their current
+source are skipped.  The pycs are specific to the interpreter compiling
+them, which has to be the one the bundle is frozen with.
+
+Most of a cx_Freeze bundle has no source to compile: the modules cx_Freeze
+freezes are written as pycs without their source, into lib or library.zip,
+and the interpreter loads such pycs without checking them.  What is left are
+the sources the bundle ships as files, such as the plugin directory Arelle
+loads its plugins from by path, which without this stage are compiled on
+the first launch loading them, and checked against their source on every
+launch after.
+"""
+
+import argparse
+import concurrent.futures
+import importlib.util
+import os
+import py_compile
+import sys
+import time
+
+try:
+    from utilities import build_common
+except ImportError:  # run as a script from within the utilities directory
+    import build_common
+
+
+BATCH_SIZE = 64
+OPTIMIZATION_LEVELS = (0, 1, 2)
+_SKIPPED_DIRECTORIES = ("__pycache__",)
+_UNCHECKED_HASH_FLAGS = 0b01
+
+
+def iter_sources(bundle_directory):
+    """
+    Generator function listing the python sources of a bundle.
+
+    :param bundle_directory: Directory of the frozen bundle.
+    :type bundle_directory: str
+    :return: Yields the path of each source, in a stable order.
+    :rtype: iterable [str]
+    """
+    for directory, directory_names, file_names in os.walk(bundle_directory):
+        directory_names[:] = sorted(
+            name for name in directory_names
+            if name not in _SKIPPED_DIRECTORIES
+        )
+        for file_name in sorted(file_names):
+            if file_name.endswith(".py"):
+                yield os.path.join(directory, file_name)
+
+
+def _is_compiled(source, pyc_file_name):
+    """
+    Helper function to tell whether a pyc is an unchecked hash based pyc of
+    the given source for the running interpreter.
+
+    :param source: The module source.
+    :type source: bytes
+    :param pyc_file_name: Path of the pyc.
+    :type pyc_file_name: str
+    :rtype: bool
+    """
+    try:
+        with open(pyc_file_name, "rb") as pyc_file:
+            header = pyc_file.read(16)
+    except OSError:
+        return False
+    return (
+        header[:4] == importlib.util.MAGIC_NUMBER and
+        int.from_bytes(header[4:8], "little") == _UNCHECKED_HASH_FLAGS and
+        header[8:16] == importlib.util.source_hash(source)
+    )
+
+
+def _compile_batch(source_file_names, optimization_levels, force=False):
+    """
+    Worker function to compile a batch of modules.
+
+    :param source_file_names: Paths of the sources.
+    :type source_file_names: list [str]
+    :param optimization_levels: Optimization levels to compile each source
+        with.
+    :type optimization_levels: list [int]
+    :param force: Whether to compile modules already compiled.
+    :type force: bool
+    :return: The number of pycs written and skipped, and an error message
+        for each source failing to compile.
+    :rtype: tuple (int, int, list [str])
+    """
+    compiled = skipped = 0
+    errors = []
+    for source_file_name in source_file_names:
+        try:
+            with open(source_file_name, "rb") as source_file:
+                source = source_file.read()
+            for level in optimization_levels:
+                pyc_file_name = importlib.util.cache_from_source(
+                    source_file_name, optimization=level or ""
+                )
+                if not force and _is_compiled(source, pyc_file_name):
+                    skipped += 1
+                    continue
+                py_compile.compile(
+                    source_file_name, pyc_file_name, doraise=True,
+                    optimize=level,
+                    invalidation_mode=(
+                        py_compile.PycInvalidationMode.UNCHECKED_HASH
+                    )
+                )
+                compiled += 1
+        except (OSError, py_compile.PyCompileError) as error:
+            errors.append("{}: {}".format(
+                source_file_name, str(error).strip().splitlines()[-1]
+            ))
+    return compiled, skipped, errors
+
+
+def precompile(bundle_directory, optimization_levels=(0,), jobs=None,
+               force=False):
+    """
+    Precompiles the python modules of a bundle.
+
+    :param bundle_directory: Directory of the frozen bundle.
+    :type bundle_directory: str
+    :param optimization_levels: Optimization levels to compile each module
+        with, 0 for the interpreter run as is, 1 and 2 for the interpreter
+        run with -O and -OO.
+    :type optimization_levels: list [int]
+    :param jobs: Number of worker processes, defaults to the number of
+        processors.
+    :type jobs: int
+    :param force: Whether to compile modules already compiled.
+    :type force: bool
+    :return: The number of modules, of pycs written and skipped, and the
+        error of each module failing to compile.
+    :rtype: tuple (int, int, int, list [str])
+    """
+    sources = list(iter_sources(bundle_directory))
+    batches = [
+        sources[index:index + BATCH_SIZE]
+        for index in range(0, len(sources), BATCH_SIZE)
+    ]
+    compiled = skipped = 0
+    errors = []
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs or os.cpu_count() or 1
+    ) as executor:
+        futures = [
+            executor.submit(
+                _compile_batch, batch, list(optimization_levels), force
+            )
+            for batch in batches
+        ]
+        for future in futures:
+            batch_compiled, batch_skipped, batch_errors = future.result()
+            compiled += batch_compiled
+            skipped += batch_skipped
+            errors.extend(batch_errors)
+    return len(sources), compiled, skipped, errors
+
+
+def _parse_args(args=None):
+    """
+    Parses the command line arguments of the precompiler.
+
+    :param args: Arguments to parse, defaults to :data:`sys.argv`.
+    :type args: list [str]
+    :return: The parsed arguments.
+    :rtype: :class:`~argparse.Namespace`
+    """
+    parser = argparse.ArgumentParser(
+        description="Precompiles the python modules of a frozen bundle into "
+                    "unchecked hash based pycs."
+    )
+    parser.add_argument(
+        "bundle", nargs="?", default=build_common.frozen_bundle(),
+        help="directory of the frozen bundle (default: %(default)s)"
+    )
+    parser.add_argument(
+        "-O", "--optimize", type=int, nargs="+", default=[0],
+        choices=OPTIMIZATION_LEVELS, metavar="LEVEL",
+        help="optimization levels to compile each module with, 1 and 2 "
+             "matching the interpreter run with -O and -OO "
+             "(default: %(default)s)"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=0,
+        help="number of worker processes, 0 for one per processor "
+             "(default: %(default)s)"
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="also compile the modules already compiled"
+    )
+    parser.add_argument(
+        "--strict", action="store_true",
+        help="fail when a module does not compile, such as the python 2 "
+             "test data some packages ship"
+    )
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    """
+    Precompiles a bundle and reports what was compiled.
+
+    :param args: Command line arguments, defaults to :data:`sys.argv`.
+    :type args: list [str]
+    :return: The exit status, 1 when a module failed to compile with
+        --strict.
+    :rtype: int
+    """
+    options = _parse_args(args)
+    if not os.path.isdir(options.bundle):
+        raise FileNotFoundError(
+            "Bundle directory {} not found".format(options.bundle)
+        )
+    started_at = time.perf_counter()
+    modules, compiled, skipped, errors = precompile(
+        options.bundle, sorted(set(options.optimize)), options.jobs,
+        options.force
+    )
+    print("Precompiled {0} modules into {1} pycs in {2:.2f} secs, {3} pycs "
+          "up to date, {4} modules failed".format(
+              modules, compiled, time.perf_counter() - started_at, skipped,
+              len(errors)
+          ))
+    if not modules:
+        print("No python sources in {}, the frozen modules are compiled "
+              "already".format(options.bundle))
+    for error in errors:
+        print("Failed to compile {}".format(error))
+    return 1 if errors and options.strict else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
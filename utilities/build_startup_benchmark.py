@@ -0,0 +1,399 @@
+"""
+Startup benchmark of a built distribution: launches the frozen Arelle command
+line entry point repeatedly, measures the latency of its first launch and of
+its warm starts and the time spent importing each package, then compares
+them with the results recorded for the previous version:
+
+    python utilities/build_startup_benchmark.py --record
+    python utilities/build_startup_benchmark.py --cold \\
+        --command build/Arelle.app/Contents/MacOS/arelleCmdLine --about
+
+The first launch only is a cold start with --cold, which evicts the file
+system cache before it and needs root; otherwise it runs with whatever the
+build left in the cache.  The benchmark exits with status 1 when the first
+launch or the warm starts got slower than the baseline by more than the
+threshold.  Baselines are recorded per
+VERSION_STRING, read from the version.txt written by build_version.py, and are
+machine specific.
+"""
+
+import argparse
+import collections
+import io
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+try:
+    from utilities import build_common
+except ImportError:  # run as a script from within the utilities directory
+    import build_common
+
+
+BASELINE_FILE = os.path.join(".build_cache", "startup_baseline.json")
+DEFAULT_RUNS = 10
+DEFAULT_THRESHOLD = 0.2
+IMPORT_TIME_TOP = 25
+_IMPORT_TIME_LINE = re.compile(
+    r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)"
+)
+# latencies compared with the baseline
+MEASURES = ("first_run_secs", "warm_median_secs")
+
+
+def default_command():
+    """
+    :return: The command line entry point frozen by cx_Freeze for this
+        platform, with arguments making it start and exit.
+    :rtype: list [str]
+    """
+    return [
+        os.path.join(
+            build_common.frozen_executable_directory(), "arelleCmdLine"
+        ),
+        "--about"
+    ]
+
+
+def timed_run(command, env=None):
+    """
+    Times a launch of a command.
+
+    :param command: The command to launch.
+    :type command: list [str]
+    :param env: Environment of the command, defaults to the current one.
+    :type env: dict
+    :return: The seconds the command took, and its standard error.
+    :rtype: tuple (float, str)
+    :raises subprocess.CalledProcessError: When the command fails.
+    """
+    started_at = time.perf_counter()
+    completed = subprocess.run(
+        command, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE, check=True
+    )
+    elapsed = time.perf_counter() - started_at
+    return elapsed, completed.stderr.decode("utf-8", "replace")
+
+
+def iter_import_times(stderr):
+    """
+    Generator function reading the -X importtime / PYTHONPROFILEIMPORTTIME
+    output of an interpreter.  Each line is written once its import
+    completed, after the lines of the imports nested in it.
+
+    :param stderr: The standard error of the interpreter.
+    :type stderr: str
+    :return: Yields the microseconds spent in each module itself, the depth
+        of its import, 0 for the imports which are not nested, and its name.
+    :rtype: iterable [tuple (int, int, str)]
+    """
+    for line in stderr.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if match is not None:
+            yield (
+                int(match.group(1)), len(match.group(3)) // 2, match.group(4)
+            )
+
+
+def parse_import_times(stderr, top=IMPORT_TIME_TOP):
+    """
+    Sums the -X importtime / PYTHONPROFILEIMPORTTIME output of an interpreter
+    per top level package.
+
+    :param stderr: The standard error of the interpreter.
+    :type stderr: str
+    :param top: Number of packages to return.
+    :type top: int
+    :return: The packages taking the longest to import, with the
+        microseconds spent in their own modules and their number of modules.
+    :rtype: list [dict]
+    """
+    self_us = collections.Counter()
+    modules = collections.Counter()
+    for module_us, _, name in iter_import_times(stderr):
+        package = name.partition(".")[0]
+        self_us[package] += module_us
+        modules[package] += 1
+    return [
+        {"package": package, "self_us": us, "modules": modules[package]}
+        for package, us in self_us.most_common(top)
+    ]
+
+
+def drop_caches():
+    """
+    Evicts the file system cache, so that the next launch is a cold start.
+    This needs root: it writes /proc/sys/vm/drop_caches on Linux and runs
+    purge on macOS.
+
+    :return: Whether the cache was evicted.
+    :rtype: bool
+    """
+    try:
+        if sys.platform.startswith("linux"):
+            os.sync()
+            with open("/proc/sys/vm/drop_caches", "w") as drop_caches_file:
+                drop_caches_file.write("3\n")
+            return True
+        if sys.platform == "darwin":
+            subprocess.run(
+                ["purge"], stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL, check=True
+            )
+            return True
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return False
+
+
+def run_benchmark(command, runs=DEFAULT_RUNS, import_times=True, cold=False):
+    """
+    Launches a command repeatedly and times its startups: a first launch,
+    with whatever the launches before the benchmark left in the file system
+    cache unless it is evicted, then the warm starts.
+
+    :param command: The command to launch.
+    :type command: list [str]
+    :param runs: Number of warm starts.
+    :type runs: int
+    :param import_times: Whether to launch the command once more with
+        PYTHONPROFILEIMPORTTIME set, to break the startup down per package.
+    :type import_times: bool
+    :param cold: Whether to evict the file system cache before the first
+        launch, see :func:`drop_caches`.
+    :type cold: bool
+    :return: The first launch and warm start latencies, whether the first
+        launch was a cold start, and the import time breakdown.
+    :rtype: dict
+    """
+    cold = cold and drop_caches()
+    first_run_secs, _ = timed_run(command)
+    warm_secs = [timed_run(command)[0] for _ in range(runs)]
+    results = collections.OrderedDict([
+        ("command", command),
+        ("first_run_secs", first_run_secs),
+        ("cold", cold),
+        ("warm_min_secs", min(warm_secs)),
+        ("warm_median_secs", statistics.median(warm_secs)),
+        ("warm_max_secs", max(warm_secs)),
+        ("runs", runs),
+    ])
+    if import_times:
+        _, stderr = timed_run(
+            command, dict(os.environ, PYTHONPROFILEIMPORTTIME="1")
+        )
+        results["imports"] = parse_import_times(stderr)
+    return results
+
+
+def previous_version(baselines, version):
+    """
+    :param baselines: The results recorded for each version, in the order
+        they were recorded.
+    :type baselines: dict
+    :param version: The version being benchmarked.
+    :type version: str
+    :return: The last version recorded before the given version, or None.
+    :rtype: str
+    """
+    versions = [recorded for recorded in baselines if recorded != version]
+    return versions[-1] if versions else None
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """
+    Compares benchmark results with a baseline.
+
+    :param results: Results of :func:`run_benchmark`.
+    :type results: dict
+    :param baseline: Earlier results of :func:`run_benchmark`.
+    :type baseline: dict
+    :param threshold: Allowed slowdown, 0.2 allows startups to take up to
+        20% longer than in the baseline.
+    :type threshold: float
+    :return: A description of each latency which regressed past the
+        threshold.
+    :rtype: list [str]
+    """
+    regressions = []
+    for measure in MEASURES:
+        baseline_secs = baseline.get(measure)
+        if not baseline_secs:
+            continue
+        if (measure == "first_run_secs" and
+                results.get("cold", False) != baseline.get("cold", False)):
+            # a cold start is only comparable with a cold start
+            continue
+        ratio = results[measure] / baseline_secs
+        if ratio > 1 + threshold:
+            regressions.append(
+                "{0} {1:.4f} secs, {2:.0%} of the baseline {3:.4f} "
+                "secs".format(
+                    measure, results[measure], ratio, baseline_secs
+                )
+            )
+    return regressions
+
+
+def _load_baselines(baseline_file):
+    """
+    Helper function to read the recorded results of each version.
+
+    :param baseline_file: Path of the baseline file.
+    :type baseline_file: str
+    :return: The results of each version, in the order they were recorded.
+    :rtype: dict
+    """
+    try:
+        with io.open(baseline_file, "rt", encoding="utf-8") as baselines:
+            return json.load(
+                baselines, object_pairs_hook=collections.OrderedDict
+            ).get("versions", collections.OrderedDict())
+    except FileNotFoundError:
+        return collections.OrderedDict()
+
+
+def _save_baselines(baseline_file, baselines):
+    """
+    Helper function to write the recorded results of each version.
+
+    :param baseline_file: Path of the baseline file.
+    :type baseline_file: str
+    :param baselines: The results of each version.
+    :type baselines: dict
+    """
+    directory = os.path.dirname(baseline_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with io.open(baseline_file + ".tmp", "wt", encoding="utf-8") as output:
+        json.dump({"versions": baselines}, output, indent=2)
+    os.replace(baseline_file + ".tmp", baseline_file)
+
+
+def _parse_args(args=None):
+    """
+    Parses the command line arguments of the startup benchmark.
+
+    :param args: Arguments to parse, defaults to :data:`sys.argv`.
+    :type args: list [str]
+    :return: The parsed arguments, and the command to benchmark.
+    :rtype: tuple (:class:`~argparse.Namespace`, list [str])
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the startup of the built Arelle command "
+                    "line.  Arguments following --command are the command "
+                    "to launch, {} by default.".format(
+                        " ".join(default_command())
+                    )
+    )
+    parser.add_argument(
+        "--runs", type=int, default=DEFAULT_RUNS,
+        help="number of warm starts (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--cold", action="store_true",
+        help="evict the file system cache before the first launch, making "
+             "it a cold start, which needs root"
+    )
+    parser.add_argument(
+        "--no-import-times", dest="import_times", action="store_false",
+        help="do not break the startup down per imported package"
+    )
+    parser.add_argument(
+        "--baseline", default=BASELINE_FILE, metavar="FILE",
+        help="JSON file of the results of each version "
+             "(default: %(default)s)"
+    )
+    parser.add_argument(
+        "--baseline-version",
+        help="version to compare with (default: the last version recorded "
+             "before this one)"
+    )
+    parser.add_argument(
+        "--record", action="store_true",
+        help="record the results as the baseline of this version"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="allowed slowdown of the startup (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--version",
+        help="version being benchmarked (default: the content of "
+             "version.txt, written by build_version.py)"
+    )
+    parser.add_argument(
+        "--output", metavar="FILE",
+        help="also write the results to this JSON file"
+    )
+    args = sys.argv[1:] if args is None else list(args)
+    command = None
+    if "--command" in args:
+        index = args.index("--command")
+        args, command = args[:index], args[index + 1:]
+        if not command:
+            parser.error("--command needs the command to launch")
+    return parser.parse_args(args), command or default_command()
+
+
+def main(args=None):
+    """
+    Runs the startup benchmark.
+
+    :param args: Command line arguments, defaults to :data:`sys.argv`.
+    :type args: list [str]
+    :return: The exit status, 1 when the startup regressed.
+    :rtype: int
+    """
+    options, command = _parse_args(args)
+    version = options.version or build_common.read_version()
+    results = run_benchmark(
+        command, options.runs, options.import_times, options.cold
+    )
+    results["version"] = version
+    if options.cold and not results["cold"]:
+        print("Could not evict the file system cache, the first launch is "
+              "not a cold start")
+    print("{0} {1} {2:.4f} secs, warm start {3:.4f} secs "
+          "(min {4:.4f}, max {5:.4f})".format(
+              version, "cold start" if results["cold"] else "first launch",
+              results["first_run_secs"], results["warm_median_secs"],
+              results["warm_min_secs"], results["warm_max_secs"]
+          ))
+    for package in results.get("imports", ()):
+        print("{self_us:>10} us {modules:>5} modules {package}".format(
+            **package
+        ))
+    if options.output:
+        with open(options.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    baselines = _load_baselines(options.baseline)
+    baseline_version = options.baseline_version or previous_version(
+        baselines, version
+    )
+    regressions = []
+    if baseline_version in baselines:
+        regressions = compare_to_baseline(
+            results, baselines[baseline_version], options.threshold
+        )
+        for regression in regressions:
+            print("Regression from {}: {}".format(
+                baseline_version, regression
+            ))
+    elif baseline_version is not None:
+        print("No baseline recorded for {}".format(baseline_version))
+    if options.record:
+        baselines.pop(version, None)
+        baselines[version] = results
+        _save_baselines(options.baseline, baselines)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -41,40 +41,6 @@ def mac_script():
         )
 
 
-def linux2_script():
-    """
-    Builds the shell script to rename the distribution for "linux2" systems.
-    """
-    with open("buildRenameLinux-x86_64.sh", "w") as script:
-        script.write(
-            "mv dist/exe.linux-x86_64-{}.{}.tar.gz "
-            "dist/arelle-linux-x86_64-{}.tar.gz\n"
-            .format(
-                sys.version_info[0], sys.version_info[1],
-                VERSION_STRING
-            )
-        )
-
-
-def linux_script():
-    """
-    Builds the shell script to rename the distribution for linux.
-    """
-    if len(sys.argv) > 1 and sys.argv[1]:
-        sysName = sys.argv[1]
-    else:
-        sysName = "linux"
-    with open("buildRenameLinux-x86_64.sh", "w") as script:
-        script.write(
-            "mv dist/exe.linux-x86_64-{}.{}.tar.gz "
-            "dist/arelle-{}-x86_64-{}.tar.gz\n"
-            .format(
-                sys.version_info[0], sys.version_info[1],
-                sysName, VERSION_STRING
-            )
-        )
-
-
 def spark_script():
     """
     Builds the spark shell script to rename the distribution for Spark.
@@ -131,8 +97,6 @@ def unknown_script():
 
 SCRIPT_SWITCH = {
     "darwin": mac_script,
-    "linux2": linux2_script,
-    "linux": linux_script,
     "sunos5": spark_script,
     "win": windows_script
 }
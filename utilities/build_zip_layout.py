@@ -0,0 +1,453 @@
+"""
+Zip import layout of a bundle's pure python packages: instead of thousands of
+small files each costing a few lookups on import, the packages are read from
+a single archive whose directory zipimport loads once.
+
+    python utilities/build_zip_layout.py record --listing startup.txt -- \\
+        build/exe.linux-x86_64-3.11/arelleCmdLine --about
+    python utilities/build_zip_layout.py pack --listing startup.txt \\
+        --output build/modules.zip build/exe.linux-x86_64-3.11/lib
+    python utilities/build_zip_layout.py benchmark --listing startup.txt \\
+        build/exe.linux-x86_64-3.11/lib build/modules.zip
+
+Entries are stored uncompressed with their data aligned, so they can be read
+without inflating them.  Modules are stored compiled, as unchecked hash based
+pycs which zipimport loads without looking at their source, the compiled
+modules of the startup listing first, in the order they are imported, then
+the other compiled modules, then the sources, only read for tracebacks.  The
+pycs are specific to the interpreter the layout is packed with, which has to
+be the one the bundle is frozen with.
+
+Packages holding anything but python sources, such as extension modules or
+data files, are left in the directory layout.
+
+The layout is opt in, neither the build scripts nor the build orchestrator
+pack it: the frozen launcher only searches its lib directory and
+library.zip, so a packed archive is only imported from once the bundle's
+search path names it.  Until then, record, pack and benchmark measure what
+the layout would save, and pack --prune is only for a bundle whose search
+path names the archive.
+"""
+
+import argparse
+import collections
+import importlib.util
+import io
+import marshal
+import os
+import shutil
+import struct
+import sys
+import zipfile
+
+try:
+    from utilities import build_startup_benchmark
+except ImportError:  # run as a script from within the utilities directory
+    import build_startup_benchmark
+
+
+ALIGNMENT = 4
+# extra field id Android's zipalign pads local headers with
+_ALIGNMENT_EXTRA_ID = 0xd935
+_LOCAL_HEADER_SIZE = 30
+_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+# files a package may hold and still be imported from a zip
+_PURE_SUFFIXES = (".py", ".pyc", ".typed")
+_SKIPPED_DIRECTORIES = ("__pycache__",)
+
+ZipLayoutReport = collections.namedtuple(
+    "ZipLayoutReport", ["packages", "modules", "startup_modules", "skipped"]
+)
+ZipLayoutReport.__doc__ = """
+What :func:`write_zip_layout` packed.
+
+:param packages: Names of the top level packages and modules packed.
+:param modules: Number of modules packed.
+:param startup_modules: Number of modules of the startup listing packed.
+:param skipped: Names of the top level packages left in the directory
+    layout, as they hold more than python sources.
+"""
+
+
+def record_listing(command, listing_file_name):
+    """
+    Launches a frozen application with PYTHONPROFILEIMPORTTIME set and
+    records the modules it imports, in the order it imports them.
+
+    :param command: The command to launch.
+    :type command: list [str]
+    :param listing_file_name: Path of the listing to write.
+    :type listing_file_name: str
+    :return: The module names.
+    :rtype: list [str]
+    """
+    _, stderr = build_startup_benchmark.timed_run(
+        command, dict(os.environ, PYTHONPROFILEIMPORTTIME="1")
+    )
+    modules = startup_modules(stderr)
+    with io.open(listing_file_name, "wt", encoding="utf-8") as listing:
+        listing.writelines(module + "\n" for module in modules)
+    return modules
+
+
+def startup_modules(stderr):
+    """
+    Lists the modules an interpreter imported, out of its -X importtime /
+    PYTHONPROFILEIMPORTTIME output.
+
+    :param stderr: The standard error of the interpreter.
+    :type stderr: str
+    :return: The module names, in the order their import started.
+    :rtype: list [str]
+    """
+    # each import comes after the imports nested in it, which are deeper
+    stack = []
+    for _, depth, name in build_startup_benchmark.iter_import_times(stderr):
+        nested = []
+        while stack and stack[-1][0] > depth:
+            nested.insert(0, stack.pop())
+        stack.append((depth, name, nested))
+    started = []
+    pending = list(reversed(stack))
+    while pending:
+        _, name, nested = pending.pop()
+        started.append(name)
+        pending.extend(reversed(nested))
+    return list(collections.OrderedDict.fromkeys(started))
+
+
+def _read_listing(listing_file_name):
+    """
+    Helper function to read a startup listing.
+
+    :param listing_file_name: Path of the listing, one module per line.
+    :type listing_file_name: str
+    :return: The module names.
+    :rtype: list [str]
+    """
+    if listing_file_name is None:
+        return []
+    with io.open(listing_file_name, "rt", encoding="utf-8") as listing:
+        return [line.strip() for line in listing if line.strip()]
+
+
+def _is_pure_package(path):
+    """
+    Helper function to tell whether a top level package or module only
+    holds python sources.
+
+    :param path: Path of the package directory or module.
+    :type path: str
+    :rtype: bool
+    """
+    if not os.path.isdir(path):
+        return path.endswith(".py")
+    for directory, directory_names, file_names in os.walk(path):
+        directory_names[:] = [
+            name for name in directory_names
+            if name not in _SKIPPED_DIRECTORIES
+        ]
+        if not all(name.endswith(_PURE_SUFFIXES) for name in file_names):
+            return False
+    return True
+
+
+def _iter_sources(source_directory, name):
+    """
+    Generator function listing the python sources of a top level package or
+    module.
+
+    :param source_directory: Directory holding the package.
+    :type source_directory: str
+    :param name: File name of the package directory or module.
+    :type name: str
+    :return: Yields the module name and the path of each source, relative to
+        the source directory with / separators.
+    :rtype: iterable [tuple (str, str)]
+    """
+    path = os.path.join(source_directory, name)
+    if not os.path.isdir(path):
+        yield name[:-3], name
+        return
+    for directory, directory_names, file_names in os.walk(path):
+        directory_names[:] = sorted(
+            directory_name for directory_name in directory_names
+            if directory_name not in _SKIPPED_DIRECTORIES
+        )
+        for file_name in sorted(file_names):
+            if not file_name.endswith(".py"):
+                continue
+            relative_path = os.path.relpath(
+                os.path.join(directory, file_name), source_directory
+            ).replace(os.sep, "/")
+            parts = relative_path[:-3].split("/")
+            if parts[-1] == "__init__":
+                parts.pop()
+            yield ".".join(parts), relative_path
+
+
+def _compile_pyc(source, relative_path):
+    """
+    Helper function to compile a module into an unchecked hash based pyc.
+
+    :param source: The module source.
+    :type source: bytes
+    :param relative_path: Path of the module in the archive, naming it in
+        tracebacks.
+    :type relative_path: str
+    :return: The pyc contents.
+    :rtype: bytes
+    """
+    code = compile(source, relative_path, "exec", dont_inherit=True)
+    return b"".join((
+        importlib.util.MAGIC_NUMBER,
+        struct.pack("<I", 0b01),  # hash based, source not checked
+        importlib.util.source_hash(source),
+        marshal.dumps(code),
+    ))
+
+
+def _write_aligned(zip_file, name, data):
+    """
+    Helper function to store an entry uncompressed, padding its local header
+    so that its data starts on a multiple of :data:`ALIGNMENT`.
+
+    :param zip_file: The archive, open for writing.
+    :type zip_file: :class:`~zipfile.ZipFile`
+    :param name: Name of the entry.
+    :type name: str
+    :param data: Contents of the entry.
+    :type data: bytes
+    """
+    info = zipfile.ZipInfo(name, _DATE_TIME)
+    info.compress_type = zipfile.ZIP_STORED
+    info.external_attr = 0o644 << 16
+    header_size = _LOCAL_HEADER_SIZE + len(name.encode("utf-8")) + 4
+    padding = -(zip_file.fp.tell() + header_size) % ALIGNMENT
+    info.extra = struct.pack(
+        "<HH", _ALIGNMENT_EXTRA_ID, padding
+    ) + b"\0" * padding
+    zip_file.writestr(info, data)
+
+
+def write_zip_layout(source_directory, zip_file_name, listing=(),
+                     sources=True):
+    """
+    Packs the pure python packages of a directory into a zip import
+    archive.  The archive is written to a temporary file which replaces the
+    target once complete.
+
+    :param source_directory: Directory of the packages, as found on the
+        search path of the bundle.
+    :type source_directory: str
+    :param zip_file_name: Path of the archive to write.
+    :type zip_file_name: str
+    :param listing: Names of the modules imported on startup, in import
+        order, see :func:`record_listing`.
+    :type listing: list [str]
+    :param sources: Whether to also store the sources, for tracebacks.
+    :type sources: bool
+    :return: What was packed.
+    :rtype: :class:`ZipLayoutReport`
+    """
+    packages = []
+    skipped = []
+    modules = collections.OrderedDict()
+    for name in sorted(os.listdir(source_directory)):
+        path = os.path.join(source_directory, name)
+        if name in _SKIPPED_DIRECTORIES or name.startswith(".") or not (
+            name.endswith(".py") or
+            os.path.isfile(os.path.join(path, "__init__.py"))
+        ):
+            continue
+        if not _is_pure_package(path):
+            skipped.append(name)
+            continue
+        packages.append(name[:-3] if name.endswith(".py") else name)
+        for module, relative_path in _iter_sources(source_directory, name):
+            modules[module] = relative_path
+    startup = [module for module in listing if module in modules]
+    ordered = list(collections.OrderedDict.fromkeys(
+        startup + sorted(modules)
+    ))
+
+    directory = os.path.dirname(zip_file_name)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_file_name = zip_file_name + ".tmp"
+    try:
+        with zipfile.ZipFile(temp_file_name, "w") as zip_file:
+            for module in ordered:
+                relative_path = modules[module]
+                with open(os.path.join(source_directory, relative_path),
+                          "rb") as source_file:
+                    source = source_file.read()
+                _write_aligned(
+                    zip_file, relative_path + "c",
+                    _compile_pyc(source, relative_path)
+                )
+            if sources:
+                for module in sorted(modules):
+                    with open(os.path.join(source_directory, modules[module]),
+                              "rb") as source_file:
+                        _write_aligned(
+                            zip_file, modules[module], source_file.read()
+                        )
+    except BaseException:
+        if os.path.exists(temp_file_name):
+            os.remove(temp_file_name)
+        raise
+    os.replace(temp_file_name, zip_file_name)
+    return ZipLayoutReport(packages, len(modules), len(startup), skipped)
+
+
+def prune_packages(source_directory, packages):
+    """
+    Removes packages packed into a zip layout from the directory layout.
+
+    :param source_directory: Directory of the packages.
+    :type source_directory: str
+    :param packages: Names of the packed top level packages and modules.
+    :type packages: list [str]
+    """
+    for package in packages:
+        path = os.path.join(source_directory, package)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path + ".py")
+
+
+def benchmark_layouts(source_directory, zip_file_name, modules, runs=10):
+    """
+    Times importing modules out of the directory layout and out of the zip
+    layout, each in a fresh interpreter.
+
+    :param source_directory: Directory of the packages.
+    :type source_directory: str
+    :param zip_file_name: Path of the zip layout of the packages.
+    :type zip_file_name: str
+    :param modules: Names of the modules to import.
+    :type modules: list [str]
+    :param runs: Number of warm imports of each layout.
+    :type runs: int
+    :return: The results of :func:`build_startup_benchmark.run_benchmark`
+        for each layout.
+    :rtype: dict {str: dict}
+    """
+    results = collections.OrderedDict()
+    for layout, path in (("directory", source_directory),
+                         ("zip", zip_file_name)):
+        script = "import sys; sys.path.insert(0, {!r}); {}".format(
+            os.path.abspath(path),
+            "; ".join("import " + module for module in modules) or "pass"
+        )
+        results[layout] = build_startup_benchmark.run_benchmark(
+            # without the user site, nor bytecode written into the layout
+            [sys.executable, "-s", "-B", "-c", script], runs,
+            import_times=False
+        )
+    return results
+
+
+def _parse_args(args=None):
+    """
+    Parses the command line arguments of the zip layout packer.
+
+    :param args: Arguments to parse, defaults to :data:`sys.argv`.
+    :type args: list [str]
+    :return: The parsed arguments.
+    :rtype: :class:`~argparse.Namespace`
+    """
+    parser = argparse.ArgumentParser(
+        description="Packs the pure python packages of a bundle into a "
+                    "startup optimized zip import archive."
+    )
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    record = subparsers.add_parser(
+        "record", help="record the modules a command imports on startup"
+    )
+    record.add_argument("--listing", required=True, metavar="FILE")
+    record.add_argument(
+        "command", nargs="+", help="the command to launch, after --"
+    )
+    pack = subparsers.add_parser(
+        "pack", help="pack a directory of packages into a zip layout"
+    )
+    pack.add_argument("source", help="directory of the packages")
+    pack.add_argument("--output", required=True, metavar="ZIP")
+    pack.add_argument(
+        "--listing", metavar="FILE",
+        help="startup modules, written by record, to store first"
+    )
+    pack.add_argument(
+        "--no-sources", dest="sources", action="store_false",
+        help="only store the compiled modules"
+    )
+    pack.add_argument(
+        "--prune", action="store_true",
+        help="remove the packed packages from the source directory"
+    )
+    benchmark = subparsers.add_parser(
+        "benchmark", help="compare importing from the directory and zip "
+                          "layouts"
+    )
+    benchmark.add_argument("source", help="directory of the packages")
+    benchmark.add_argument("zip", help="zip layout of the packages")
+    benchmark.add_argument(
+        "--listing", metavar="FILE",
+        help="modules to import (default: every packed top level package)"
+    )
+    benchmark.add_argument(
+        "--runs", type=int, default=build_startup_benchmark.DEFAULT_RUNS,
+        help="number of warm imports (default: %(default)s)"
+    )
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    """
+    Records, packs or benchmarks a zip layout.
+
+    :param args: Command line arguments, defaults to :data:`sys.argv`.
+    :type args: list [str]
+    """
+    options = _parse_args(args)
+    if options.action == "record":
+        modules = record_listing(options.command, options.listing)
+        print("Recorded {} startup modules".format(len(modules)))
+    elif options.action == "pack":
+        report = write_zip_layout(
+            options.source, options.output, _read_listing(options.listing),
+            options.sources
+        )
+        print("Packed {0} modules of {1} packages into {2}, {3} startup "
+              "modules first, {4} packages left in place: {5}".format(
+                  report.modules, len(report.packages), options.output,
+                  report.startup_modules, len(report.skipped),
+                  " ".join(report.skipped)
+              ))
+        if options.prune:
+            prune_packages(options.source, report.packages)
+    else:
+        with zipfile.ZipFile(options.zip) as zip_file:
+            packed = {
+                name.partition("/")[0].rpartition(".py")[0] or
+                name.partition("/")[0]
+                for name in zip_file.namelist()
+            }
+        modules = [
+            module for module in _read_listing(options.listing)
+            if module.partition(".")[0] in packed
+        ] or sorted(packed)
+        results = benchmark_layouts(
+            options.source, options.zip, modules, options.runs
+        )
+        for layout, result in results.items():
+            print("{0:>9} first launch {1:.4f} secs, warm {2:.4f} secs".format(
+                layout, result["first_run_secs"], result["warm_median_secs"]
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,18 +5,66 @@ Created on Aug 26, 2012
 (c) Copyright 2012 Mark V Systems Limited, All rights reserved.
 """
 
+import argparse
 import ast
+import collections
+import concurrent.futures
+import contextlib
+import cProfile
+import functools
+import hashlib
+import heapq
+import importlib.util
 import io
+import itertools
+import json
 import os
+import re
+import sys
+import tempfile
+import threading
 import time
+from xml.sax import saxutils
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
 
 import arelle
 import pkutils
 
+try:
+    from utilities import (
+        build_common, messages_catalog_db, messages_catalog_shards
+    )
+    from utilities.package_discovery import (
+        DEFAULT_EXCLUDES, NON_LIBRARY_PLUGINS, PLUGINS_FILE,
+        distribution_import_names as _distribution_import_names,
+        find_modules_and_directories as _find_modules_and_directories,
+        requirement_name as _requirement_name
+    )
+except ImportError:  # run as a script from within the utilities directory
+    import build_common
+    import messages_catalog_db
+    import messages_catalog_shards
+    from package_discovery import (
+        DEFAULT_EXCLUDES, NON_LIBRARY_PLUGINS, PLUGINS_FILE,
+        distribution_import_names as _distribution_import_names,
+        find_modules_and_directories as _find_modules_and_directories,
+        requirement_name as _requirement_name
+    )
+
 
 
-PLUGINS_FILE = "../requirements_plugins.txt"
-NON_LIBRARY_PLUGINS = "../non_library_plugins"
+ENCODE_CACHE_SIZE = 8192
+MODULE_BATCH_SIZE = 16
+READ_AHEAD = 64
+STREAM_RUN_SIZE = 10000
+WATCH_INTERVAL = 0.25
+# seconds within which two saves of a module may get the same modification
+# time, the 2 seconds of FAT being the coarsest
+MTIME_GRANULARITY = 2.0
 DOC_DIRECTORY = os.sep.join([
     os.path.split(os.path.dirname(__file__))[0],
     "arelle", "doc"
@@ -70,6 +118,63 @@ are reported as "(dynamic)".)
 """
 
 
+# shards sit in a directory of the doc directory, next to the catalog schema
+SHARDS_DIRECTORY = "messagesCatalogShards"
+ARELLE_MESSAGES_SHARD_XML = ARELLE_MESSAGES_XML.replace(
+    '"messagesCatalog.xsd"', '"../messagesCatalog.xsd"'
+)
+ARELLE_MESSAGES_AGGREGATED_XSD_VERSION = "1"
+ARELLE_MESSAGES_AGGREGATED_XSD = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" elementFormDefault="unqualified"
+  xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" version="{0}">
+  <xs:element name="messages">
+    <xs:complexType>
+      <xs:sequence>
+        <xs:element maxOccurs="unbounded" name="message">
+          <xs:complexType>
+            <xs:simpleContent>
+              <xs:extension base="xs:string">
+                <xs:attribute name="code" use="required" type="xs:normalizedString"/>
+                <xs:attribute name="level" use="required" type="xs:token"/>
+                <xs:attribute name="args" type="xs:NMTOKENS"/>
+                <xs:attribute name="refs" use="required" type="xs:NMTOKENS"/>
+              </xs:extension>
+            </xs:simpleContent>
+          </xs:complexType>
+        </xs:element>
+      </xs:sequence>
+      <xs:attribute name="schemaVersion" use="required" type="xs:token" fixed="{0}"/>
+      <xs:attribute name="variablePrefix" type="xs:string"/>
+      <xs:attribute name="variableSuffix" type="xs:string"/>
+      <xs:attribute name="variablePrefixEscape" type="xs:string"/>
+    </xs:complexType>
+  </xs:element>
+</xs:schema>
+""".format(ARELLE_MESSAGES_AGGREGATED_XSD_VERSION)
+
+ARELLE_MESSAGES_AGGREGATED_XML = """<?xml version="1.0" encoding="utf-8"?>
+<messages
+    xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+    xsi:noNamespaceSchemaLocation="messagesCatalogAggregated.xsd"
+    schemaVersion="{0}"
+    variablePrefix="%("
+    variableSuffix=")s"
+    variablePrefixEscape="" >
+<!--
+This file contains Arelle messages text, aggregated: each distinct code,
+level (severity) and message replacement text appears once, with the args
+(available through log file) of all its call sites, and refs listing the
+module:line of each call site.
+
+(Messages with dynamically composed error codes or text content
+(such as ValidateXbrlDTS.py line 158 or lxml parser messages)
+are reported as "(dynamic)".)
+
+-->
+
+""".format(ARELLE_MESSAGES_AGGREGATED_XSD_VERSION)
+
+
 def _log_function(item):
     """
     Handler function for log message types.
@@ -79,22 +184,11 @@ def _log_function(item):
     :return: Returns the descriptor and arg offset of the item.
     :rtype: tuple (str, int)
     """
-    level_arg = item.args[0]
-    if isinstance(level_arg, ast.Str):
-        level = level_arg.s.lower()
+    argument = _classify_argument(item.args[0])
+    if argument.kind in (ARGUMENT_DYNAMIC, ARGUMENT_TRANSLATION):
+        level = "(dynamic)"
     else:
-        any_call_or_name_elements = any(
-            isinstance(element, (ast.Call, ast.Name))
-            for element in ast.walk(level_arg)
-        )
-        if any_call_or_name_elements:
-            level = "(dynamic)"
-        else:
-            level = ', '.join(
-                element.s.lower()
-                for element in ast.walk(level_arg)
-                if isinstance(element, ast.Str)
-            )
+        level = ', '.join(string.lower() for string in argument.strings)
     integer_arg_offset = 1
     return level, integer_arg_offset
 
@@ -108,11 +202,32 @@ FUNC_HANDLER = {
 }
 
 
+PREFILTER_OFF = "off"
+PREFILTER_ON = "on"
+PREFILTER_STRICT = "strict"
+# Messages are only built for calls of a handled attribute, so a module
+# without any ".info", ".error", ... (possibly split over continuation lines
+# and comments) cannot hold any and does not need to be parsed.
+_PREFILTER = re.compile(
+    rb"\.(?:\s|\\|#[^\n]*\n)*(?:" +
+    b"|".join(
+        re.escape(name.encode("ascii")) for name in sorted(FUNC_HANDLER)
+    ) +
+    rb")\b"
+)
+
+
 def entity_encode(arg):
     """ Be sure it's a string, vs int, etc, and encode &, <, ". """
     return str(arg).replace('&', '&amp;').replace('<', '&lt;').replace('"', '&quot;')
 
 
+@functools.lru_cache(maxsize=ENCODE_CACHE_SIZE)
+def _cached_entity_encode(text):
+    """ :func:`entity_encode`, escaping repeated messages only once. """
+    return entity_encode(text)
+
+
 def _is_callable(item):
     """
     Helper function to determine if the item from the ast.walk() function is
@@ -134,34 +249,42 @@ def _is_callable(item):
         return False
 
 
-def _find_modules_and_directories(top_level_directory):
-    """
-    Recursive helper function to find all python files included in top level
-    package. This will recurse down the directory paths of any package to find
-    all modules and subpackages in order to create an exhaustive list of all
-    python files within a given package.
+ARGUMENT_LITERAL = "literal"
+ARGUMENT_LITERALS = "literals"
+ARGUMENT_DYNAMIC = "dynamic"
+ARGUMENT_TRANSLATION = "translation"
 
-    :param top_level_directory: Path to the top level of a python package.
-    :type top_level_directory: str
-    :return: Returns a list of paths to all python files within that package.
-    :rtype: list [str]
-    """
-    modules = []
-    directories = []
+_Argument = collections.namedtuple("_Argument", ["kind", "strings"])
 
-    for item in os.listdir(top_level_directory):
-        if item.endswith(".py"):
-            modules.append(os.path.join(top_level_directory, item))
-        elif os.path.isdir(os.path.join(top_level_directory, item)):
-            directories.append(os.path.join(top_level_directory, item))
 
-    for directory in directories:
-        modules.extend(_find_modules_and_directories(directory))
-
-    return modules
+def _classify_argument(arg):
+    """
+    Classifies a log call argument in a single traversal of its subtree.
 
+    The argument is either a string literal, a translated string literal
+    (an `_()` call), dynamic (it contains a call or a name, so its value is
+    only known at run time) or a composition of literals, such as a tuple of
+    message codes, whose strings are listed in :func:`~ast.walk` order.
 
-def generate_locations():
+    :param arg: ast object of the argument being classified.
+    :type arg: :class:`~ast.AST`
+    :return: The kind of the argument and the strings it holds.
+    :rtype: :class:`_Argument`
+    """
+    if isinstance(arg, ast.Str):
+        return _Argument(ARGUMENT_LITERAL, (arg.s,))
+    if _is_translatable(arg) and hasattr(arg.args[0], "s"):
+        return _Argument(ARGUMENT_TRANSLATION, (arg.args[0].s,))
+    strings = []
+    for element in ast.walk(arg):
+        if isinstance(element, (ast.Call, ast.Name)):
+            return _Argument(ARGUMENT_DYNAMIC, ())
+        if isinstance(element, ast.Str):
+            strings.append(element.s)
+    return _Argument(ARGUMENT_LITERALS, tuple(strings))
+
+
+def generate_locations(includes=None, excludes=None):
     """
     Utility function to generate the file locations for Arelle's core, pip
     installed plugins, and non-installable plugins which have been copied to
@@ -169,11 +292,46 @@ def generate_locations():
     locations for the message generation to begin ast walks in order to find
     and generate messages for the catalog.
 
+    :param includes: Glob patterns of the modules to keep, see
+        :func:`~utilities.package_discovery.find_modules_and_directories`.
+    :type includes: list [str]
+    :param excludes: Glob patterns of the modules and directories to skip,
+        see :func:`~utilities.package_discovery.find_modules_and_directories`.
+    :type excludes: list [str]
     :return: Returns a list of strings representing module locations
     :rtype: list [str]
     """
-    arelle_modules = []
+    return list(iter_locations(includes, excludes))
+
+
+def iter_locations(includes=None, excludes=None):
+    """
+    Generator version of :func:`generate_locations`, which yields the modules
+    as they are discovered.
+
+    :param includes: Glob patterns of the modules to keep, see
+        :func:`~utilities.package_discovery.find_modules_and_directories`.
+    :type includes: list [str]
+    :param excludes: Glob patterns of the modules and directories to skip,
+        see :func:`~utilities.package_discovery.find_modules_and_directories`.
+    :type excludes: list [str]
+    :return: Yields strings representing module locations
+    :rtype: iterable [str]
+    """
+    for python_module in _iter_component_modules(
+        _component_locations(), includes, excludes
+    ):
+        yield python_module
+
+
+def _component_locations():
+    """
+    Helper function listing the top level directories of Arelle's core, the
+    non-installable plugins and the pip installed plugins.
 
+    :return: The directories to walk for modules.
+    :rtype: list [str]
+    """
     arelle_src_path = os.path.dirname(arelle.__file__)
     arelle_component_locations = [
         arelle_src_path,
@@ -181,11 +339,31 @@ def generate_locations():
     ]
 
     arelle_component_locations.extend(_find_plugin_locations())
+    return arelle_component_locations
 
-    for location in arelle_component_locations:
-        arelle_modules.extend(_find_modules_and_directories(location))
 
-    return arelle_modules
+def _iter_component_modules(locations, includes=None, excludes=None):
+    """
+    Generator function to walk the top level directories of
+    :func:`_component_locations` for modules.
+
+    :param locations: The top level directories.
+    :type locations: list [str]
+    :param includes: Glob patterns of the modules to keep, see
+        :func:`~utilities.package_discovery.find_modules_and_directories`.
+    :type includes: list [str]
+    :param excludes: Glob patterns of the modules and directories to skip,
+        see :func:`~utilities.package_discovery.find_modules_and_directories`.
+    :type excludes: list [str]
+    :return: Yields strings representing module locations
+    :rtype: iterable [str]
+    """
+    seen_paths = set()
+    for location in locations:
+        for python_module in _find_modules_and_directories(
+            location, includes, excludes, seen_paths
+        ):
+            yield python_module
 
 
 def _find_plugin_locations():
@@ -199,22 +377,42 @@ def _find_plugin_locations():
     :rtype: list [str]
     """
     plugin_locations = []
-    plugin_list = list(pkutils.parse_requirements(PLUGINS_FILE))
+    plugin_list = list(pkutils.parse_requirements(
+        os.path.join(os.path.dirname(__file__), PLUGINS_FILE)
+    ))
     for plugin_requirement in plugin_list:
-        # Checking for a pinned requirement in the file to remove the extra
-        # information to prevent issues with the __import__ statement.
-        pin_separation_index = plugin_requirement.find("=")
-        if pin_separation_index > 0:
-            plugin_name_only = plugin_requirement[:pin_separation_index]
-        else:
-            plugin_name_only = plugin_requirement
-        plugin = __import__(plugin_name_only, globals(), locals(), [], 0)
-        plugin_location = os.path.dirname(plugin.__file__)
-        del plugin
-        plugin_locations.append(plugin_location)
+        plugin_name_only = _requirement_name(plugin_requirement)
+        if plugin_name_only is None:
+            continue
+        plugin_locations.append(_find_plugin_location(plugin_name_only))
     return plugin_locations
 
 
+def _find_plugin_location(distribution_name):
+    """
+    Helper function to find the source directory of an installed plugin,
+    without importing it.  The plugin's import name is read from the
+    installed package metadata, and its directory from its import spec.
+
+    :param distribution_name: The name the plugin is installed under.
+    :type distribution_name: str
+    :return: The directory of the plugin package, or the directory holding
+        the plugin module for a single module plugin.
+    :rtype: str
+    """
+    for import_name in _distribution_import_names(distribution_name):
+        spec = importlib.util.find_spec(import_name)
+        if spec is None:
+            continue
+        if spec.submodule_search_locations:
+            return list(spec.submodule_search_locations)[0]
+        return os.path.dirname(spec.origin)
+    raise ImportError(
+        "No installed plugin named {}".format(distribution_name),
+        name=distribution_name
+    )
+
+
 def _build_id_messages(python_module):
     """
     Helper function to build the messages for a given python modules out of a
@@ -223,66 +421,527 @@ def _build_id_messages(python_module):
     :param python_module: Module location to be walked and introspected for
         messages to build.
     :type python_module: str
-    :return: A listing, in dictionary format, of all the messages of the
-        specified module which can then be used to generate the XML list.
-    :rtype: list [dict]
-    """
-    id_messages = []
-    ref_module_name = os.path.basename(python_module)
-    with open(python_module, encoding="utf-8") as module_file:
-        tree = ast.parse(module_file.read(), filename=python_module)
-        callables = filter(_is_callable, ast.walk(tree))
-        for item in callables:
-            # imported function could be by id instead of attr
-            try:
-                handler = FUNC_HANDLER.get(
-                    item.func.attr, lambda x: ("", 0)
-                )
-                level, args_offset = handler(item)
-            except AttributeError:
-                # func has no attribute 'attr'
-                continue
-            try:
-                msgCodeArg = item.args[0 + args_offset]  # str or tuple
-                msg_arg = item.args[1 + args_offset]
-            except IndexError:
-                # can't proceed when the args are not present.
-                continue
-            msg = _get_validation_message(msg_arg)
-            if not msg:
-                continue  # not sure what to report
-            msgCodes = _get_message_codes(msgCodeArg)
-            keywords = []
-            for keyword in item.keywords:
-                if keyword.arg == 'modelObject':
-                    pass
-                elif keyword.arg == 'messageCodes':
-                    msgCodeArg = keyword.value
-                    if ((any(isinstance(element, (ast.Call, ast.Name))
-                         for element in ast.walk(msgCodeArg)))):
-                        pass  # dynamic
-                    else:
-                        msgCodes = [
-                            element.s
-                            for element in ast.walk(msgCodeArg)
-                            if isinstance(element, ast.Str)
-                        ]
+    :return: A listing of all the messages of the specified module which can
+        then be used to generate the XML list.
+    :rtype: list [:class:`MessageRecord`]
+    """
+    with open(python_module, "rb") as module_file:
+        return _extract_id_messages(module_file.read(), python_module)
+
+
+def _extract_id_messages(source, python_module):
+    """
+    Helper function to build the messages out of the source of a given python
+    module.
+
+    :param source: Contents of the module, utf-8 encoded.
+    :type source: bytes
+    :param python_module: Module location the source was read from.
+    :type python_module: str
+    :return: A listing of all the messages of the specified module which can
+        then be used to generate the XML list.
+    :rtype: list [:class:`MessageRecord`]
+    """
+    visitor = _MessageVisitor(os.path.basename(python_module))
+    visitor.visit(ast.parse(source.decode("utf-8"), filename=python_module))
+    return visitor.id_messages
+
+
+class _MessageVisitor(ast.NodeVisitor):
+    """
+    Extraction engine which visits each node of a module's tree once and
+    builds the messages of every handled log call it comes across.
+    """
+
+    def __init__(self, ref_module_name):
+        self.ref_module_name = ref_module_name
+        self.id_messages = []
+
+    def visit_Call(self, node):
+        if _is_callable(node):
+            self._build_call_messages(node)
+        self.generic_visit(node)
+
+    def _build_call_messages(self, item):
+        """
+        Builds the messages of a handled log call.
+
+        :param item: The log call.
+        :type item: :class:`~ast.Call`
+        """
+        # imported function could be by id instead of attr
+        try:
+            handler = FUNC_HANDLER.get(
+                item.func.attr, lambda x: ("", 0)
+            )
+            level, args_offset = handler(item)
+        except AttributeError:
+            # func has no attribute 'attr'
+            return
+        try:
+            msgCodeArg = item.args[0 + args_offset]  # str or tuple
+            msg_arg = item.args[1 + args_offset]
+        except IndexError:
+            # can't proceed when the args are not present.
+            return
+        msg = _validation_message(_classify_argument(msg_arg))
+        if not msg:
+            return  # not sure what to report
+        msgCodes = _message_codes(_classify_argument(msgCodeArg))
+        keywords = []
+        for keyword in item.keywords:
+            if keyword.arg == 'modelObject':
+                pass
+            elif keyword.arg == 'messageCodes':
+                argument = _classify_argument(keyword.value)
+                if argument.kind in (ARGUMENT_DYNAMIC, ARGUMENT_TRANSLATION):
+                    pass  # dynamic
                 else:
-                    keywords.append(keyword.arg)
-            for msgCode in msgCodes:
-                id_messages.append(
-                    {
-                        'message_code': msgCode,
-                        'message': entity_encode(msg),
-                        'level': level,
-                        'keyword_arguments': entity_encode(
-                            " ".join(keywords)
-                        ),
-                        'reference_filename': ref_module_name,
-                        'line_number': item.lineno
-                    }
+                    msgCodes = list(argument.strings)
+            else:
+                keywords.append(keyword.arg)
+        keyword_arguments = " ".join(keywords)
+        for msgCode in msgCodes:
+            self.id_messages.append(MessageRecord(
+                msgCode, msg, level, keyword_arguments,
+                self.ref_module_name, item.lineno
+            ))
+
+
+class MessageRecord(object):
+    """
+    A message built out of a log call.  The message text and keyword
+    arguments are kept unescaped, they are escaped when rendered.
+
+    Records are slotted, and their module name, level, code and keyword
+    arguments interned, as there are tens of thousands of them sharing few
+    distinct values.
+    """
+
+    __slots__ = (
+        "message_code", "message", "level", "keyword_arguments",
+        "reference_filename", "line_number"
+    )
+
+    def __init__(self, message_code, message, level, keyword_arguments,
+                 reference_filename, line_number):
+        self.message_code = sys.intern(message_code)
+        self.message = message
+        self.level = sys.intern(level)
+        self.keyword_arguments = sys.intern(keyword_arguments)
+        self.reference_filename = sys.intern(reference_filename)
+        self.line_number = line_number
+
+    def astuple(self):
+        """
+        :return: The fields of the record, in constructor order.
+        :rtype: tuple
+        """
+        return (
+            self.message_code, self.message, self.level,
+            self.keyword_arguments, self.reference_filename, self.line_number
+        )
+
+    def __reduce__(self):
+        return MessageRecord, self.astuple()
+
+    def __eq__(self, other):
+        if not isinstance(other, MessageRecord):
+            return NotImplemented
+        return self.astuple() == other.astuple()
+
+    def __hash__(self):
+        return hash(self.astuple())
+
+    def __repr__(self):
+        return "MessageRecord{!r}".format(self.astuple())
+
+
+class _MessageCache(object):
+    """
+    Persistent cache of the messages built for each module, keyed by the
+    module path and the hash of its contents, so that a rebuild only has to
+    parse the modules which changed since the previous build.
+
+    The cache is tied to the contents of this generator, any change to the
+    extraction code discards all of the cached messages.
+    """
+
+    def __init__(self, cache_file_name):
+        self.cache_file_name = cache_file_name
+        self.generator_digest = build_common.file_digest(__file__, "sha1")
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.removed = 0
+        # modules may be looked up from several reader threads
+        self.lock = threading.Lock()
+        try:
+            with io.open(cache_file_name, 'rt',
+                         encoding='utf-8') as cache_file:
+                cache = json.load(cache_file)
+        except (OSError, ValueError):
+            cache = {}
+        if cache.get("generator") == self.generator_digest:
+            self.previous_entries = cache.get("modules", {})
+        else:
+            self.previous_entries = {}
+
+    def lookup(self, python_module):
+        """
+        Looks up the cached messages of a module.  The module is only read
+        when its size or modification time changed since it was cached.
+
+        :param python_module: Module location to look up.
+        :type python_module: str
+        :return: The cached messages, or None when the module has to be
+            parsed, and the module source when it had to be read.
+        :rtype: tuple (list [MessageRecord], bytes)
+        """
+        stat = os.stat(python_module)
+        entry = self.previous_entries.get(python_module)
+        if (entry is not None and entry["size"] == stat.st_size and
+                entry["mtime_ns"] == stat.st_mtime_ns):
+            # the previous entry is kept as loaded, a module may be looked
+            # up again after a failed parse of its batch
+            entry = dict(entry, id_messages=[
+                MessageRecord(*fields) for fields in entry["id_messages"]
+            ])
+            with self.lock:
+                self.entries[python_module] = entry
+                self.hits += 1
+            return entry["id_messages"], None
+        with open(python_module, "rb") as module_file:
+            source = module_file.read()
+        digest = hashlib.sha1(source).hexdigest()
+        id_messages = None
+        if entry is not None and entry["sha1"] == digest:
+            # touched, but not changed
+            id_messages = [
+                MessageRecord(*fields) for fields in entry["id_messages"]
+            ]
+        with self.lock:
+            self.entries[python_module] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha1": digest,
+                "id_messages": id_messages
+            }
+            if id_messages is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return id_messages, source
+
+    def store(self, python_module, id_messages):
+        """
+        Records the messages built for a module which missed the cache.
+
+        :param python_module: Module location the messages were built from.
+        :type python_module: str
+        :param id_messages: The messages built for the module.
+        :type id_messages: list [MessageRecord]
+        """
+        self.entries[python_module]["id_messages"] = id_messages
+
+    def forget(self, python_module):
+        """
+        Drops a module from the cache written by :meth:`save`, as when the
+        module was removed, or changed without its size or modification time
+        telling.
+
+        :param python_module: Module location to drop.
+        :type python_module: str
+        """
+        with self.lock:
+            self.entries.pop(python_module, None)
+
+    def save(self):
+        """
+        Writes the cache to disk, dropping the modules which were not looked
+        up during this build as they have been removed, and the modules whose
+        messages were not built as they failed to parse.
+        """
+        self.removed = len(
+            set(self.previous_entries).difference(self.entries)
+        )
+        directory = os.path.dirname(self.cache_file_name)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_file_name = self.cache_file_name + ".tmp"
+        modules = {
+            python_module: dict(entry, id_messages=[
+                id_message.astuple() for id_message in entry["id_messages"]
+            ])
+            for python_module, entry in self.entries.items()
+            if entry["id_messages"] is not None
+        }
+        with io.open(temp_file_name, 'wt', encoding='utf-8') as cache_file:
+            json.dump(
+                {"generator": self.generator_digest, "modules": modules},
+                cache_file
+            )
+        os.replace(temp_file_name, self.cache_file_name)
+
+
+def _iter_module_sources(python_modules, cache=None, readers=0,
+                         read_ahead=READ_AHEAD, prefilter=PREFILTER_OFF):
+    """
+    Generator function to pair each module with its source, or with its
+    cached messages when the module has not changed.
+
+    Modules are read in sequence by default.  With readers, a pool of threads
+    reads the following modules while the caller parses the current one, so
+    that slow disks do not leave the parsing idle.
+
+    :param python_modules: Module locations to read.
+    :type python_modules: iterable
+    :param cache: Cache of previously built messages, if any.
+    :type cache: :class:`_MessageCache`
+    :param readers: Number of reader threads, 0 reads the modules in the
+        current thread as they are consumed.
+    :type readers: int
+    :param read_ahead: Maximum number of modules read ahead of the one being
+        consumed when using reader threads.
+    :type read_ahead: int
+    :param prefilter: Whether modules without any handled call are paired
+        with no messages instead of their source, see
+        :func:`_read_module_source`.
+    :type prefilter: str
+    :return: Yields the module location, its source (None when cached or
+        filtered out) and its messages (None when it has to be parsed), in
+        the same order as the modules were given.
+    :rtype: iterable [tuple (str, bytes, list [MessageRecord])]
+    """
+    read_module_source = functools.partial(
+        _read_module_source, cache=cache, prefilter=prefilter
+    )
+    if readers <= 0:
+        for python_module in python_modules:
+            yield read_module_source(python_module)
+        return
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=readers, thread_name_prefix="catalog-reader"
+    ) as executor:
+        reads = collections.deque()
+        for python_module in python_modules:
+            reads.append(executor.submit(read_module_source, python_module))
+            if len(reads) >= read_ahead:
+                yield reads.popleft().result()
+        while reads:
+            yield reads.popleft().result()
+
+
+def _read_module_source(python_module, cache=None, prefilter=PREFILTER_OFF):
+    """
+    Helper function to read a module, or look its messages up in the cache.
+
+    :param python_module: Module location to read.
+    :type python_module: str
+    :param cache: Cache of previously built messages, if any.
+    :type cache: :class:`_MessageCache`
+    :param prefilter: :data:`PREFILTER_ON` skips the parsing of modules which
+        cannot hold any message, :data:`PREFILTER_STRICT` parses them anyway
+        and raises a :class:`RuntimeError` if they did hold messages, cached
+        modules without messages included.
+    :type prefilter: str
+    :return: The module location, its source (None when cached or filtered
+        out) and its messages (None when it has to be parsed).
+    :rtype: tuple (str, bytes, list [MessageRecord])
+    """
+    if cache is not None:
+        id_messages, source = cache.lookup(python_module)
+        if id_messages is not None:
+            if id_messages or prefilter != PREFILTER_STRICT:
+                return python_module, None, id_messages
+            # the prefilter may have skipped the module when it was cached
+            if source is None:
+                with open(python_module, "rb") as module_file:
+                    source = module_file.read()
+    else:
+        with open(python_module, "rb") as module_file:
+            source = module_file.read()
+    if prefilter != PREFILTER_OFF and not _PREFILTER.search(source):
+        if prefilter == PREFILTER_STRICT:
+            dropped = _extract_id_messages(source, python_module)
+            if dropped:
+                raise RuntimeError(
+                    "The prefilter skipped {0} messages of {1}, such as "
+                    "{2!r}".format(len(dropped), python_module, dropped[0])
                 )
-    return id_messages
+        if cache is not None:
+            cache.store(python_module, [])
+        return python_module, None, []
+    return python_module, source, None
+
+
+def _iter_id_messages(python_modules, jobs=1, cache=None, stats=None,
+                      readers=0, read_ahead=READ_AHEAD,
+                      prefilter=PREFILTER_OFF):
+    """
+    Generator function to build the messages for each of the given python
+    modules, optionally spreading the parsing and extraction across a pool of
+    worker processes and reusing the messages of unchanged modules.
+
+    :param python_modules: Module locations to be walked and introspected for
+        messages to build.
+    :type python_modules: iterable
+    :param jobs: Number of worker processes to use, 1 builds the messages in
+        the current process.
+    :type jobs: int
+    :param cache: Cache of previously built messages, if any.  Messages built
+        for changed modules are stored into it.
+    :type cache: :class:`_MessageCache`
+    :param stats: Statistics to record the parse time and messages of each
+        module into, if any.
+    :type stats: :class:`_CatalogStats`
+    :param readers: Number of threads reading the modules ahead of their
+        parsing, see :func:`_iter_module_sources`.
+    :type readers: int
+    :param read_ahead: Maximum number of modules read ahead.
+    :type read_ahead: int
+    :param prefilter: Whether to skip the parsing of modules without any
+        handled call, see :func:`_read_module_source`.
+    :type prefilter: str
+    :return: Yields the message listing of each module, in the same order as
+        the modules were given.
+    :rtype: iterable [list [MessageRecord]]
+    """
+    module_sources = _iter_module_sources(
+        python_modules, cache, readers, read_ahead, prefilter
+    )
+    if jobs <= 1:
+        for python_module, source, id_messages in module_sources:
+            parse_seconds = None
+            if id_messages is None:
+                id_messages, parse_seconds = _timed_extract_id_messages(
+                    source, python_module
+                )
+                if cache is not None:
+                    cache.store(python_module, id_messages)
+            if stats is not None:
+                stats.add_module(python_module, id_messages, parse_seconds)
+            yield id_messages
+        return
+    # Hand out modules in batches so a worker is not round tripped for every
+    # one of the many small modules, and only keep a few batches in flight so
+    # the modules are consumed lazily and their sources are not all held.
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        batches = collections.deque()
+        for batch in _iter_batches(module_sources, MODULE_BATCH_SIZE):
+            parsed_modules = [
+                (source, python_module)
+                for python_module, source, id_messages in batch
+                if id_messages is None
+            ]
+            batches.append((
+                batch,
+                executor.submit(_extract_id_messages_batch, parsed_modules)
+            ))
+            if len(batches) > jobs * 2:
+                for id_messages in _resolve_batch(
+                    *batches.popleft(), cache=cache, stats=stats
+                ):
+                    yield id_messages
+        while batches:
+            for id_messages in _resolve_batch(
+                *batches.popleft(), cache=cache, stats=stats
+            ):
+                yield id_messages
+
+
+def _tee(iterable, consumer):
+    """
+    Generator function handing each item of an iterable to a consumer as it
+    is passed on.
+
+    :param iterable: Items to pass on.
+    :type iterable: iterable
+    :param consumer: Function called with each item.
+    :type consumer: callable
+    :return: Yields the items.
+    :rtype: iterable
+    """
+    for item in iterable:
+        consumer(item)
+        yield item
+
+
+def _iter_batches(iterable, batch_size):
+    """
+    Generator function to group the items of an iterable into lists.
+
+    :param iterable: Items to group.
+    :type iterable: iterable
+    :param batch_size: Number of items in each list but the last.
+    :type batch_size: int
+    :return: Yields lists of consecutive items.
+    :rtype: iterable [list]
+    """
+    iterator = iter(iterable)
+    batch = list(itertools.islice(iterator, batch_size))
+    while batch:
+        yield batch
+        batch = list(itertools.islice(iterator, batch_size))
+
+
+def _extract_id_messages_batch(parsed_modules):
+    """
+    Worker function to build the messages of a batch of modules.
+
+    :param parsed_modules: The source and location of each module.
+    :type parsed_modules: list [tuple (bytes, str)]
+    :return: The message listing of each module, with the seconds it took.
+    :rtype: list [tuple (list [MessageRecord], float)]
+    """
+    return [
+        _timed_extract_id_messages(source, python_module)
+        for source, python_module in parsed_modules
+    ]
+
+
+def _timed_extract_id_messages(source, python_module):
+    """
+    Helper function to time :func:`_extract_id_messages`.
+
+    :return: The message listing of the module, with the seconds it took.
+    :rtype: tuple (list [MessageRecord], float)
+    """
+    started_at = time.perf_counter()
+    id_messages = _extract_id_messages(source, python_module)
+    return id_messages, time.perf_counter() - started_at
+
+
+def _resolve_batch(batch, future, cache=None, stats=None):
+    """
+    Helper function to merge the messages built by a worker for a batch of
+    modules with the cached messages of the batch, in module order.
+
+    :param batch: The modules of the batch, as yielded by
+        :func:`_iter_module_sources`.
+    :type batch: list [tuple (str, bytes, list [MessageRecord])]
+    :param future: Future of :func:`_extract_id_messages_batch` for the
+        modules of the batch which were not cached.
+    :type future: :class:`~concurrent.futures.Future`
+    :param cache: Cache of previously built messages, if any.
+    :type cache: :class:`_MessageCache`
+    :param stats: Statistics to record the modules into, if any.
+    :type stats: :class:`_CatalogStats`
+    :return: The message listing of each module of the batch.
+    :rtype: list [list [MessageRecord]]
+    """
+    parsed_id_messages = iter(future.result())
+    batch_id_messages = []
+    for python_module, source, id_messages in batch:
+        parse_seconds = None
+        if id_messages is None:
+            id_messages, parse_seconds = next(parsed_id_messages)
+            if cache is not None:
+                cache.store(python_module, id_messages)
+        if stats is not None:
+            stats.add_module(python_module, id_messages, parse_seconds)
+        batch_id_messages.append(id_messages)
+    return batch_id_messages
 
 
 def _get_message_codes(msg_code_arg):
@@ -294,19 +953,21 @@ def _get_message_codes(msg_code_arg):
     :return: the correct message code to use
     :rtype: tuple
     """
-    msg_codes = None
-    if isinstance(msg_code_arg, ast.Str):
-        msg_codes = (msg_code_arg.s,)
-    else:
-        if any(isinstance(element, (ast.Call, ast.Name))
-               for element in ast.walk(msg_code_arg)):
-            msg_codes = ('(dynamic)',)
-        else:
-            msg_codes = tuple([
-                element.s for element in ast.walk(msg_code_arg)
-                if isinstance(element, ast.Str)
-            ])
-    return msg_codes
+    return _message_codes(_classify_argument(msg_code_arg))
+
+
+def _message_codes(argument):
+    """
+    Get the message codes of a classified message code argument.
+
+    :param argument: the classified message code argument
+    :type argument: :class:`_Argument`
+    :return: the message codes to use
+    :rtype: tuple
+    """
+    if argument.kind in (ARGUMENT_DYNAMIC, ARGUMENT_TRANSLATION):
+        return ('(dynamic)',)
+    return argument.strings
 
 
 def _get_validation_message(msg_arg):
@@ -320,12 +981,22 @@ def _get_validation_message(msg_arg):
          (dynamic), or None
     :rtype: str
     """
-    if isinstance(msg_arg, ast.Str):
-        return msg_arg.s
-    elif _is_translatable(msg_arg):
-        return msg_arg.args[0].s
-    elif ((any(isinstance(element, (ast.Call, ast.Name))
-           for element in ast.walk(msg_arg)))):
+    return _validation_message(_classify_argument(msg_arg))
+
+
+def _validation_message(argument):
+    """
+    Helper function to get the validation message of a classified message
+    argument.
+
+    :param argument: the classified message argument
+    :type argument: :class:`_Argument`
+    :return: the string value of the argument, (dynamic), or None
+    :rtype: str
+    """
+    if argument.kind in (ARGUMENT_LITERAL, ARGUMENT_TRANSLATION):
+        return argument.strings[0]
+    elif argument.kind == ARGUMENT_DYNAMIC:
         return "(dynamic)"
     return None
 
@@ -341,8 +1012,8 @@ def _is_translatable(msg_arg):
     :return: True if msg_arg is an `ast.Call`, named '_'.  False otherwise.
     :rtype: bool
     """
-    return (isinstance(msg_arg, ast.Call) and 
-        getattr(msg_arg.func, "id", '') == '_')
+    return (isinstance(msg_arg, ast.Call) and
+        getattr(getattr(msg_arg, "func", None), "id", '') == '_')
 
 
 def _build_message_elements(id_messages):
@@ -350,50 +1021,429 @@ def _build_message_elements(id_messages):
     Helper function to build the messages into a list XML elements in the form
     of string literals.
 
-    :param id_messages: The list of message dictionaries to go through to
+    :param id_messages: The list of messages to go through to
         assemble the XML from.
     :type id_messages: iterable
     :return: Returns the list of string'ified XML entries to be written to
         the messagesCatalog.xml file.
     :rtype: list [str]
     """
-    lines = []
+    return list(_iter_message_elements(id_messages))
+
+
+def _aggregate_id_messages(aggregates, id_messages):
+    """
+    Helper function to aggregate the messages sharing the same code, level
+    and text, for the aggregated catalog.
+
+    :param aggregates: The aggregates to add the messages to, keyed by code,
+        level and text, holding the keyword arguments of the messages and
+        their module:line references.
+    :type aggregates: dict {tuple (str, str, str): tuple (dict, list [str])}
+    :param id_messages: Messages to add.
+    :type id_messages: iterable [:class:`MessageRecord`]
+    """
+    for id_message in id_messages:
+        key = (id_message.message_code, id_message.level, id_message.message)
+        aggregate = aggregates.get(key)
+        if aggregate is None:
+            aggregate = aggregates[key] = (collections.OrderedDict(), [])
+        keyword_arguments, references = aggregate
+        for keyword_argument in id_message.keyword_arguments.split():
+            keyword_arguments[keyword_argument] = None
+        references.append((
+            id_message.reference_filename, id_message.line_number
+        ))
+
+
+def _iter_aggregated_elements(aggregates):
+    """
+    Generator function rendering the aggregated messages as XML entries of
+    the messagesCatalogAggregated.xml file.
+
+    :param aggregates: The aggregates built by
+        :func:`_aggregate_id_messages`.
+    :type aggregates: dict
+    :return: Yields the string'ified XML entries.
+    :rtype: iterable [str]
+    """
+    for (code, level, message), (keyword_arguments, references) in \
+            aggregates.items():
+        yield (
+            '<message code="{0}"\n'
+            '         level="{1}"\n'
+            '         args="{2}"\n'
+            '         refs="{3}">\n'
+            '{4}\n'
+            '</message>'
+            .format(
+                code,
+                level,
+                _cached_entity_encode(" ".join(keyword_arguments)),
+                entity_encode(" ".join(
+                    "{0}:{1}".format(module, line)
+                    for module, line in sorted(set(references))
+                )),
+                _cached_entity_encode(message)
+            )
+        )
+
+
+def _iter_message_elements(id_messages):
+    """
+    Generator version of :func:`_build_message_elements`, which renders each
+    message as it arrives.
+
+    :param id_messages: The messages to assemble the XML from.
+    :type id_messages: iterable [:class:`MessageRecord`]
+    :return: Yields the string'ified XML entries to be written to the
+        messagesCatalog.xml file.
+    :rtype: iterable [str]
+    """
     for id_message in id_messages:
         try:
-            lines.append(
-                '<message code="{message_code}"\n'
-                '         level="{level}"\n'
-                '         module="{reference_filename}" line="{line_number}"\n'
-                '         args="{keyword_arguments}">\n'
-                '{message}\n'
+            yield (
+                '<message code="{0}"\n'
+                '         level="{1}"\n'
+                '         module="{2}" line="{3}"\n'
+                '         args="{4}">\n'
+                '{5}\n'
                 '</message>'
-                .format(**id_message)
+                .format(
+                    id_message.message_code,
+                    id_message.level,
+                    id_message.reference_filename,
+                    id_message.line_number,
+                    _cached_entity_encode(id_message.keyword_arguments),
+                    _cached_entity_encode(id_message.message)
+                )
             )
         except Exception as ex:
             print(ex)
-    return lines
 
 
-def _write_message_files(lines):
+def _sorted_lines(lines, run_size=None):
+    """
+    Generator function to sort the XML entries.  With a run size, at most
+    that many entries are held in memory: sorted runs are spilled to
+    temporary files and merged back, keeping memory flat however many
+    entries there are.
+
+    :param lines: XML entries to sort.
+    :type lines: iterable [str]
+    :param run_size: Maximum number of entries to sort in memory, None sorts
+        every entry in memory.
+    :type run_size: int
+    :return: Yields the XML entries in sorted order.
+    :rtype: iterable [str]
+    """
+    if run_size is None:
+        for line in sorted(lines):
+            yield line
+        return
+    with tempfile.TemporaryDirectory() as run_directory:
+        run_file_names = []
+        for run in _iter_batches(lines, run_size):
+            run.sort()
+            if not run_file_names and len(run) < run_size:
+                # everything fit in a single run, no need to spill it
+                for line in run:
+                    yield line
+                return
+            run_file_name = os.path.join(
+                run_directory, "run{}.txt".format(len(run_file_names))
+            )
+            with io.open(run_file_name, 'wt', encoding='utf-8',
+                         newline='\n') as run_file:
+                for line in run:
+                    # entries span lines, store one escaped entry per line
+                    run_file.write(json.dumps(line, ensure_ascii=False))
+                    run_file.write("\n")
+            run_file_names.append(run_file_name)
+            del run
+        run_files = [
+            io.open(run_file_name, 'rt', encoding='utf-8', newline='\n')
+            for run_file_name in run_file_names
+        ]
+        try:
+            for line in heapq.merge(*(
+                map(json.loads, run_file) for run_file in run_files
+            )):
+                yield line
+        finally:
+            for run_file in run_files:
+                run_file.close()
+
+
+def _write_message_files(lines, run_size=None):
     """
     Helper function to write the messagesCatalog.xml and messagesCatalog.xsd
     as part of the build process.
 
     :param lines: XML entries to be written into the xml file.
-    :type lines: list [str]
-    :return: No direct return, but writes two files to disk.
-    :rtype: None
+    :type lines: iterable [str]
+    :param run_size: Maximum number of entries to sort in memory, see
+        :func:`_sorted_lines`.
+    :type run_size: int
+    :return: The number of XML entries written, and whether the catalog
+        changed.  Files whose content did not change are left untouched, so
+        that their modification times do not trigger later build steps.
+    :rtype: tuple (int, bool)
     """
-    os.makedirs(os.path.join(DOC_DIRECTORY), exist_ok=True)
-    messages_file_name = os.path.join(DOC_DIRECTORY, "messagesCatalog.xml")
-    with io.open(messages_file_name, 'wt', encoding='utf-8') as message_file:
-        message_file.write(ARELLE_MESSAGES_XML)
-        message_file.write("\n\n".join(sorted(lines)))
+    return _write_catalog_files(
+        "messagesCatalog", ARELLE_MESSAGES_XML, ARELLE_MESSAGES_XSD, lines,
+        run_size
+    )
+
+
+def _write_aggregated_message_files(lines):
+    """
+    Helper function to write the messagesCatalogAggregated.xml and
+    messagesCatalogAggregated.xsd.
+
+    :param lines: XML entries to be written into the xml file, see
+        :func:`_iter_aggregated_elements`.
+    :type lines: iterable [str]
+    :return: The number of XML entries written, and whether the catalog
+        changed.
+    :rtype: tuple (int, bool)
+    """
+    return _write_catalog_files(
+        "messagesCatalogAggregated", ARELLE_MESSAGES_AGGREGATED_XML,
+        ARELLE_MESSAGES_AGGREGATED_XSD, lines
+    )
+
+
+def _shard_names(locations):
+    """
+    Helper function to name the shard of each top level directory of
+    :func:`_component_locations` after the directory, such as arelle,
+    non_library_plugins or the package of a plugin.
+
+    :param locations: The top level directories.
+    :type locations: list [str]
+    :return: The shard names, in the same order as the directories.
+    :rtype: list [str]
+    """
+    names = []
+    for location in locations:
+        name = os.path.basename(os.path.normpath(location))
+        unique_name = name
+        suffix = 1
+        while unique_name in names:
+            suffix += 1
+            unique_name = "{0}-{1}".format(name, suffix)
+        names.append(unique_name)
+    return names
+
+
+def _write_shard_files(locations, module_id_messages):
+    """
+    Helper function to write one catalog per top level directory into the
+    shards directory, along with the index of the shards.  Shards of
+    directories without messages are not written, and shards left from
+    earlier builds are removed.
+
+    :param locations: The top level directories the modules were found in.
+    :type locations: list [str]
+    :param module_id_messages: Each module location with its messages.
+    :type module_id_messages: iterable [tuple (str, list [MessageRecord])]
+    :return: The number of messages of each shard written.
+    :rtype: dict {str: int}
+    """
+    names = _shard_names(locations)
+    # the longest top level directory holding a module is its shard's
+    prefixes = sorted(
+        (
+            (os.path.join(location, ""), name)
+            for location, name in zip(locations, names)
+        ),
+        key=lambda prefix: len(prefix[0]), reverse=True
+    )
+    shards = collections.OrderedDict((name, []) for name in names)
+    for python_module, id_messages in module_id_messages:
+        for prefix, name in prefixes:
+            if python_module.startswith(prefix):
+                shards[name].extend(id_messages)
+                break
+    shards = collections.OrderedDict(
+        (name, id_messages) for name, id_messages in shards.items()
+        if id_messages
+    )
+    for name, id_messages in shards.items():
+        _write_catalog_files(
+            os.path.join(SHARDS_DIRECTORY, name), ARELLE_MESSAGES_SHARD_XML,
+            None, _build_message_elements(id_messages)
+        )
+    shards_directory = os.path.join(DOC_DIRECTORY, SHARDS_DIRECTORY)
+    messages_catalog_shards.write_shard_index(shards_directory, shards)
+    for file_name in os.listdir(shards_directory):
+        if file_name.endswith(".xml") and file_name[:-4] not in shards:
+            os.remove(os.path.join(shards_directory, file_name))
+    return collections.OrderedDict(
+        (name, len(id_messages)) for name, id_messages in shards.items()
+    )
+
+
+def _write_catalog_files(catalog_name, header, schema, lines, run_size=None):
+    """
+    Helper function to write a catalog and its schema into the doc directory.
+    Files whose content did not change are left untouched, so that their
+    modification times do not trigger later build steps.
+
+    :param catalog_name: Name of the catalog files, without extension.
+    :type catalog_name: str
+    :param header: Start of the catalog, up to its first entry.
+    :type header: str
+    :param schema: Content of the catalog schema, None for a catalog
+        sharing the schema of another catalog.
+    :type schema: str
+    :param lines: XML entries to be written into the xml file.
+    :type lines: iterable [str]
+    :param run_size: Maximum number of entries to sort in memory, see
+        :func:`_sorted_lines`.
+    :type run_size: int
+    :return: The number of XML entries written, and whether the catalog
+        changed.
+    :rtype: tuple (int, bool)
+    """
+    messages_file_name = os.path.join(DOC_DIRECTORY, catalog_name + ".xml")
+    os.makedirs(os.path.dirname(messages_file_name), exist_ok=True)
+    temp_file_name = messages_file_name + ".tmp"
+    line_count = 0
+    with io.open(temp_file_name, 'wt', encoding='utf-8') as message_file:
+        message_file.write(header)
+        for line in _sorted_lines(lines, run_size):
+            if line_count:
+                message_file.write("\n\n")
+            message_file.write(line)
+            line_count += 1
         message_file.write("\n\n</messages>")
+    changed = _replace_if_changed(temp_file_name, messages_file_name)
+    if schema is None:
+        return line_count, changed
+
+    xsd_file_name = os.path.join(DOC_DIRECTORY, catalog_name + ".xsd")
+    with io.open(xsd_file_name + ".tmp", 'wt',
+                 encoding='utf-8') as message_schema:
+        message_schema.write(schema)
+    _replace_if_changed(xsd_file_name + ".tmp", xsd_file_name)
+    return line_count, changed
+
+
+def _replace_if_changed(new_file_name, file_name):
+    """
+    Helper function to move a newly written file over a file, unless both
+    have the same content digest, in which case the new file is dropped.
+
+    :param new_file_name: Path of the newly written file.
+    :type new_file_name: str
+    :param file_name: Path of the file to replace.
+    :type file_name: str
+    :return: True if the file was replaced or created.
+    :rtype: bool
+    """
+    if (os.path.isfile(file_name) and
+            os.path.getsize(file_name) == os.path.getsize(new_file_name) and
+            build_common.file_digest(file_name) ==
+            build_common.file_digest(new_file_name)):
+        os.remove(new_file_name)
+        return False
+    os.replace(new_file_name, file_name)
+    return True
+
+
+def _iter_catalog_entries(messages_file_name):
+    """
+    Generator function to scan the entries of a messagesCatalog.xml file
+    line by line, relying on the layout written by
+    :func:`_iter_message_elements` rather than parsing the XML.
+
+    :param messages_file_name: Path of the catalog.
+    :type messages_file_name: str
+    :return: Yields the code, level, module, line, args and text of each
+        message.
+    :rtype: iterable [tuple (str, str, str, str, str, str)]
+    """
+    with io.open(messages_file_name, 'rt', encoding='utf-8') as message_file:
+        for line in message_file:
+            if not line.startswith('<message code="'):
+                continue
+            code = line[15:line.rindex('"')]
+            level = _attribute_value(next(message_file), "level")
+            location = next(message_file)
+            module = _attribute_value(location, "module")
+            line_number = _attribute_value(location, "line")
+            args = _attribute_value(next(message_file), "args")
+            text = []
+            for text_line in message_file:
+                if text_line.startswith("</message>"):
+                    break
+                text.append(text_line)
+            yield (
+                code, level, module, line_number,
+                saxutils.unescape(args, _QUOTE_ENTITY),
+                saxutils.unescape("".join(text)[:-1], _QUOTE_ENTITY)
+            )
+
+
+_QUOTE_ENTITY = {"&quot;": '"'}
 
-    xsd_file_name = os.path.join(DOC_DIRECTORY, "messagesCatalog.xsd")
-    with io.open(xsd_file_name, 'wt', encoding='utf-8') as message_schema:
-        message_schema.write(ARELLE_MESSAGES_XSD)
+
+def _attribute_value(line, name):
+    """
+    Helper function to get an attribute value out of a catalog line.
+
+    :param line: The line holding the attribute.
+    :type line: str
+    :param name: Name of the attribute.
+    :type name: str
+    :return: The value of the attribute.
+    :rtype: str
+    """
+    start = line.index(' {}="'.format(name)) + len(name) + 3
+    return line[start:line.index('"', start)]
+
+
+def _index_catalog(messages_file_name):
+    """
+    Helper function to index the messages of a catalog by code.
+
+    :param messages_file_name: Path of the catalog, which may not exist.
+    :type messages_file_name: str
+    :return: The distinct level, args and text of the messages of each code.
+        Modules and lines are left out, as they move with unrelated edits.
+    :rtype: dict {str: set [tuple (str, str, str)]}
+    """
+    index = collections.defaultdict(set)
+    if os.path.isfile(messages_file_name):
+        for code, level, _, _, args, text in _iter_catalog_entries(
+            messages_file_name
+        ):
+            index[code].add((level, args, text))
+    return index
+
+
+def diff_catalogs(previous_index, index):
+    """
+    Compares the messages of two catalogs.
+
+    :param previous_index: Index of the previous catalog, see
+        :func:`_index_catalog`.
+    :type previous_index: dict
+    :param index: Index of the new catalog.
+    :type index: dict
+    :return: The sorted "added", "removed" and "changed" message codes.
+    :rtype: dict {str: list [str]}
+    """
+    return {
+        "added": sorted(set(index).difference(previous_index)),
+        "removed": sorted(set(previous_index).difference(index)),
+        "changed": sorted(
+            code for code in set(index).intersection(previous_index)
+            if index[code] != previous_index[code]
+        ),
+    }
 
 
 def _arelle_location_list():
@@ -414,25 +1464,685 @@ def _arelle_location_list():
         yield location
 
 
-if __name__ == "__main__":
-    startedAt = time.time()
-    id_messages = []
-    arelle_files = generate_locations()
+class _CatalogStats(object):
+    """
+    Instrumentation of a catalog generation: the time spent in each phase,
+    the parse time and messages of each module, the dynamic messages and the
+    peak memory use, reported as JSON with :meth:`report`.
+
+    Phases may be nested, as they are when the catalog is streamed, in which
+    case the time of a phase excludes the time of the phases it pulled from.
+    """
 
-    for module in arelle_files:
-        id_messages.extend(_build_id_messages(module))
+    def __init__(self):
+        self.phase_seconds = collections.OrderedDict()
+        self.modules = collections.OrderedDict()
+        self.dynamic = collections.Counter()
+        self._child_seconds = []
+        self._started_at = time.perf_counter()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Context manager timing a phase of the generation.
+
+        :param name: Name of the phase.
+        :type name: str
+        """
+        self._child_seconds.append(0.0)
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started_at
+            child_seconds = self._child_seconds.pop()
+            self.phase_seconds[name] = (
+                self.phase_seconds.get(name, 0.0) + elapsed - child_seconds
+            )
+            if self._child_seconds:
+                self._child_seconds[-1] += elapsed
+
+    def timed(self, name, iterable):
+        """
+        Generator function timing the production of each item of an
+        iterable as a phase.
+
+        :param name: Name of the phase.
+        :type name: str
+        :param iterable: The lazily produced items.
+        :type iterable: iterable
+        :return: Yields the items.
+        :rtype: iterable
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def add_module(self, python_module, id_messages, parse_seconds=None):
+        """
+        Records the messages of a module.
+
+        :param python_module: Module location.
+        :type python_module: str
+        :param id_messages: Messages built for the module.
+        :type id_messages: list [:class:`MessageRecord`]
+        :param parse_seconds: Seconds it took to parse the module and build
+            its messages, None when they came from the cache.
+        :type parse_seconds: float
+        """
+        self.modules[python_module] = (parse_seconds, len(id_messages))
+        for id_message in id_messages:
+            for field, kind in (("message_code", "codes"),
+                                ("message", "messages"),
+                                ("level", "levels")):
+                if getattr(id_message, field) == "(dynamic)":
+                    self.dynamic[kind] += 1
+
+    def report(self, slowest=20):
+        """
+        Builds the JSON report of the generation.
+
+        :param slowest: Number of slowest modules to parse to list.
+        :type slowest: int
+        :return: The report.
+        :rtype: dict
+        """
+        parsed_modules = [
+            (parse_seconds, python_module, message_count)
+            for python_module, (parse_seconds, message_count)
+            in self.modules.items()
+            if parse_seconds is not None
+        ]
+        parsed_modules.sort(reverse=True)
+        return {
+            "total_secs": time.perf_counter() - self._started_at,
+            "phase_secs": self.phase_seconds,
+            "modules": len(self.modules),
+            "parsed_modules": len(parsed_modules),
+            "parse_secs": sum(
+                parse_seconds for parse_seconds, _, _ in parsed_modules
+            ),
+            "messages": sum(
+                message_count for _, message_count in self.modules.values()
+            ),
+            "dynamic": {
+                kind: self.dynamic[kind]
+                for kind in ("codes", "messages", "levels")
+            },
+            "peak_memory_bytes": _peak_memory(),
+            "slowest_modules": [
+                {
+                    "module": python_module,
+                    "parse_secs": parse_seconds,
+                    "messages": message_count
+                }
+                for parse_seconds, python_module, message_count
+                in parsed_modules[:slowest]
+            ],
+            "messages_per_module": collections.OrderedDict(
+                (python_module, message_count)
+                for python_module, (_, message_count) in self.modules.items()
+            ),
+        }
+
+
+class _CatalogWatcher(object):
+    """
+    Warm model of the catalog for the watch mode: the messages of each module
+    are kept in memory, and each poll only parses again the modules whose
+    size or modification time changed before rewriting the catalog.  The
+    contents of the modules modified within :data:`MTIME_GRANULARITY` are
+    hashed as well, as a save of the same size may keep their modification
+    time.  The plugin locations are only looked up once, the top level
+    directories are walked again on each poll to find the added and removed
+    modules.
+    """
+
+    def __init__(self, locations, includes=None, excludes=None,
+                 prefilter=PREFILTER_OFF, sqlite=None, aggregate=False,
+                 shards=False, jobs=1, cache=None):
+        """
+        :param jobs: Number of worker processes parsing the modules, only
+            used when many modules changed.
+        :type jobs: int
+        :param cache: Cache of previously built messages, if any, saved
+            after each rewrite of the catalog.
+        :type cache: :class:`_MessageCache`
+        """
+        self.locations = locations
+        self.includes = includes
+        self.excludes = excludes
+        self.prefilter = prefilter
+        self.sqlite = sqlite
+        self.aggregate = aggregate
+        self.shards = shards
+        self.jobs = jobs
+        self.cache = cache
+        # module location: ((mtime_ns, size), sha1 of the module while its
+        # modification time is recent or None, messages), in discovery order
+        self.modules = collections.OrderedDict()
+
+    def poll(self):
+        """
+        Parses the modules added or changed since the previous poll, every
+        module on the first poll.  A module which fails to parse, as it may
+        while being edited, keeps its previous messages.
+
+        :return: The modules added, changed or removed.
+        :rtype: list [str]
+        """
+        modules = collections.OrderedDict()
+        stale = []
+        # changed without their size or modification time telling
+        unnoticed = []
+        recent_ns = time.time_ns() - int(MTIME_GRANULARITY * 1e9)
+        for python_module in _iter_component_modules(
+            self.locations, self.includes, self.excludes
+        ):
+            try:
+                stat = os.stat(python_module)
+                stat_key = (stat.st_mtime_ns, stat.st_size)
+                # hashed before parsing, a save in between parses it again
+                digest = (
+                    build_common.file_digest(python_module, "sha1")
+                    if stat.st_mtime_ns > recent_ns else None
+                )
+            except FileNotFoundError:
+                continue
+            previous = self.modules.get(python_module)
+            if previous is not None and previous[0] == stat_key:
+                if previous[1] is None or previous[1] == digest:
+                    modules[python_module] = (stat_key, digest, previous[2])
+                    continue
+                if digest is None:
+                    # no longer recent, hash it now as it was hashed before
+                    digest = build_common.file_digest(python_module, "sha1")
+                    if digest == previous[1]:
+                        modules[python_module] = (stat_key, None, previous[2])
+                        continue
+                    digest = None
+                unnoticed.append(python_module)
+            modules[python_module] = (stat_key, digest, None)
+            stale.append(python_module)
+        parsed = [
+            python_module for python_module in stale
+            if python_module not in unnoticed
+        ]
+        id_messages_list = None
+        if self.jobs > 1 and len(parsed) > MODULE_BATCH_SIZE:
+            try:
+                id_messages_list = list(_iter_id_messages(
+                    parsed, self.jobs, self.cache, prefilter=self.prefilter
+                ))
+            except (OSError, SyntaxError, ValueError):
+                # one of the modules is broken, parse them one at a time so
+                # it keeps its previous messages
+                pass
+        if id_messages_list is None:
+            id_messages_list = (
+                self._parse_module(python_module, self.cache)
+                for python_module in parsed
+            )
+        for python_module, id_messages in zip(parsed, id_messages_list):
+            modules[python_module] = modules[python_module][:2] + (
+                id_messages,
+            )
+        for python_module in unnoticed:
+            # the cache would take the module as unchanged, as it goes by the
+            # size and modification time as well
+            if self.cache is not None:
+                self.cache.forget(python_module)
+            modules[python_module] = modules[python_module][:2] + (
+                self._parse_module(python_module),
+            )
+        removed = sorted(set(self.modules).difference(modules))
+        if self.cache is not None:
+            for python_module in removed:
+                self.cache.forget(python_module)
+        self.modules = modules
+        return stale + removed
+
+    def _parse_module(self, python_module, cache=None):
+        """
+        Builds the messages of a module, or keeps its previous messages when
+        it fails to parse.
+
+        :param python_module: Module location to parse.
+        :type python_module: str
+        :param cache: Cache of previously built messages, if any.
+        :type cache: :class:`_MessageCache`
+        :return: The messages of the module.
+        :rtype: list [MessageRecord]
+        """
+        try:
+            _, source, id_messages = _read_module_source(
+                python_module, cache, self.prefilter
+            )
+            if id_messages is None:
+                id_messages = _extract_id_messages(source, python_module)
+                if cache is not None:
+                    cache.store(python_module, id_messages)
+        except (OSError, SyntaxError, ValueError) as error:
+            print("Skipping {0}: {1}".format(python_module, error))
+            if cache is not None:
+                # its previous messages are not those of its current source
+                cache.forget(python_module)
+            previous = self.modules.get(python_module)
+            id_messages = previous[2] if previous is not None else []
+        return id_messages
+
+    def write(self):
+        """
+        Writes the catalog out of the messages held in memory, along with the
+        SQLite, aggregated and sharded catalogs when enabled.
+
+        :return: The number of messages, and whether the catalog changed.
+        :rtype: tuple (int, bool)
+        """
+        id_messages = list(itertools.chain.from_iterable(
+            id_messages for _, _, id_messages in self.modules.values()
+        ))
+        count, changed = _write_message_files(
+            _build_message_elements(id_messages)
+        )
+        if self.sqlite and (changed or not os.path.isfile(self.sqlite)):
+            messages_catalog_db.write_catalog_db(self.sqlite, id_messages)
+        if self.aggregate:
+            aggregates = collections.OrderedDict()
+            _aggregate_id_messages(aggregates, id_messages)
+            _write_aggregated_message_files(
+                _iter_aggregated_elements(aggregates)
+            )
+        if self.shards:
+            _write_shard_files(self.locations, (
+                (python_module, id_messages)
+                for python_module, (_, _, id_messages)
+                in self.modules.items()
+            ))
+        return count, changed
+
+    def watch(self, interval, polls=None):
+        """
+        Polls the modules and rewrites the catalog, and saves the cache,
+        whenever one changed.
+
+        :param interval: Seconds to wait between polls.
+        :type interval: float
+        :param polls: Number of polls before returning, None to poll until
+            interrupted.
+        :type polls: int
+        """
+        for _ in (itertools.repeat(None) if polls is None
+                  else range(polls)):
+            time.sleep(interval)
+            started_at = time.perf_counter()
+            changed_modules = self.poll()
+            if not changed_modules:
+                continue
+            count, changed = self.write()
+            if self.cache is not None:
+                self.cache.save()
+            print("{0} modules changed, catalog of {1} messages {2} in "
+                  "{3:.0f} ms".format(
+                      len(changed_modules), count,
+                      "rewritten" if changed else "unchanged",
+                      (time.perf_counter() - started_at) * 1000
+                  ))
+
+
+def _peak_memory():
+    """
+    Helper function to get the peak resident memory of this process and of
+    its worker processes.
+
+    :return: The peak memory, in bytes, of the process ("self") and of the
+        largest of its finished worker processes ("children"), or None where
+        it is not available.
+    :rtype: dict
+    """
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes, except on macOS where it is in bytes
+    unit = 1 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit,
+        "children":
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit,
+    }
+
+
+def _parse_args(args=None):
+    """
+    Parses the command line arguments of the messages catalog generator.
+
+    :param args: Arguments to parse, defaults to :data:`sys.argv`.
+    :type args: list [str]
+    :return: The parsed arguments.
+    :rtype: :class:`~argparse.Namespace`
+    """
+    parser = argparse.ArgumentParser(
+        description="Generates Arelle's messagesCatalog.xml and .xsd files."
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="number of worker processes used to parse modules "
+             "(default: 1, 0 uses every available CPU)"
+    )
+    parser.add_argument(
+        "--readers", type=int, default=0, metavar="N",
+        help="number of threads reading modules ahead of their parsing, "
+             "for slow or network disks (default: 0, modules are read as "
+             "they are parsed)"
+    )
+    parser.add_argument(
+        "--read-ahead", type=int, default=READ_AHEAD, metavar="N",
+        help="maximum number of modules read ahead by the --readers threads "
+             "(default: {})".format(READ_AHEAD)
+    )
+    parser.add_argument(
+        "--prefilter", default=PREFILTER_ON,
+        choices=(PREFILTER_ON, PREFILTER_OFF, PREFILTER_STRICT),
+        help="skip parsing modules whose source holds no handled call, "
+             "strict parses them anyway and fails if the filter dropped any "
+             "message (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--no-prefilter", dest="prefilter", action="store_const",
+        const=PREFILTER_OFF, help="parse every module, as --prefilter off"
+    )
+    parser.add_argument(
+        "--include", action="append", default=[], metavar="PATTERN",
+        help="glob pattern of the modules to scan, matched against module "
+             "names and paths relative to their package, may be repeated "
+             "(default: every module)"
+    )
+    parser.add_argument(
+        "--exclude", action="append", default=[], metavar="PATTERN",
+        help="glob pattern of the modules and directories to skip, in "
+             "addition to {}, may be repeated".format(
+                 " ".join(DEFAULT_EXCLUDES)
+             )
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="discover, parse and render modules lazily, sorting the catalog "
+             "through temporary files to keep memory flat"
+    )
+    parser.add_argument(
+        "--run-size", type=int, default=STREAM_RUN_SIZE, metavar="N",
+        help="number of messages sorted in memory when streaming "
+             "(default: {})".format(STREAM_RUN_SIZE)
+    )
+    parser.add_argument(
+        "--aggregate", action="store_true",
+        help="also write messagesCatalogAggregated.xml, listing each "
+             "distinct code, level and text once with the module:line "
+             "references of its call sites"
+    )
+    parser.add_argument(
+        "--shards", action="store_true",
+        help="also write one catalog per package or plugin root into "
+             "{0}, with an index of the shards holding each code prefix "
+             "and module".format(SHARDS_DIRECTORY)
+    )
+    parser.add_argument(
+        "--sqlite", metavar="FILE",
+        default=os.path.join(DOC_DIRECTORY, "messagesCatalog.db"),
+        help="indexed SQLite catalog to write alongside the XML catalog "
+             "(default: %(default)s)"
+    )
+    parser.add_argument(
+        "--no-sqlite", dest="sqlite", action="store_const", const=None,
+        help="do not write the SQLite catalog"
+    )
+    parser.add_argument(
+        "--diff", metavar="FILE",
+        help="write a JSON report of the message codes added, removed and "
+             "changed compared with the catalog being replaced"
+    )
+    parser.add_argument(
+        "--report", metavar="FILE",
+        help="write a JSON report of the time spent in each phase, the "
+             "slowest modules to parse, messages per module, dynamic "
+             "messages and peak memory"
+    )
+    parser.add_argument(
+        "--profile", metavar="FILE",
+        help="write a cProfile dump of the generation, of the main process "
+             "only when using --jobs"
+    )
+    parser.add_argument(
+        "--cache", metavar="FILE",
+        help="file caching the messages of each module between builds, "
+             "only changed modules are parsed again"
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="keep running, and rewrite the catalog whenever a module is "
+             "saved, parsing only the changed modules again"
+    )
+    parser.add_argument(
+        "--interval", type=float, default=WATCH_INTERVAL, metavar="SECS",
+        help="seconds between polls of the modules with --watch "
+             "(default: {})".format(WATCH_INTERVAL)
+    )
+    options = parser.parse_args(args)
+    if options.watch and (options.stream or options.diff):
+        parser.error("--watch cannot be combined with --stream or --diff")
+    if options.shards and options.stream:
+        parser.error("--shards cannot be combined with --stream")
+    return options
+
+
+def main(args=None):
+    """
+    Generates the messages catalog.
+
+    :param args: Command line arguments, defaults to :data:`sys.argv`.
+    :type args: list [str]
+    """
+    options = _parse_args(args)
+    generate = _watch_catalog if options.watch else _generate_catalog
+    if options.profile:
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(generate, options)
+        finally:
+            profiler.dump_stats(options.profile)
+    else:
+        generate(options)
+
+
+def _generate_catalog(options):
+    """
+    Generates the messages catalog with the parsed command line options.
 
+    :param options: The parsed command line arguments.
+    :type options: :class:`~argparse.Namespace`
+    """
+    jobs = options.jobs or os.cpu_count() or 1
+    includes = options.include or None
+    excludes = DEFAULT_EXCLUDES + tuple(options.exclude)
+    stats = _CatalogStats()
+    cache = _MessageCache(options.cache) if options.cache else None
+    messages_file_name = os.path.join(DOC_DIRECTORY, "messagesCatalog.xml")
+    if options.diff:
+        with stats.phase("diff"):
+            previous_index = _index_catalog(messages_file_name)
+
+    if options.stream:
+        arelle_files = stats.timed(
+            "discovery", iter_locations(includes, excludes)
+        )
+        module_id_messages = stats.timed(
+            "extraction", _iter_id_messages(
+                arelle_files, jobs, cache, stats, options.readers,
+                options.read_ahead, options.prefilter
+            )
+        )
+        db_writer = None
+        aggregates = collections.OrderedDict()
+        if options.aggregate:
+            module_id_messages = stats.timed("aggregation", _tee(
+                module_id_messages,
+                functools.partial(_aggregate_id_messages, aggregates)
+            ))
+        if options.sqlite:
+            # Insert the id_messages into the database as they are built.
+            db_writer = messages_catalog_db.CatalogDBWriter(options.sqlite)
+            module_id_messages = stats.timed(
+                "sqlite", _tee(module_id_messages, db_writer.add)
+            )
+        id_messages = itertools.chain.from_iterable(module_id_messages)
+        # Render the id_messages into xml lines as they are built.
+        lines = stats.timed("rendering", _iter_message_elements(id_messages))
+        # Write the XML Lines into a file, as well as creating the XSD file.
+        try:
+            with stats.phase("writing"):
+                _, changed = _write_message_files(lines, options.run_size)
+        except BaseException:
+            if db_writer is not None:
+                db_writer.discard()
+            raise
+        if db_writer is not None:
+            with stats.phase("sqlite"):
+                if changed or not os.path.isfile(options.sqlite):
+                    db_writer.close()
+                else:
+                    db_writer.discard()
+    else:
+        id_messages = []
+        with stats.phase("discovery"):
+            locations = _component_locations()
+            arelle_files = list(
+                _iter_component_modules(locations, includes, excludes)
+            )
 
-    # Convert the id_messages into xml lines to be written.
-    lines = _build_message_elements(id_messages)
-    # Write the XML Lines into a file, as well as creating the XSD file.
-    _write_message_files(lines)
+        modules_id_messages = []
+        with stats.phase("extraction"):
+            for module_id_messages in _iter_id_messages(
+                arelle_files, jobs, cache, stats, options.readers,
+                options.read_ahead, options.prefilter
+            ):
+                id_messages.extend(module_id_messages)
+                modules_id_messages.append(module_id_messages)
+
+        aggregates = collections.OrderedDict()
+        if options.aggregate:
+            with stats.phase("aggregation"):
+                _aggregate_id_messages(aggregates, id_messages)
+
+        # Convert the id_messages into xml lines to be written.
+        with stats.phase("rendering"):
+            lines = _build_message_elements(id_messages)
+        # Write the XML Lines into a file, as well as creating the XSD file.
+        with stats.phase("writing"):
+            _, changed = _write_message_files(lines)
+        # The database holds the same messages as the catalog.
+        if options.sqlite and (changed or not os.path.isfile(options.sqlite)):
+            with stats.phase("sqlite"):
+                messages_catalog_db.write_catalog_db(
+                    options.sqlite, id_messages
+                )
+        if options.shards:
+            with stats.phase("shards"):
+                shard_counts = _write_shard_files(
+                    locations, zip(arelle_files, modules_id_messages)
+                )
+    if options.aggregate:
+        with stats.phase("aggregation"):
+            aggregate_count, _ = _write_aggregated_message_files(
+                _iter_aggregated_elements(aggregates)
+            )
+    if cache is not None:
+        with stats.phase("cache"):
+            cache.save()
+    if options.diff:
+        with stats.phase("diff"):
+            if changed:
+                diff = diff_catalogs(
+                    previous_index, _index_catalog(messages_file_name)
+                )
+            else:
+                diff = {"added": [], "removed": [], "changed": []}
 
+    report = stats.report()
     print(
         "Arelle messages catalog {0:.2f} secs, "
-        "{1} formula files, {2} messages".format(
-            time.time() - startedAt,
-            len(arelle_files),
-            len(id_messages)
+        "{1} modules, {2} messages".format(
+            report["total_secs"],
+            report["modules"],
+            report["messages"]
         )
     )
+    if cache is not None:
+        print(
+            "Messages cache {0} hits, {1} misses, {2} removed".format(
+                cache.hits, cache.misses, cache.removed
+            )
+        )
+    if not changed:
+        print("Arelle messages catalog unchanged, not rewritten")
+    if options.aggregate:
+        print("Aggregated messages catalog {0} messages".format(
+            aggregate_count
+        ))
+    if options.shards:
+        print("Messages catalog shards {0}".format(", ".join(
+            "{0} {1} messages".format(name, count)
+            for name, count in shard_counts.items()
+        )))
+    if options.diff:
+        print(
+            "Messages catalog diff {0} added, {1} removed, "
+            "{2} changed codes".format(
+                len(diff["added"]), len(diff["removed"]), len(diff["changed"])
+            )
+        )
+        with io.open(options.diff, 'wt', encoding='utf-8') as diff_file:
+            json.dump(diff, diff_file, indent=2)
+    if options.report:
+        with io.open(options.report, 'wt', encoding='utf-8') as report_file:
+            json.dump(report, report_file, indent=2)
+
+
+def _watch_catalog(options):
+    """
+    Generates the messages catalog, then keeps rewriting it as modules change
+    until interrupted.
+
+    :param options: The parsed command line arguments.
+    :type options: :class:`~argparse.Namespace`
+    """
+    started_at = time.perf_counter()
+    cache = _MessageCache(options.cache) if options.cache else None
+    watcher = _CatalogWatcher(
+        _component_locations(), options.include or None,
+        DEFAULT_EXCLUDES + tuple(options.exclude), options.prefilter,
+        options.sqlite, options.aggregate, options.shards,
+        options.jobs or os.cpu_count() or 1, cache
+    )
+    watcher.poll()
+    count, _ = watcher.write()
+    if cache is not None:
+        cache.save()
+    print(
+        "Arelle messages catalog {0:.2f} secs, {1} modules, {2} messages, "
+        "watching for changes every {3} secs".format(
+            time.perf_counter() - started_at, len(watcher.modules), count,
+            options.interval
+        )
+    )
+    try:
+        watcher.watch(options.interval)
+    except KeyboardInterrupt:
+        print("Stopped watching")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Indexed SQLite version of the Arelle messages catalog, emitted by
+generate_messages_catalog.py alongside messagesCatalog.xml, and the API to
+look messages up in it without parsing the XML catalog:
+
+    with MessagesCatalogDB("arelle/doc/messagesCatalog.db") as catalog:
+        for message in catalog.by_code("EFM.6.05.20"):
+            print(message.level, message.message)
+
+"""
+
+import collections
+import os
+import sqlite3
+
+
+CATALOG_DB_SCHEMA_VERSION = 1
+_CREATE_TABLE = """
+CREATE TABLE messages (
+    code TEXT NOT NULL,
+    level TEXT NOT NULL,
+    module TEXT,
+    line INTEGER,
+    args TEXT,
+    message TEXT
+)
+"""
+_CREATE_INDEXES = (
+    "CREATE INDEX messages_code ON messages (code)",
+    "CREATE INDEX messages_module ON messages (module)",
+    "CREATE INDEX messages_level ON messages (level)",
+)
+_SELECT = "SELECT code, level, module, line, args, message FROM messages "
+
+CatalogMessage = collections.namedtuple(
+    "CatalogMessage", ["code", "level", "module", "line", "args", "message"]
+)
+
+
+class CatalogDBWriter(object):
+    """
+    Writes a catalog database from message records as they are built.  The
+    database is written to a temporary file which only replaces the target
+    once it has been completely written and indexed.
+    """
+
+    def __init__(self, db_file_name):
+        self.db_file_name = db_file_name
+        self.temp_file_name = db_file_name + ".tmp"
+        self.message_count = 0
+        directory = os.path.dirname(db_file_name)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.temp_file_name):
+            os.remove(self.temp_file_name)
+        self.connection = sqlite3.connect(self.temp_file_name)
+        # the file is thrown away on failure, no need to journal writes
+        self.connection.execute("PRAGMA journal_mode = OFF")
+        self.connection.execute("PRAGMA synchronous = OFF")
+        self.connection.execute(
+            "PRAGMA user_version = {:d}".format(CATALOG_DB_SCHEMA_VERSION)
+        )
+        self.connection.execute(_CREATE_TABLE)
+
+    def add(self, id_messages):
+        """
+        Inserts message records into the database.
+
+        :param id_messages: Records with the attributes of
+            :class:`~utilities.generate_messages_catalog.MessageRecord`.
+        :type id_messages: iterable
+        """
+        cursor = self.connection.executemany(
+            "INSERT INTO messages VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    id_message.message_code, id_message.level,
+                    id_message.reference_filename, id_message.line_number,
+                    id_message.keyword_arguments, id_message.message
+                )
+                for id_message in id_messages
+            )
+        )
+        self.message_count += cursor.rowcount
+
+    def close(self):
+        """
+        Indexes the database and moves it in place.
+        """
+        # indexing once all rows are in is much faster than maintaining the
+        # indexes on each insert
+        for create_index in _CREATE_INDEXES:
+            self.connection.execute(create_index)
+        self.connection.commit()
+        self.connection.close()
+        os.replace(self.temp_file_name, self.db_file_name)
+
+    def discard(self):
+        """
+        Drops the partially written database.
+        """
+        self.connection.close()
+        os.remove(self.temp_file_name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+def write_catalog_db(db_file_name, id_messages):
+    """
+    Writes a catalog database.
+
+    :param db_file_name: Path of the database to write.
+    :type db_file_name: str
+    :param id_messages: Records with the attributes of
+        :class:`~utilities.generate_messages_catalog.MessageRecord`.
+    :type id_messages: iterable
+    :return: The number of messages written.
+    :rtype: int
+    """
+    with CatalogDBWriter(db_file_name) as writer:
+        writer.add(id_messages)
+    return writer.message_count
+
+
+class MessagesCatalogDB(object):
+    """
+    Read only lookups of messages in a catalog database.  Every lookup is
+    served by an index.
+    """
+
+    def __init__(self, db_file_name):
+        self.connection = sqlite3.connect(
+            "file:{}?mode=ro".format(_uri_path(db_file_name)), uri=True,
+            check_same_thread=False
+        )
+        schema_version = self.connection.execute(
+            "PRAGMA user_version"
+        ).fetchone()[0]
+        if schema_version != CATALOG_DB_SCHEMA_VERSION:
+            self.connection.close()
+            raise ValueError(
+                "{} has catalog schema version {}, expected {}".format(
+                    db_file_name, schema_version, CATALOG_DB_SCHEMA_VERSION
+                )
+            )
+
+    def _select(self, where, parameters):
+        return [
+            CatalogMessage(*row)
+            for row in self.connection.execute(
+                _SELECT + where + " ORDER BY code, module, line", parameters
+            )
+        ]
+
+    def by_code(self, code):
+        """
+        :param code: A message code, such as "EFM.6.05.20".
+        :type code: str
+        :return: The messages logged with the code.
+        :rtype: list [:class:`CatalogMessage`]
+        """
+        return self._select("WHERE code = ?", (code,))
+
+    def by_code_prefix(self, prefix):
+        """
+        :param prefix: The start of message codes, such as "EFM.6.".
+        :type prefix: str
+        :return: The messages logged with codes starting with the prefix.
+        :rtype: list [:class:`CatalogMessage`]
+        """
+        if not prefix:
+            return self._select("", ())
+        # a range over the code index, unlike LIKE which is case insensitive
+        upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return self._select(
+            "WHERE code >= ? AND code < ?", (prefix, upper_bound)
+        )
+
+    def by_module(self, module):
+        """
+        :param module: A module file name, such as "ValidateXbrl.py".
+        :type module: str
+        :return: The messages logged by the module.
+        :rtype: list [:class:`CatalogMessage`]
+        """
+        return self._select("WHERE module = ?", (module,))
+
+    def by_level(self, level):
+        """
+        :param level: A level, such as "error".
+        :type level: str
+        :return: The messages logged at the level.
+        :rtype: list [:class:`CatalogMessage`]
+        """
+        return self._select("WHERE level = ?", (level,))
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _uri_path(file_name):
+    """
+    Helper function to quote a file name for a sqlite URI.
+
+    :param file_name: The file name.
+    :type file_name: str
+    :return: The quoted absolute path.
+    :rtype: str
+    """
+    path = os.path.abspath(file_name).replace(os.sep, "/")
+    if not path.startswith("/"):
+        path = "/" + path  # windows drive letter
+    return path.replace("%", "%25").replace("?", "%3f").replace("#", "%23")
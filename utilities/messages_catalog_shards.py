@@ -0,0 +1,200 @@
+"""
+Sharded version of the Arelle messages catalog, emitted by
+generate_messages_catalog.py --shards alongside messagesCatalog.xml: one
+catalog per package or plugin root, such as arelle or each installed plugin,
+and an index mapping message code prefixes and modules to the shards holding
+their messages.  The API looks messages up opening only the shards it needs:
+
+    catalog = MessagesCatalogShards("arelle/doc/messagesCatalogShards")
+    for message in catalog.by_code("EFM.6.05.20"):
+        print(message.level, message.message)
+
+"""
+
+import collections
+import io
+import json
+import os
+import re
+from xml.etree import ElementTree
+
+try:
+    from utilities.messages_catalog_db import CatalogMessage
+except ImportError:  # run as a script from within the utilities directory
+    from messages_catalog_db import CatalogMessage
+
+
+SHARD_INDEX_FILE = "index.json"
+SHARD_INDEX_VERSION = 1
+_CODE_SEPARATOR = re.compile(r"[.:]")
+
+
+def code_prefix(code):
+    """
+    :param code: A message code, such as "EFM.6.05.20" or "xbrl:foo".
+    :type code: str
+    :return: The start of the code up to its first . or :, such as "EFM",
+        which shards are indexed by.
+    :rtype: str
+    """
+    return _CODE_SEPARATOR.split(code, 1)[0]
+
+
+def write_shard_index(shards_directory, shards):
+    """
+    Writes the index of the shards.  The index is left untouched when its
+    content did not change.
+
+    :param shards_directory: Directory of the shards.
+    :type shards_directory: str
+    :param shards: The messages of each shard, keyed by shard name, records
+        with the attributes of
+        :class:`~utilities.generate_messages_catalog.MessageRecord`.
+    :type shards: dict {str: list}
+    :return: The index.
+    :rtype: dict
+    """
+    prefixes = collections.defaultdict(set)
+    modules = collections.defaultdict(set)
+    shard_entries = collections.OrderedDict()
+    for name, id_messages in shards.items():
+        shard_modules = set()
+        for id_message in id_messages:
+            prefixes[code_prefix(id_message.message_code)].add(name)
+            modules[id_message.reference_filename].add(name)
+            shard_modules.add(id_message.reference_filename)
+        shard_entries[name] = collections.OrderedDict([
+            ("file", name + ".xml"),
+            ("messages", len(id_messages)),
+            ("modules", len(shard_modules)),
+        ])
+    index = collections.OrderedDict([
+        ("version", SHARD_INDEX_VERSION),
+        ("shards", shard_entries),
+        ("prefixes", collections.OrderedDict(
+            (prefix, sorted(prefixes[prefix])) for prefix in sorted(prefixes)
+        )),
+        ("modules", collections.OrderedDict(
+            (module, sorted(modules[module])) for module in sorted(modules)
+        )),
+    ])
+    content = json.dumps(index, indent=2)
+    index_file_name = os.path.join(shards_directory, SHARD_INDEX_FILE)
+    try:
+        with io.open(index_file_name, "rt", encoding="utf-8") as index_file:
+            if index_file.read() == content:
+                return index
+    except OSError:
+        pass
+    os.makedirs(shards_directory, exist_ok=True)
+    with io.open(index_file_name + ".tmp", "wt",
+                 encoding="utf-8") as index_file:
+        index_file.write(content)
+    os.replace(index_file_name + ".tmp", index_file_name)
+    return index
+
+
+class MessagesCatalogShards(object):
+    """
+    Read only lookups of messages in a sharded catalog.  Only the index is
+    read up front, each shard is parsed the first time a lookup needs it.
+    """
+
+    def __init__(self, shards_directory, shards=None):
+        """
+        :param shards_directory: Directory of the shards.
+        :type shards_directory: str
+        :param shards: Names of the shards to look messages up in, such as
+            arelle and the plugins in use, None for every shard.
+        :type shards: iterable [str]
+        """
+        self.shards_directory = shards_directory
+        with io.open(os.path.join(shards_directory, SHARD_INDEX_FILE), "rt",
+                     encoding="utf-8") as index_file:
+            self.index = json.load(index_file)
+        if self.index.get("version") != SHARD_INDEX_VERSION:
+            raise ValueError(
+                "{} has shard index version {}, expected {}".format(
+                    shards_directory, self.index.get("version"),
+                    SHARD_INDEX_VERSION
+                )
+            )
+        self.shard_names = [
+            name for name in self.index["shards"]
+            if shards is None or name in shards
+        ]
+        self.loaded_shards = collections.OrderedDict()
+
+    def shard(self, name):
+        """
+        :param name: A shard name, such as "arelle".
+        :type name: str
+        :return: The messages of the shard.
+        :rtype: list [:class:`~utilities.messages_catalog_db.CatalogMessage`]
+        """
+        messages = self.loaded_shards.get(name)
+        if messages is None:
+            root = ElementTree.parse(os.path.join(
+                self.shards_directory, self.index["shards"][name]["file"]
+            )).getroot()
+            messages = self.loaded_shards[name] = [
+                CatalogMessage(
+                    element.get("code"), element.get("level"),
+                    element.get("module"), int(element.get("line")),
+                    element.get("args"), element.text.strip("\n")
+                )
+                for element in root
+            ]
+        return messages
+
+    def _select(self, shard_names, predicate):
+        return sorted(
+            (
+                message
+                for name in self.shard_names if name in shard_names
+                for message in self.shard(name)
+                if predicate(message)
+            ),
+            key=lambda message: (message.code, message.module, message.line)
+        )
+
+    def by_code(self, code):
+        """
+        :param code: A message code, such as "EFM.6.05.20".
+        :type code: str
+        :return: The messages logged with the code.
+        :rtype: list [:class:`~utilities.messages_catalog_db.CatalogMessage`]
+        """
+        return self._select(
+            self.index["prefixes"].get(code_prefix(code), ()),
+            lambda message: message.code == code
+        )
+
+    def by_code_prefix(self, prefix):
+        """
+        :param prefix: The start of message codes, such as "EFM.6.".
+        :type prefix: str
+        :return: The messages logged with codes starting with the prefix.
+        :rtype: list [:class:`~utilities.messages_catalog_db.CatalogMessage`]
+        """
+        shard_names = set()
+        for indexed_prefix, names in self.index["prefixes"].items():
+            # the prefix may end within the indexed prefix, or go past it
+            if (indexed_prefix.startswith(prefix) or
+                    code_prefix(prefix) == indexed_prefix):
+                shard_names.update(names)
+        return self._select(
+            shard_names, lambda message: message.code.startswith(prefix)
+        )
+
+    def by_module(self, module):
+        """
+        :param module: A module file name, such as "ValidateXbrl.py".
+        :type module: str
+        :return: The messages logged by the module.
+        :rtype: list [:class:`~utilities.messages_catalog_db.CatalogMessage`]
+        """
+        return self._select(
+            self.index["modules"].get(module, ()),
+            lambda message: message.module == module
+        )
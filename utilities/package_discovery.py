@@ -0,0 +1,171 @@
+"""
+Discovery of the python modules and plugin distributions the builds work
+on, shared by generate_messages_catalog.py and build_import_graph.py: walking
+package directories for their modules, and naming the distributions of
+requirement lines and the packages they install.  Nothing here imports Arelle
+or the plugins.
+"""
+
+import collections
+import fnmatch
+import importlib.metadata
+import os
+import re
+
+
+DEFAULT_EXCLUDES = ("__pycache__", ".*")
+# relative to the utilities directory
+PLUGINS_FILE = "../requirements_plugins.txt"
+NON_LIBRARY_PLUGINS = "../non_library_plugins"
+_EGG_FRAGMENT = re.compile(r"[#&]egg=([A-Za-z0-9][A-Za-z0-9._]*)")
+_REQUIREMENT_NAME = re.compile(r"\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+
+
+def find_modules_and_directories(top_level_directory, includes=None,
+                                 excludes=None, seen_paths=None):
+    """
+    Generator function to find all python files included in top level
+    package. This will walk down the directory paths of any package to find
+    all modules and subpackages in order to yield an exhaustive list of all
+    python files within a given package, as they are found.
+
+    Directories are scanned with :func:`os.scandir`, so only symbolic links
+    cost an extra stat, and every directory and module is only visited once
+    by its real path, which also stops symbolic link cycles.
+
+    :param top_level_directory: Path to the top level of a python package.
+    :type top_level_directory: str
+    :param includes: Glob patterns of the modules to keep, matched against
+        the module name and its path relative to the top level directory.
+        None keeps every module.
+    :type includes: list [str]
+    :param excludes: Glob patterns of the modules and directories to skip,
+        matched the same way, defaults to :data:`DEFAULT_EXCLUDES`.
+    :type excludes: list [str]
+    :param seen_paths: Real paths already visited, shared between top level
+        directories so overlapping packages are only walked once.
+    :type seen_paths: set [str]
+    :return: Yields the paths to all python files within that package.
+    :rtype: iterable [str]
+    """
+    if excludes is None:
+        excludes = DEFAULT_EXCLUDES
+    if seen_paths is None:
+        seen_paths = set()
+    top_level_real_path = os.path.realpath(top_level_directory)
+    if top_level_real_path in seen_paths:
+        return
+    seen_paths.add(top_level_real_path)
+    directories = [(top_level_directory, top_level_real_path, "")]
+
+    while directories:
+        directory, real_directory, relative_directory = directories.pop()
+        try:
+            with os.scandir(directory) as scanned_entries:
+                entries = sorted(scanned_entries, key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirectories = []
+        for entry in entries:
+            relative_path = relative_directory + entry.name
+            if matches_any(entry.name, relative_path, excludes):
+                continue
+            # only symbolic links can lead outside of the real directory
+            if entry.is_symlink():
+                real_path = os.path.realpath(entry.path)
+            else:
+                real_path = os.path.join(real_directory, entry.name)
+            if entry.name.endswith(".py"):
+                if (includes is not None and
+                        not matches_any(entry.name, relative_path, includes)):
+                    continue
+                if real_path not in seen_paths:
+                    seen_paths.add(real_path)
+                    yield entry.path
+            elif entry.is_dir() and real_path not in seen_paths:
+                seen_paths.add(real_path)
+                subdirectories.append(
+                    (entry.path, real_path, relative_path + "/")
+                )
+        directories.extend(reversed(subdirectories))
+
+
+def matches_any(name, relative_path, patterns):
+    """
+    Matches a directory entry against glob patterns.
+
+    :param name: Name of the entry.
+    :type name: str
+    :param relative_path: Path of the entry relative to the top level
+        directory, with / separators.
+    :type relative_path: str
+    :param patterns: Glob patterns to match.
+    :type patterns: list [str]
+    :return: True if the name or the relative path match any pattern.
+    :rtype: bool
+    """
+    return any(
+        fnmatch.fnmatchcase(name, pattern) or
+        fnmatch.fnmatchcase(relative_path, pattern)
+        for pattern in patterns
+    )
+
+
+def requirement_name(requirement):
+    """
+    Gets the distribution name out of a requirement line,
+    such as `name`, `name==1.0`, `name>=1.0`, `name~=1.0`,
+    `name[extra]>=1.0; python_version>"3"`, `name @ https://host/name.zip`
+    or `git+https://host/name.git#egg=name`.
+
+    :param requirement: The requirement line.
+    :type requirement: str
+    :return: The distribution name, or None when the line does not name one.
+    :rtype: str
+    """
+    requirement = requirement.split(" #", 1)[0].strip()
+    if requirement.startswith("-e "):
+        requirement = requirement[3:].strip()
+    if not requirement or requirement.startswith(("#", "-")):
+        return None
+    egg_fragment = _EGG_FRAGMENT.search(requirement)
+    if egg_fragment:
+        return egg_fragment.group(1)
+    if "://" in requirement.split("@", 1)[0]:
+        # a bare URL without an egg fragment does not name its distribution
+        return None
+    return _REQUIREMENT_NAME.match(requirement).group(1)
+
+
+def distribution_import_names(distribution_name):
+    """
+    Lists the top level import names provided by an installed distribution,
+    without importing it.
+
+    :param distribution_name: The name the distribution is installed under.
+    :type distribution_name: str
+    :return: The import names, best guesses first.
+    :rtype: list [str]
+    """
+    import_names = [distribution_name.replace("-", "_")]
+    try:
+        distribution = importlib.metadata.distribution(distribution_name)
+    except importlib.metadata.PackageNotFoundError:
+        distribution = None
+    if distribution is not None:
+        top_level = distribution.read_text("top_level.txt")
+        if top_level:
+            import_names.extend(top_level.split())
+        else:
+            for distribution_file in distribution.files or ():
+                parts = distribution_file.parts
+                if parts[0].endswith((".dist-info", ".egg-info")):
+                    continue
+                if len(parts) > 1 and parts[-1] == "__init__.py":
+                    import_names.append(parts[0])
+                elif len(parts) == 1 and parts[0].endswith(".py"):
+                    import_names.append(parts[0][:-3])
+    return list(collections.OrderedDict.fromkeys(
+        import_name for import_name in import_names
+        if not import_name.startswith("_")
+    ))